@@ -0,0 +1,39 @@
+"""Wall time of `python -c 'import latex2json; TexReader()'`.
+
+Run as: python benchmarks/startup.py [runs]
+Set LATEX2JSON_CACHE_DIR to include the disk cache.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_SCRIPT = "import latex2json; latex2json.TexReader()"
+
+
+def time_startup(runs: int = 20) -> list[float]:
+    """Seconds taken by each of runs fresh interpreters"""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], cwd=ROOT, check=True)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    # interpreter startup alone, to subtract
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], cwd=ROOT, check=True)
+    baseline = time.perf_counter() - start
+
+    times = time_startup(runs)
+    print(f"python -c pass: {baseline * 1000:.1f}ms")
+    print(
+        f"import + TexReader() over {runs} runs: "
+        f"min {min(times) * 1000:.1f}ms, median {statistics.median(times) * 1000:.1f}ms"
+    )
@@ -0,0 +1,37 @@
+"""strip_latex_comments on a few MB of comment heavy LaTeX, and again on its output.
+
+Run as: python benchmarks/strip_comments.py [size_in_mb]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from latex2json.utils.tex_utils import strip_latex_comments
+
+CHUNK = (
+    "\\section{Intro} % section comment\n"
+    "Some text with 50\\% and \\\\% a comment   \n"
+    "%% full line comment\n"
+    "\\begin{equation}x^2 \t\n\\end{equation}\n"
+)
+
+
+def best_of(func, repeat: int = 5) -> float:
+    """Fastest of repeat calls, in seconds"""
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+if __name__ == "__main__":
+    size = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    text = CHUNK * int(size * 1_000_000 // len(CHUNK))
+    stripped = strip_latex_comments(text)
+
+    print(f"input: {len(text) / 1_000_000:.1f}MB")
+    print(f"strip: {best_of(lambda: strip_latex_comments(text)) * 1000:.1f}ms")
+    print(
+        f"already stripped: "
+        f"{best_of(lambda: strip_latex_comments(stripped)) * 1000:.1f}ms"
+    )
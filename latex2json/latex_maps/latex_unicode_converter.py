@@ -1,95 +1,316 @@
+import marshal
+import os
 import re
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 
-from latex2json.latex_maps._latex2unicode_map import latex2unicode
+from latex2json.utils.disk_cache import file_cache_key, load_cache, save_cache
 
 UNICODE_PATTERN = r"\\u([0-9a-fA-F]{4,6})"
+UNICODE_REGEX = re.compile(UNICODE_PATTERN)
+
+# chars a command can start with, the converter skips straight between them
+SPECIAL_CHARS_REGEX = re.compile(r"[\\{]")
+
+# commands are converted in this order of precedence
+CATEGORIES = ("ensuremath", "text", "math", "font", "other")
+
+# trie node key holding the command that ends at that node
+_END = ""
+
+_MAP_FILE = os.path.join(os.path.dirname(__file__), "_latex2unicode_map.py")
+_CACHE_NAMESPACE = "unicode_converter"
+
+
+def _category(cmd: str) -> int:
+    if cmd.startswith("\\ensuremath"):
+        category = "ensuremath"
+    elif cmd.startswith("\\text"):
+        category = "text"
+    elif cmd.startswith("\\math"):
+        category = "math"
+    elif "font" in cmd:
+        category = "font"
+    else:
+        category = "other"
+    return CATEGORIES.index(category)
+
+
+def _has_special_chars(text: str) -> bool:
+    return "\\" in text or "{" in text
+
+
+def _masks_lookahead(value: str) -> bool:
+    # would this output make a preceding command look like it runs on into a letter
+    return value == "" or (value[0].isascii() and value[0].isalpha())
+
+
+class _Entry:
+    __slots__ = (
+        "category",
+        "index",
+        "value",
+        "braced_value",
+        "needs_boundary",
+        "inner_offsets",
+    )
+
+    def __init__(
+        self, cmd: str, category: int, index: int, value: str, braced_value: str
+    ):
+        self.category = category
+        self.index = index
+        self.value = value
+        self.braced_value = braced_value
+        # \foo matches as \foo{} or as \foo not followed by a letter (no partial match)
+        self.needs_boundary = cmd[-1].isalpha() or cmd[-1] == "@"
+        # where a command of an earlier category may start inside this one
+        self.inner_offsets = [i for i in range(1, len(cmd)) if cmd[i] in "\\{"]
 
 
 class LatexUnicodeConverter:
-    # Class-level storage
+    """Converts LaTeX symbol commands and \\uXXXX escapes to unicode.
+
+    Commands are looked up in a trie while scanning the text once, jumping from one
+    backslash or brace to the next. Where several commands could apply, the result is
+    the same as substituting each category in CATEGORIES over the whole text in turn,
+    each in map order: the earlier category wins, then the earlier command.
+    """
+
+    # Class-level storage, filled on first conversion
     _latex2str: Dict[str, str] = None
-    _patterns = None
+    _trie: Dict = None
+    # lowest category with an output that can change what a preceding command sees
+    _masking_category: int = None
+    # category ranges that have to be converted one after the other, because the
+    # last category of a range can output new commands (e.g. \textbackslash -> \)
+    _stages: List[Tuple[int, int]] = None
+    _max_command_length: int = 0
 
     @classmethod
     def _ensure_initialized(cls):
-        if cls._latex2str is None:
-            cls._latex2str = cls._init_latex2unicode()
-            cls._patterns = cls._create_categorized_regex_patterns()
+        if cls._trie is None:
+            cls._create_command_trie(cls._load_command_table())
 
     @classmethod
     def _init_latex2unicode(cls):
+        from latex2json.latex_maps._latex2unicode_map import latex2unicode
+
         _latex2str: Dict[str, str] = {}
         for key, value in latex2unicode.items():
             _latex2str[key] = value if isinstance(value, str) else chr(value)
         return _latex2str
 
     @classmethod
-    def _create_categorized_regex_patterns(cls):
-        patterns = {
-            "unicode": [UNICODE_PATTERN],  # add unicode at top to check it first
-            "ensuremath": [],
-            "text": [],
-            "math": [],
-            "font": [],
-            "other": [],
-        }
-
-        # Categorize each command
-        for cmd in cls._latex2str.keys():
+    def _get_latex2str(cls) -> Dict[str, str]:
+        if cls._latex2str is None:
+            cls._latex2str = cls._init_latex2unicode()
+        return cls._latex2str
+
+    @classmethod
+    def _lookup(cls, matched: str) -> str:
+        c = matched.strip()
+        if c.endswith("{}"):
+            c = c[:-2].strip()
+        return cls._get_latex2str().get(c, c)
+
+    @classmethod
+    def _load_command_table(cls) -> List[Tuple[str, int, str, str]]:
+        """(cmd, category, value, braced_value) per command, from the disk cache if enabled"""
+        key = file_cache_key(_MAP_FILE, __file__)
+        table = load_cache(_CACHE_NAMESPACE, key, serializer=marshal)
+        if table is None:
+            table = cls._build_command_table()
+            save_cache(_CACHE_NAMESPACE, key, table, serializer=marshal)
+        return table
+
+    @classmethod
+    def _build_command_table(cls) -> List[Tuple[str, int, str, str]]:
+        table = []
+        for cmd in cls._get_latex2str().keys():
             if not cmd.startswith("\\") and not cmd.startswith("{"):
                 continue
+            table.append(
+                (cmd, _category(cmd), cls._lookup(cmd), cls._lookup(cmd + "{}"))
+            )
+        return table
+
+    @classmethod
+    def _create_command_trie(cls, table: List[Tuple[str, int, str, str]]):
+        trie: Dict = {}
+        counts = [0] * len(CATEGORIES)
+        masking_category = len(CATEGORIES)
+        stage_ends = {len(CATEGORIES) - 1}
+        max_command_length = 0
+        for cmd, category, value, braced_value in table:
+            entry = _Entry(cmd, category, counts[category], value, braced_value)
+            counts[category] += 1
+            if _masks_lookahead(value):
+                masking_category = min(masking_category, category)
+            if _has_special_chars(value + braced_value):
+                stage_ends.add(category)
+
+            node = trie
+            for char in cmd:
+                node = node.setdefault(char, {})
+            node[_END] = entry
+            max_command_length = max(max_command_length, len(cmd))
+
+        cls._masking_category = masking_category
+        cls._max_command_length = max_command_length
+        cls._stages = []
+        start = 0
+        for end in sorted(stage_ends):
+            cls._stages.append((start, end))
+            start = end + 1
+        cls._trie = trie
+
+    # Tables are built on first use, text without commands never needs them
+    @property
+    def latex2str(self) -> Dict[str, str]:
+        return self._get_latex2str()
+
+    @property
+    def trie(self) -> Dict:
+        self._ensure_initialized()
+        return self._trie
+
+    @staticmethod
+    def _convert_unicode_escape(match: re.Match) -> str:
+        try:
+            return chr(int(match.group(1), 16))
+        except (ValueError, IndexError):
+            return match.group(0)
 
-            # Add word boundary after the command to prevent partial matches
-            escaped = re.escape(cmd)
-            if escaped[-1].isalpha() or escaped[-1] == "@":
-                escaped = r"(?:%s\{\}|%s(?![a-zA-Z]))" % (escaped, escaped)
-            if cmd.startswith("\\ensuremath"):
-                patterns["ensuremath"].append(escaped)
-            elif cmd.startswith("\\text"):
-                patterns["text"].append(escaped)
-            elif cmd.startswith("\\math"):
-                patterns["math"].append(escaped)
-            elif "font" in cmd:
-                patterns["font"].append(escaped)
+    def _match(
+        self, text: str, pos: int, min_category: int, max_category: int
+    ) -> Optional[Tuple[int, int, str]]:
+        """(category, end, replacement) of the command conversion at pos, if any"""
+        candidates: List[Tuple[int, int, int, str, _Entry]] = []
+        node = self._trie
+        end = len(text)
+        i = pos
+        while i < end:
+            node = node.get(text[i])
+            if node is None:
+                break
+            i += 1
+            entry: _Entry = node.get(_END)
+            if entry is None or not min_category <= entry.category <= max_category:
+                continue
+            if not entry.needs_boundary:
+                value, cmd_end = entry.value, i
+            elif text.startswith("{}", i):
+                value, cmd_end = entry.braced_value, i + 2
+            elif not self._continues_with_letter(text, i, min_category, entry.category):
+                value, cmd_end = entry.value, i
             else:
-                patterns["other"].append(escaped)
+                continue
+            candidates.append((entry.category, entry.index, cmd_end, value, entry))
+
+        if len(candidates) > 1:
+            candidates.sort(key=lambda c: c[:2])
+        for category, _, cmd_end, value, entry in candidates:
+            if not self._rewritten_inside(text, pos, min_category, entry):
+                return category, cmd_end, value
+        return None
 
-        # Compile patterns for each category
-        compiled_patterns = {}
-        for category, pattern_list in patterns.items():
-            if pattern_list:  # Only compile if we have patterns
-                compiled_patterns[category] = re.compile("|".join(pattern_list))
+    def _continues_with_letter(
+        self, text: str, pos: int, min_category: int, category: int
+    ) -> bool:
+        """Is text[pos] a letter, once the earlier categories have been converted"""
+        if pos >= len(text):
+            return False
+        char = text[pos]
+        if char in "\\{" and category > max(min_category, self._masking_category):
+            earlier = self._match(text, pos, min_category, category - 1)
+            if earlier is not None and _masks_lookahead(earlier[2]):
+                if earlier[2]:
+                    char = earlier[2][0]
+                elif earlier[1] < len(text):
+                    char = text[earlier[1]]
+        return char.isascii() and char.isalpha()
 
-        return compiled_patterns
+    def _rewritten_inside(
+        self, text: str, pos: int, min_category: int, entry: _Entry
+    ) -> bool:
+        """Would an earlier category convert part of the command at pos first"""
+        if entry.category == min_category:
+            return False
+        for offset in entry.inner_offsets:
+            if self._match(text, pos + offset, min_category, entry.category - 1):
+                return True
+        return False
+
+    def _convert_commands(
+        self, text: str, min_category: int, max_category: int
+    ) -> Optional[str]:
+        """Convert the commands of the given categories in one scan.
+
+        Returns None if a category before max_category outputs new commands, which the
+        later categories would have to see.
+        """
+        out: List[str] = []
+        # backslashes/braces left as they are, a later output may still complete them
+        kept: List[int] = []
+        pos = 0
+        while True:
+            found = SPECIAL_CHARS_REGEX.search(text, pos)
+            if not found:
+                break
+            start = found.start()
+            match = self._match(text, start, min_category, max_category)
+            if match is None:
+                kept.append(start)
+                out.append(text[pos : start + 1])
+                pos = start + 1
+                continue
 
-    def __init__(self):
-        self.__class__._ensure_initialized()
-        # Use direct reference to class variables
-        self.latex2str = self.__class__._latex2str
-        self.patterns = self.__class__._patterns
+            category, end, value = match
+            if category < max_category and (
+                _has_special_chars(value)
+                or self._completes_kept(text, kept, start, value)
+            ):
+                return None
+            out.append(text[pos:start])
+            out.append(value)
+            pos = end
+
+        out.append(text[pos:])
+        return "".join(out)
+
+    def _completes_kept(
+        self, text: str, kept: List[int], start: int, value: str
+    ) -> bool:
+        """Could value form a new command with an unconverted \\ or { before it"""
+        for kept_pos in reversed(kept):
+            if start - kept_pos >= self._max_command_length:
+                break
+            node = self._trie
+            for char in text[kept_pos:start] + value:
+                node = node.get(char)
+                if node is None:
+                    break
+            else:
+                return True
+        return False
 
     def convert(self, text: str) -> str:
-        result = text
-
-        def handle_match(match, pattern_type):
-            c = match.group(0).strip()
-            # Handle Unicode escape sequences
-            if pattern_type == "unicode":
-                try:
-                    return chr(int(match.group(1), 16))
-                except (ValueError, IndexError):
-                    return c
-            # Handle regular LaTeX commands
-            if c.endswith("{}"):
-                c = c[:-2].strip()
-            return self.latex2str.get(c, c)
-
-        # Process in specific order: longer commands first
-        for pattern_type, pattern in self.patterns.items():
-            result = pattern.sub(lambda m: handle_match(m, pattern_type), result)
-
-        return result
+        # add unicode at top to check it first
+        if "\\u" in text:
+            text = UNICODE_REGEX.sub(self._convert_unicode_escape, text)
+        if not _has_special_chars(text):
+            return text
+
+        self._ensure_initialized()
+        result = self._convert_commands(text, 0, len(CATEGORIES) - 1)
+        if result is not None:
+            return result
+
+        # e.g. \textbackslash{}\$: convert category by category, as \\$ -> $ as well
+        for min_category, max_category in self._stages:
+            if _has_special_chars(text):
+                text = self._convert_commands(text, min_category, max_category)
+        return text
 
 
 # Example usage
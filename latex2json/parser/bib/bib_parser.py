@@ -1,7 +1,9 @@
+from collections import OrderedDict
 from logging import Logger
 import logging
 import os
-from typing import List
+import pickle
+from typing import Collection, List, Optional
 
 from latex2json.parser.bib.bibtex_parser import (
     BibTexEntry,
@@ -9,11 +11,20 @@ from latex2json.parser.bib.bibtex_parser import (
 )
 from latex2json.parser.bib.bibdiv_parser import BibDivParser
 from latex2json.parser.bib.bibitem_parser import BibItemParser
+from latex2json.utils.disk_cache import (
+    cache_key,
+    get_cache_dir,
+    load_cache,
+    package_code_key,
+    save_cache,
+)
 from latex2json.utils.tex_utils import (
     strip_latex_comments,
     normalize_whitespace_and_lines,
 )
 
+_CACHE_NAMESPACE = "bib_parser"
+
 
 def preprocess(content: str) -> str:
     """Preprocess content to remove comments and normalize whitespace"""
@@ -26,6 +37,9 @@ class BibParser:
 
     # _parsed_files = set()
 
+    # size cap of the pickled entries kept in memory
+    MAX_CACHED_BYTES = 64 * 1024 * 1024
+
     def __init__(self, logger: logging.Logger = None):
         # for logging
         self.logger = logger or logging.getLogger(__name__)
@@ -34,13 +48,76 @@ class BibParser:
         self.bibdiv_parser = BibDivParser(logger=self.logger)
         self.bibitem_parser = BibItemParser(logger=self.logger)
 
+        # entries of the most recently parsed contents, by content hash. Kept pickled,
+        # so every parse gets entries of its own to change
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._cached_bytes = 0
+
     def clear(self):
-        pass
+        self._cache.clear()
+        self._cached_bytes = 0
         # self._parsed_files = set()
 
-    def parse(self, content: str) -> List[BibTexEntry]:
-        """Parse both BibTeX, bibitem, and bibdiv entries from the content"""
+    def parse(
+        self, content: str, cite_keys: Optional[Collection[str]] = None
+    ) -> List[BibTexEntry]:
+        """Parse both BibTeX, bibitem, and bibdiv entries from the content
+
+        With cite_keys, only the entries with one of these keys are returned. BibTeX
+        entries that are not cited are not even parsed.
+
+        Shared bibliographies come up in document after document: the entries are
+        cached by content hash, in memory and on disk if the disk cache is enabled.
+        Each document cites its own keys, so parses of the cited entries only are not
+        cached (they do use the entries of a full parse that is).
+        """
+        key = cache_key(content)
+        entries = self._load_cached(key)
+        if entries is not None:
+            if cite_keys is not None:
+                entries = [e for e in entries if e.citation_key in cite_keys]
+            return entries
+        if cite_keys is not None:
+            return self._parse(content, cite_keys)
+
+        entries = self._parse(content)
+        self._save_cached(key, entries)
+        return entries
+
+    def _disk_key(self, key: str) -> Optional[str]:
+        return cache_key(package_code_key(), key) if get_cache_dir() else None
+
+    def _load_cached(self, key: str) -> Optional[List[BibTexEntry]]:
+        data = self._cache.get(key)
+        if data is not None:
+            self._cache.move_to_end(key)
+            return pickle.loads(data)
+
+        disk_key = self._disk_key(key)
+        entries = load_cache(_CACHE_NAMESPACE, disk_key) if disk_key else None
+        if entries is not None:
+            self._remember(key, entries)
+        return entries
 
+    def _save_cached(self, key: str, entries: List[BibTexEntry]):
+        disk_key = self._disk_key(key)
+        if disk_key:
+            save_cache(_CACHE_NAMESPACE, disk_key, entries)
+        self._remember(key, entries)
+
+    def _remember(self, key: str, entries: List[BibTexEntry]):
+        data = pickle.dumps(entries)
+        if len(data) > self.MAX_CACHED_BYTES:
+            return
+        self._cache[key] = data
+        self._cached_bytes += len(data)
+        while self._cached_bytes > self.MAX_CACHED_BYTES:
+            _, dropped = self._cache.popitem(last=False)
+            self._cached_bytes -= len(dropped)
+
+    def _parse(
+        self, content: str, cite_keys: Optional[Collection[str]] = None
+    ) -> List[BibTexEntry]:
         content = preprocess(content)
 
         entries = []
@@ -51,7 +128,7 @@ class BibParser:
             entries.extend(self.bibdiv_parser.parse(content))
         # Use the can_handle method for BibTeX
         elif self.bibtex_parser.can_handle(content):
-            entries.extend(self.bibtex_parser.parse(content))
+            entries.extend(self.bibtex_parser.parse(content, cite_keys))
         # Use the can_handle method for BibItem (now includes bibliography environment check)
         elif self.bibitem_parser.can_handle(content):
             self.logger.debug("Parsing bibitem content")
@@ -60,6 +137,8 @@ class BibParser:
             self.logger.warning("No suitable parser found for the content")
             return []
 
+        if cite_keys is not None:
+            entries = [e for e in entries if e.citation_key in cite_keys]
         return entries
 
     def _open_file(self, file_path: str) -> str | None:
@@ -70,11 +149,14 @@ class BibParser:
         with open(file_path, "r") as f:
             return f.read()
 
-    def parse_file(self, file_path: str) -> List[BibTexEntry]:
+    def parse_file(
+        self, file_path: str, cite_keys: Optional[Collection[str]] = None
+    ) -> List[BibTexEntry]:
         """Parse a bibliography file and return list of entries.
 
         Args:
             file_path: Path to the bibliography file (with or without extension)
+            cite_keys: Only return the entries with one of these keys (all if None)
 
         Returns:
             List[BibEntry]: List of parsed bibliography entries
@@ -114,7 +196,7 @@ class BibParser:
 
         if bib_content:
             self.logger.info(f"BibParser: Parsing {file_path}")
-            entries = self.parse(bib_content)
+            entries = self.parse(bib_content, cite_keys)
             if len(entries) == 0:
                 self.logger.warning(f"BibParser: No entries found in {file_path}")
             else:
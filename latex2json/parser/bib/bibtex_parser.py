@@ -3,7 +3,7 @@ from enum import Enum
 from logging import Logger
 import logging
 import re
-from typing import Dict, List, Optional
+from typing import Collection, Dict, List, Optional
 from latex2json.utils.tex_utils import (
     extract_nested_content,
 )
@@ -83,8 +83,26 @@ class BibTexParser:
         content = ",\n\t".join(f"{k}={{{v}}}" for k, v in fields.items())
         return f"@{entry_type}{{{citation_key},\n\t{content}\n}}"
 
-    def parse(self, content: str) -> List[BibTexEntry]:
-        """Parse BibTeX content and return list of BibEntry objects"""
+    @staticmethod
+    def _may_be_cited(content: str, brace_pos: int, cite_keys: Collection[str]) -> bool:
+        """Quick check of the key of the entry opening at brace_pos, without finding
+        the end of the entry. Keys with braces are left to the full parse."""
+        key_end = content.find(",", brace_pos + 1)
+        if key_end == -1:
+            return True
+        key = content[brace_pos + 1 : key_end]
+        if "{" in key or "}" in key:
+            return True
+        return key.strip() in cite_keys
+
+    def parse(
+        self, content: str, cite_keys: Optional[Collection[str]] = None
+    ) -> List[BibTexEntry]:
+        """Parse BibTeX content and return list of BibEntry objects
+
+        With cite_keys, only the entries with one of these keys are returned (and
+        parsed: the others are skipped after a look at their key).
+        """
         self.logger.info("Starting BibTeX parsing")
 
         # Check if this is compiled BibTeX and convert if needed
@@ -102,6 +120,10 @@ class BibTexParser:
         for match in re.finditer(BibTexPattern, content):
             entry_type = match.group(1).lower()
             start_pos = match.end() - 1  # Position of the opening brace
+            if cite_keys is not None and not self._may_be_cited(
+                content, start_pos, cite_keys
+            ):
+                continue
 
             # Get everything inside the braces
             entry_content, next_pos = extract_nested_content(content[start_pos:])
@@ -160,6 +182,8 @@ class BibTexParser:
             )
             entries.append(entry)
 
+        if cite_keys is not None:
+            entries = [e for e in entries if e.citation_key in cite_keys]
         return entries
 
 
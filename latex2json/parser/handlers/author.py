@@ -2,6 +2,7 @@ from typing import Callable, Dict, List, Optional, Tuple
 import re
 
 from latex2json.parser.handlers.base import TokenHandler
+from latex2json.parser.handlers.dispatch import pattern_prefixes
 from latex2json.utils.tex_utils import extract_nested_content
 
 AND_PATTERN = re.compile(r"\\and\b", re.IGNORECASE)
@@ -30,12 +31,15 @@ class AuthorHandler(TokenHandler):
     def clear(self):
         self.last_thanks_token = None
 
-    def can_handle(self, content: str) -> bool:
+    def can_handle(self, content: str, pos: int = 0) -> bool:
         for pattern in PATTERNS.values():
-            if pattern.match(content):
+            if pattern.match(content, pos):
                 return True
         return False
 
+    def triggers(self):
+        return pattern_prefixes(PATTERNS.values())
+
     def _parse_author_content(self, content: str) -> Tuple[List[str], int]:
         authors = []
         # First split by \and
@@ -64,14 +68,13 @@ class AuthorHandler(TokenHandler):
         return tokens
 
     def handle(
-        self, content: str, prev_token: Optional[Dict] = None
+        self, content: str, prev_token: Optional[Dict] = None, pos: int = 0
     ) -> Tuple[Optional[Dict], int]:
         for name, pattern in PATTERNS.items():
-            match = pattern.match(content)
+            match = pattern.match(content, pos)
             if match:
                 start_pos = match.end() - 1
-                content, end_pos = extract_nested_content(content[start_pos:])
-                total_pos = start_pos + end_pos
+                content, total_pos = extract_nested_content(content, start=start_pos)
 
                 if name == "thanks":
                     token = {
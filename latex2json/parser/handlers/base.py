@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Callable, Dict, List, Optional, Tuple, Any
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple, Any
 
 
 class TokenHandler(ABC):
@@ -11,16 +11,29 @@ class TokenHandler(ABC):
         self.process_content_fn = process_content_fn
 
     @abstractmethod
-    def can_handle(self, content: str) -> bool:
-        """Check if this handler can process the current content"""
+    def can_handle(self, content: str, pos: int = 0) -> bool:
+        """Check if this handler can process the content starting at pos"""
         raise NotImplementedError
 
     @abstractmethod
     def handle(
-        self, content: str, prev_token: Optional[Dict] = None
+        self, content: str, prev_token: Optional[Dict] = None, pos: int = 0
     ) -> Tuple[Optional[Dict], int]:
-        """Process the content and return (token, new_position)"""
+        """Process the content starting at pos and return (token, new_position)
+
+        new_position is an offset into content (not relative to pos), so callers can
+        scan a document without slicing it; a value <= pos means nothing was consumed.
+        """
         raise NotImplementedError
 
+    def triggers(self) -> Optional[FrozenSet[str]]:
+        r"""Leading strings (e.g. "\\section", "$") that content must start with for
+        can_handle to succeed, used to dispatch to candidate handlers only.
+
+        None (the default) means the handler is tried at every position. Triggers
+        must be the same for every instance of a class, dispatch tables share them.
+        """
+        return None
+
     def clear(self):
         pass
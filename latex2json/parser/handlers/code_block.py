@@ -1,6 +1,7 @@
 import re
 from typing import Callable, Dict, Optional, Tuple
 from latex2json.parser.handlers.base import TokenHandler
+from latex2json.parser.handlers.dispatch import pattern_prefixes
 
 # Compile patterns for code blocks
 PATTERNS = {
@@ -18,16 +19,19 @@ PATTERNS = {
 
 
 class CodeBlockHandler(TokenHandler):
-    def can_handle(self, content: str) -> bool:
+    def can_handle(self, content: str, pos: int = 0) -> bool:
         """Check if the content contains any code block commands"""
-        return any(pattern.match(content) for pattern in PATTERNS.values())
+        return any(pattern.match(content, pos) for pattern in PATTERNS.values())
+
+    def triggers(self):
+        return pattern_prefixes(PATTERNS.values())
 
     def handle(
-        self, content: str, prev_token: Optional[Dict] = None
+        self, content: str, prev_token: Optional[Dict] = None, pos: int = 0
     ) -> Tuple[Optional[Dict], int]:
         """Handle code block commands and return appropriate token"""
         for pattern_name, pattern in PATTERNS.items():
-            match = pattern.match(content)
+            match = pattern.match(content, pos)
             if match:
                 if pattern_name == "verbatim_env":
                     return {
@@ -41,19 +41,19 @@ class CommandManager(TokenHandler):
         self._unknown_commands = {}
 
     def process_definition(
-        self, content: str, register: bool = True
+        self, content: str, register: bool = True, pos: int = 0
     ) -> Tuple[Optional[Dict], int]:
         """Handle command definitions and register them"""
         # First try the definition handler
-        if self.definition_handler.can_handle(content):
-            token, end_pos = self.definition_handler.handle(content)
+        if self.definition_handler.can_handle(content, pos):
+            token, end_pos = self.definition_handler.handle(content, pos=pos)
             if register and token:
                 self.register_command(token)
             return token, end_pos
 
         # Then try the keyval handler
-        if self.keyval_handler.can_handle(content):
-            token, end_pos = self.keyval_handler.handle(content)
+        if self.keyval_handler.can_handle(content, pos):
+            token, end_pos = self.keyval_handler.handle(content, pos=pos)
             # Keyval handler might return None for token when it successfully
             # processes but wants to suppress token generation
             return token, end_pos
@@ -81,7 +81,9 @@ class CommandManager(TokenHandler):
         if token["type"] == "newcommand":
             # Check for recursion like tex_parser does
             content = token["content"] if not ignore_sty else ""
-            if content and re.search(token["usage_pattern"], content):
+            # compiled as the processor compiles it, so it comes from the re cache there
+            usage_pattern = re.compile(token["usage_pattern"], re.DOTALL)
+            if content and usage_pattern.search(content):
                 self.logger.warning(
                     f"Potential recursion detected for newcommand: \\{cmd_name}, skipping..."
                 )
@@ -137,12 +139,12 @@ class CommandManager(TokenHandler):
         """Expand commands in content"""
         return self.processor.expand_commands(content, ignore_unicode, math_mode)
 
-    def handle(self, content: str) -> Tuple[str, int]:
+    def handle(self, content: str, pos: int = 0) -> Tuple[str, int]:
         """Handle commands with appropriate handlers"""
         # First try the keyval handler
-        if self.keyval_handler.can_handle(content):
-            token, end_pos = self.keyval_handler.handle(content)
-            if end_pos > 0:
+        if self.keyval_handler.can_handle(content, pos):
+            token, end_pos = self.keyval_handler.handle(content, pos=pos)
+            if end_pos > pos:
                 if token.get("codeblocks"):
                     out_str = ""
                     for key, codeblock in token["codeblocks"].items():
@@ -152,14 +154,14 @@ class CommandManager(TokenHandler):
                 return "", end_pos
 
         # If not handled by keyval, use the command processor
-        return self.processor.handle(content)
+        return self.processor.handle(content, pos)
 
-    def can_handle(self, content: str) -> bool:
+    def can_handle(self, content: str, pos: int = 0) -> bool:
         """Check if content can be handled by any of our handlers"""
         return (
-            self.definition_handler.can_handle(content)
-            or self.processor.can_handle(content)
-            or self.keyval_handler.can_handle(content)
+            self.definition_handler.can_handle(content, pos)
+            or self.processor.can_handle(content, pos)
+            or self.keyval_handler.can_handle(content, pos)
         )
 
     @property
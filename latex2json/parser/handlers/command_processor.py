@@ -1,11 +1,13 @@
 # src/commands.py
 
 import re
-from typing import List, Dict, Optional, TypedDict, Callable, Pattern, Tuple
+from collections import OrderedDict
+from typing import List, Dict, Optional, TypedDict, Callable, Pattern, Tuple, FrozenSet
 from latex2json.latex_maps.latex_unicode_converter import LatexUnicodeConverter
 
 # from latex2json.parser.patterns import command_or_dim
 from latex2json.parser.handlers.if_else_statements import IfElseBlockHandler
+from latex2json.parser.handlers.dispatch import literal_prefixes
 from latex2json.utils.tex_utils import (
     extract_nested_content_sequence_blocks,
     substitute_patterns,
@@ -91,18 +93,169 @@ def wrap_math_mode_arg(text: str) -> str:
     return text
 
 
+class _PrefixIndex:
+    """Index of command usage patterns by their literal prefix (e.g. "\\foo", "\\csname"),
+    so only the commands that can start at a position are tried there."""
+
+    def __init__(self, ranks: Optional[Dict[str, int]] = None):
+        self.keys: Dict[str, List[str]] = {}
+        self.lengths: List[int] = []
+        self.prefixes: Dict[str, FrozenSet[str]] = {}
+        # commands whose pattern has no literal prefix, tried everywhere
+        self.unindexed: List[str] = []
+        self._patterns: Dict[str, Pattern[str]] = {}
+        # registration order of the command dict, may be shared between views of it
+        self.ranks: Dict[str, int] = {} if ranks is None else ranks
+        self._ordered_patterns: Optional[Dict[str, Pattern[str]]] = None
+        # number of indexed prefixes by first char, the scan pattern only changes
+        # (and is compiled again) when a first char comes or goes
+        self._first_chars: Dict[str, int] = {}
+        self._scan_pattern: Optional[Pattern[str]] = None
+
+    def add(self, name: str, pattern: Pattern[str]):
+        self.ranks.setdefault(name, len(self.ranks))
+        self.remove(name)
+        self._patterns[name] = pattern
+        self._ordered_patterns = None
+        prefixes = literal_prefixes(pattern)
+        if "" in prefixes:
+            self.unindexed.append(name)
+            return
+        self.prefixes[name] = prefixes
+        for prefix in prefixes:
+            self.keys.setdefault(prefix, []).append(name)
+            if len(prefix) not in self.lengths:
+                self.lengths.append(len(prefix))
+                self.lengths.sort()
+            count = self._first_chars.get(prefix[0], 0)
+            if not count:
+                self._scan_pattern = None
+            self._first_chars[prefix[0]] = count + 1
+
+    def remove(self, name: str):
+        if self._patterns.pop(name, None) is None:
+            return
+        if name in self.unindexed:
+            self.unindexed.remove(name)
+        for prefix in self.prefixes.pop(name, ()):
+            self.keys[prefix].remove(name)
+            count = self._first_chars.pop(prefix[0]) - 1
+            if count:
+                self._first_chars[prefix[0]] = count
+            else:
+                self._scan_pattern = None
+        self._ordered_patterns = None
+
+    def lookup(self, text: str, pos: int = 0) -> List[str]:
+        """Command keys that may match at pos, in registration order"""
+        names = list(self.unindexed)
+        for length in self.lengths:
+            bucket = self.keys.get(text[pos : pos + length])
+            if bucket:
+                names.extend(bucket)
+        if len(names) > 1:
+            names.sort(key=self.ranks.__getitem__)
+        return names
+
+    @property
+    def patterns(self) -> Dict[str, Pattern[str]]:
+        """Command key -> usage pattern, in registration order"""
+        if self._ordered_patterns is None:
+            names = sorted(self._patterns, key=self.ranks.__getitem__)
+            self._ordered_patterns = {name: self._patterns[name] for name in names}
+        return self._ordered_patterns
+
+    @property
+    def scan_pattern(self) -> Pattern[str]:
+        """Matches every position where an indexed command may start"""
+        if self._scan_pattern is None:
+            first_chars = self._first_chars
+            self._scan_pattern = re.compile(
+                "[%s]" % "".join(re.escape(c) for c in sorted(first_chars))
+                if first_chars
+                else "(?!)"
+            )
+        return self._scan_pattern
+
+
 class CommandProcessor:
-    def __init__(self):
+    # max number of expand_commands results kept in the memo
+    EXPAND_CACHE_SIZE = 2048
+
+    def __init__(self, expand_cache_size: int = EXPAND_CACHE_SIZE):
         # Replace the unicode conversion initialization with LatexUnicodeConverter
         self.unicode_converter = LatexUnicodeConverter()
         self.if_else_handler = IfElseBlockHandler()
 
         self.commands: Dict[str, CommandEntry] = {}
         self.let_commands: Dict[str, CommandEntry] = {}
+        # bumped on every (re)definition, so memoized expansions from before it are not reused
+        self.generation = 0
+        self._reset_index()
+
+        # expand_commands results, keyed by (text, ignore_unicode, math_mode, generation)
+        self.expand_cache_size = expand_cache_size
+        self._expand_cache: OrderedDict[
+            Tuple[str, bool, bool, int], Tuple[str, int]
+        ] = OrderedDict()
+        self.expand_cache_hits = 0
+        self.expand_cache_misses = 0
 
     def clear(self):
         self.commands = {}
         self.let_commands = {}
+        self.generation += 1
+        self._reset_index()
+        self._expand_cache.clear()
+        self.expand_cache_hits = 0
+        self.expand_cache_misses = 0
+
+    def _reset_index(self):
+        # usage-pattern prefixes of self.commands / self.let_commands -> command keys,
+        # one view for math mode (every command) and one for text (no math_mode_only)
+        ranks, let_ranks = {}, {}
+        self._views: Dict[bool, _PrefixIndex] = {
+            True: _PrefixIndex(ranks),
+            False: _PrefixIndex(ranks),
+        }
+        self._let_views: Dict[bool, _PrefixIndex] = {
+            True: _PrefixIndex(let_ranks),
+            False: _PrefixIndex(let_ranks),
+        }
+
+    def _register(self, command_name: str, command: CommandEntry, let=False):
+        self.generation += 1
+        if let:
+            self.let_commands[command_name] = command
+            views = self._let_views
+        else:
+            self.commands[command_name] = command
+            views = self._views
+        views[True].add(command_name, command["pattern"])
+        if command.get("math_mode_only", False):
+            views[False].remove(command_name)
+        else:
+            views[False].add(command_name, command["pattern"])
+
+    def _rank(self, command_name: str) -> Tuple[int, int]:
+        # {**commands, **let_commands} order: commands first, then let-only commands
+        if command_name in self.commands:
+            return 0, self._views[True].ranks[command_name]
+        return 1, self._let_views[True].ranks[command_name]
+
+    def _candidate_commands(self, text: str, pos: int = 0, math_mode=False):
+        """Commands whose usage pattern may match at pos, in lookup order"""
+        # let overrides commands, so a commands entry shadowed by a let is skipped
+        names = [
+            name
+            for name in self._views[math_mode].lookup(text, pos)
+            if name not in self.let_commands
+        ]
+        names.extend(self._let_views[math_mode].lookup(text, pos))
+        if len(names) > 1:
+            names.sort(key=self._rank)
+        for name in names:
+            yield self.let_commands.get(name) or self.commands[name]
 
     @property
     def _all_commands(self):
@@ -112,7 +265,7 @@ class CommandProcessor:
         return self._all_commands
 
     def has_command(self, command_name: str) -> bool:
-        return command_name in self._all_commands
+        return command_name in self.commands or command_name in self.let_commands
 
     def get_command_iter(self, math_mode=False):
         """
@@ -147,7 +300,7 @@ class CommandProcessor:
                 "handler": handler,
                 "definition": definition,
             }
-            self.let_commands[command_name] = command
+            self._register(command_name, command, let=True)
         except Exception as e:
             print(f"Error processing newcommand {command_name}: {e}")
             raise e
@@ -217,9 +370,8 @@ class CommandProcessor:
                 num_optional = len(defaults)
                 if num_optional:
                     blocks, end_pos = extract_nested_content_sequence_blocks(
-                        text[start_pos:], "[", "]", num_optional
+                        text, "[", "]", num_optional, start=start_pos
                     )
-                    end_pos += start_pos
                     for i, block in enumerate(blocks):
                         args[i] = block
 
@@ -227,9 +379,8 @@ class CommandProcessor:
                 if args_left > 0:
                     start_pos = end_pos
                     blocks, end_pos = extract_nested_content_sequence_blocks(
-                        text[start_pos:], "{", "}", args_left
+                        text, "{", "}", args_left, start=start_pos
                     )
-                    end_pos += start_pos
                     for block in blocks:
                         args.append(block)
 
@@ -245,7 +396,7 @@ class CommandProcessor:
                 "definition": definition,
                 "math_mode_only": math_mode_only,
             }
-            self.commands[command_name] = command
+            self._register(command_name, command)
         except Exception as e:
             print(f"Error processing newcommand {command_name}: {e}")
             raise e
@@ -260,7 +411,7 @@ class CommandProcessor:
             match: re.Match[str], text: str, math_mode: bool = False
         ) -> Tuple[str, int]:
             start_pos = match.end() - 1
-            content, end_pos = extract_nested_content(text[start_pos:], "{", "}")
+            content, end_pos = extract_nested_content(text, "{", "}", start_pos)
             if content is None:
                 return "", start_pos
 
@@ -270,7 +421,6 @@ class CommandProcessor:
             ):
                 out = left_delim + wrap_math_mode_arg(content) + right_delim
 
-            end_pos += start_pos
             return out, end_pos
 
         try:
@@ -278,7 +428,7 @@ class CommandProcessor:
                 "pattern": re.compile(usage_pattern, re.DOTALL),
                 "handler": handler,
             }
-            self.commands[command_name] = command
+            self._register(command_name, command)
         except Exception as e:
             print(f"Error processing paired delimiter {command_name}: {e}")
             raise e
@@ -321,7 +471,7 @@ class CommandProcessor:
                 "handler": handler,
                 "definition": definition,
             }
-            self.commands[command_name] = command
+            self._register(command_name, command)
         except Exception as e:
             print(f"Error processing newdef {command_name}: {e}")
             raise e
@@ -331,7 +481,7 @@ class CommandProcessor:
             "pattern": re.compile(r"\\" + var_name + r"(?:true|false)"),
             "handler": default_ignore_handler,
         }
-        self.commands["newif:" + var_name] = command
+        self._register("newif:" + var_name, command)
 
     def process_newlength(self, var_name: str):
         self.process_newX(var_name, "newlength")
@@ -342,24 +492,24 @@ class CommandProcessor:
         ) -> Tuple[str, int]:
             # check if there is traling { ... } # we strip this out if exists
             start_pos = match.end()
-            content, end_pos = extract_nested_content(text[start_pos:], "{", "}")
+            content, end_pos = extract_nested_content(text, "{", "}", start_pos)
             if content is None:
                 return "", start_pos
             # ignore the trailing {...} anyway
-            return "", start_pos + end_pos
+            return "", end_pos
 
         command: CommandEntry = {
             "pattern": re.compile(r"\\" + var_name + r"\b"),
             "handler": handler,
         }
-        self.commands["newtoks:" + var_name] = command
+        self._register("newtoks:" + var_name, command)
 
     def process_newX(self, var_name: str, type: str = "newX"):
         command: CommandEntry = {
             "pattern": re.compile(r"\\" + var_name + r"\b"),
             "handler": default_ignore_handler,
         }
-        self.commands[type + ":" + var_name] = command
+        self._register(type + ":" + var_name, command)
 
     def process_newcounter(self, var_name: str):
 
@@ -367,23 +517,51 @@ class CommandProcessor:
             "pattern": re.compile(r"\\the" + var_name + r"\b"),
             "handler": default_ignore_handler,
         }
-        self.commands["newcounter:" + var_name] = command
+        self._register("newcounter:" + var_name, command)
 
     def expand_commands(
         self, text: str, ignore_unicode: bool = False, math_mode: bool = False
     ) -> tuple[str, int]:
-        """Recursively expand defined commands in the text until no further expansions are possible."""
-        command_entries = self.commands
-        if not math_mode:
-            command_entries = {
-                k: v
-                for k, v in self.commands.items()
-                if not v.get("math_mode_only", False)
-            }
+        """Recursively expand defined commands in the text until no further expansions are possible.
+
+        Results are memoized per macro-table generation, as papers repeat the same
+        equations and fragments many times.
+        """
+        key = (text, ignore_unicode, math_mode, self.generation)
+        cached = self._expand_cache.get(key)
+        if cached is not None:
+            self._expand_cache.move_to_end(key)
+            self.expand_cache_hits += 1
+            return cached
+        self.expand_cache_misses += 1
+
+        result = self._expand_commands(text, ignore_unicode, math_mode)
+        if self.expand_cache_size > 0:
+            self._expand_cache[key] = result
+            if len(self._expand_cache) > self.expand_cache_size:
+                self._expand_cache.popitem(last=False)
+        return result
+
+    def expand_cache_info(self) -> Dict[str, int]:
+        """Hit/miss counters and size of the expand_commands memo"""
+        return {
+            "hits": self.expand_cache_hits,
+            "misses": self.expand_cache_misses,
+            "size": len(self._expand_cache),
+            "maxsize": self.expand_cache_size,
+        }
+
+    def _expand_commands(
+        self, text: str, ignore_unicode: bool = False, math_mode: bool = False
+    ) -> tuple[str, int]:
         # first process commands
-        text, match_count = self._expand(text, command_entries, math_mode=math_mode)
+        text, match_count = self._expand(
+            text, self.commands, self._views[math_mode], math_mode=math_mode
+        )
         # then process let commands
-        text, match_count = self._expand(text, self.let_commands, math_mode=math_mode)
+        text, match_count = self._expand(
+            text, self.let_commands, self._let_views[math_mode], math_mode=math_mode
+        )
 
         # Handle unicode conversions using the converter
         if not ignore_unicode:
@@ -395,10 +573,99 @@ class CommandProcessor:
         self,
         text: str,
         command_entries: Dict[str, CommandEntry],
+        index: _PrefixIndex,
         math_mode: bool = False,
         max_depth: int = 1000,
     ) -> tuple[str, int]:
-        """Recursively expand defined commands in the text until no further expansions are possible."""
+        """Expand the commands in index (a view of command_entries) in a single
+        left-to-right scan.
+
+        Each expansion is spliced in and scanned again from its start, so nested macros
+        expand in place instead of on another pass over the whole text. A command that
+        keeps expanding into itself is cut off after max_depth nested expansions.
+        """
+        if index.unindexed:
+            return self._expand_by_passes(
+                text, command_entries, index, math_mode=math_mode, max_depth=max_depth
+            )
+
+        match_count = 0
+        scan_pattern = index.scan_pattern
+        # (end, name) of the expansions the cursor is still inside, innermost last
+        open_expansions: List[Tuple[int, str]] = []
+        # where the last finished expansion of each command ended
+        last_end: Dict[str, int] = {}
+
+        pos = 0
+        while True:
+            found = scan_pattern.search(text, pos)
+            if not found:
+                break
+            pos = found.start()
+            while open_expansions and open_expansions[-1][0] <= pos:
+                closed_end, closed_name = open_expansions.pop()
+                last_end[closed_name] = closed_end
+
+            for name in index.lookup(text, pos):
+                cmd = command_entries[name]
+                match = cmd["pattern"].match(text, pos)
+                if match:
+                    break
+            else:
+                pos += 1
+                continue
+
+            match_count += 1
+            out, end_pos = cmd["handler"](match, text, math_mode=math_mode)
+            # if math mode and out contains a space, wrap the out in braces for grouping
+            # Example: a b c  -> {a b c}, perhaps later \frac{a b c}, and NOT \frac a b c
+            # if no space and/or starts with \\, we assume the output is a single command that may be affected if wrapped in braces
+            # e.g. \tilde -> \tilde{...}, and NOT {\tilde}{...}
+            if math_mode:
+                if last_end.get(name) == pos:
+                    # right after its own previous expansion the command never looked
+                    # at the char before it (keeps the output of the per-pattern passes)
+                    should_wrap = should_wrap_math_mode_arg(
+                        out, text[pos : end_pos + 1], 0, end_pos - pos
+                    )
+                else:
+                    should_wrap = should_wrap_math_mode_arg(out, text, pos, end_pos)
+                if should_wrap:
+                    out = wrap_math_mode_arg(out)
+
+            if text[pos:end_pos] == out:
+                # expands to itself, nothing left to do here
+                pos = max(end_pos, pos + 1)
+                continue
+            if len(open_expansions) >= max_depth:
+                raise RecursionError(
+                    f"Maximum recursion depth ({max_depth}) exceeded. Possible infinite loop in LaTeX commands."
+                )
+
+            new_end = pos + len(out)
+            shift = new_end - end_pos
+            text = text[:pos] + out + text[end_pos:]
+            # enclosing expansions now end after the new text (or with it, if the
+            # arguments ran past their end)
+            open_expansions = [
+                (end + shift if end >= end_pos else new_end, open_name)
+                for end, open_name in open_expansions
+            ]
+            open_expansions.append((new_end, name))
+
+        return text, match_count
+
+    def _expand_by_passes(
+        self,
+        text: str,
+        command_entries: Dict[str, CommandEntry],
+        index: _PrefixIndex,
+        math_mode: bool = False,
+        max_depth: int = 1000,
+    ) -> tuple[str, int]:
+        """Expand by substituting each command pattern over the whole text, repeated until
+        no further expansions are possible. Used when some pattern has no literal prefix.
+        """
         match_count = 0
         depth = 0
 
@@ -409,10 +676,6 @@ class CommandProcessor:
                 return match.group(0), match.end()
             handler = command_entries[cmd_name]["handler"]
             out, pos = handler(match, text, math_mode=math_mode)
-            # if math mode and out contains a space, wrap the out in braces for grouping
-            # Example: a b c  -> {a b c}, perhaps later \frac{a b c}, and NOT \frac a b c
-            # if no space and/or starts with \\, we assume the output is a single command that may be affected if wrapped in braces
-            # e.g. \tilde -> \tilde{...}, and NOT {\tilde}{...}
             if math_mode:
                 should_wrap = should_wrap_math_mode_arg(out, text, match.start(), pos)
 
@@ -420,9 +683,7 @@ class CommandProcessor:
                     out = wrap_math_mode_arg(out)
             return out, pos
 
-        command2pattern = {
-            name: cmd["pattern"] for name, cmd in command_entries.items()
-        }
+        command2pattern = index.patterns
 
         prev_text = None
         while prev_text != text:
@@ -436,38 +697,38 @@ class CommandProcessor:
 
         return text, match_count
 
-    def can_handle(self, text: str) -> bool:
-        for cmd in self.get_command_iter(False):
-            if cmd["pattern"].match(text):
+    def can_handle(self, text: str, pos: int = 0) -> bool:
+        for cmd in self._candidate_commands(text, pos):
+            if cmd["pattern"].match(text, pos):
                 return True
-        return CSNAME_PATTERN.match(text) is not None
+        return CSNAME_PATTERN.match(text, pos) is not None
 
-    def _handle_csname(self, text: str) -> tuple[str, int]:
-        match = CSNAME_PATTERN.match(text)
+    def _handle_csname(self, text: str, pos: int = 0) -> tuple[str, int]:
+        match = CSNAME_PATTERN.match(text, pos)
         if match:
-            nested, end_pos = extract_and_concat_nested_csname(text)
+            nested, end_pos = extract_and_concat_nested_csname(text, pos)
             if nested:
-                for cmd in self.get_command_iter(False):
-                    match = cmd["pattern"].match(text)
+                for cmd in self._candidate_commands(text, pos):
+                    match = cmd["pattern"].match(text, pos)
                     if match:
                         out, _ = cmd["handler"](match, text)
                         return out, end_pos
                 return "", end_pos
         return text, 0
 
-    def _handle(self, text: str) -> str:
-        for cmd in self.get_command_iter(False):
-            match = cmd["pattern"].match(text)
+    def _handle(self, text: str, pos: int = 0) -> str:
+        for cmd in self._candidate_commands(text, pos):
+            match = cmd["pattern"].match(text, pos)
             if match:
                 out, end_pos = cmd["handler"](match, text)
                 if match.group(0) == out:  # prevent infinite loop
                     return "", match.end()
                 return out, end_pos
 
-        return self._handle_csname(text)
+        return self._handle_csname(text, pos)
 
-    def handle(self, text: str) -> str:
-        out, end_pos = self._handle(text)
+    def handle(self, text: str, pos: int = 0) -> str:
+        out, end_pos = self._handle(text, pos)
         # (this was originally added to handle some setting of macros with \cmd = x, but commented out -> TOO aggressive, will interfere with math data)
         # if end_pos > 0:
         #     # check if next token is =<>
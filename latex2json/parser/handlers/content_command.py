@@ -2,6 +2,8 @@ import re
 from collections import OrderedDict
 from typing import Callable, Dict, Optional, Tuple
 from latex2json.parser.handlers.base import TokenHandler
+from latex2json.parser.handlers.dispatch import pattern_prefixes
+from latex2json.utils.lazy_regex import lazy_compile
 from latex2json.utils.tex_utils import extract_nested_content
 
 SECTION_LEVELS = {
@@ -75,9 +77,9 @@ RAW_PATTERNS = OrderedDict(
     ]
 )
 
-# compile them
+# compile them (on first use)
 PATTERNS = OrderedDict(
-    (key, re.compile(pattern, re.DOTALL | re.IGNORECASE))
+    (key, lazy_compile(pattern, re.DOTALL | re.IGNORECASE))
     for key, pattern in RAW_PATTERNS.items()
 )
 
@@ -90,15 +92,18 @@ class ContentCommandHandler(TokenHandler):
     def clear(self):
         self.citealias = {}
 
-    def can_handle(self, content: str) -> bool:
-        return any(pattern.match(content) for pattern in PATTERNS.values())
+    def can_handle(self, content: str, pos: int = 0) -> bool:
+        return any(pattern.match(content, pos) for pattern in PATTERNS.values())
+
+    def triggers(self):
+        return pattern_prefixes(PATTERNS.values())
 
     def handle(
-        self, content: str, prev_token: Optional[Dict] = None
+        self, content: str, prev_token: Optional[Dict] = None, pos: int = 0
     ) -> Tuple[Optional[Dict], int]:
         # Try each pattern until we find a match
         for pattern_name, pattern in PATTERNS.items():
-            match = pattern.match(content)
+            match = pattern.match(content, pos)
             if match:
                 if pattern_name == "footnotemark":
                     return {
@@ -111,18 +116,13 @@ class ContentCommandHandler(TokenHandler):
                     # Get position after command name
                     start_pos = match.end()
 
-                    # Extract content between braces
+                    # Extract content between braces (start_pos - 1 is the opening brace)
                     nested_content, end_pos = extract_nested_content(
-                        content[start_pos - 1 :]
+                        content, start=start_pos - 1
                     )
                     if nested_content is None:
                         return None, start_pos
 
-                    # Adjust end position
-                    end_pos = (
-                        start_pos + end_pos - 1
-                    )  # move back one to account for start_pos -1
-
                     # Expand any nested commands in the content
                     if self.process_content_fn:
                         nested_content = self.process_content_fn(nested_content)
@@ -278,19 +278,18 @@ class ContentCommandHandler(TokenHandler):
 
         return {"type": matched_type, "content": content}
 
-    def search(self, content: str):
-        pos = 0
+    def search(self, content: str, pos: int = 0):
         while pos < len(content):
-            search = re.search(GENERIC_COMMAND_PATTERN, content[pos:])
+            search = GENERIC_COMMAND_PATTERN.search(content, pos)
             if not search:
                 return None
 
-            current_pos = pos + search.start()
+            current_pos = search.start()
             for pattern_name, pattern in PATTERNS.items():
-                if pattern.match(content[current_pos:]):
+                if pattern.match(content, current_pos):
                     return current_pos
 
-            pos += search.end()
+            pos = search.end()
 
 
 if __name__ == "__main__":
@@ -3,6 +3,8 @@ import unicodedata
 import re
 
 from latex2json.parser.handlers.base import TokenHandler
+from latex2json.parser.handlers.dispatch import pattern_prefixes
+from latex2json.utils.lazy_regex import lazy_compile
 from latex2json.utils.tex_utils import extract_nested_content, substitute_patterns
 
 # Unicode combining characters for various LaTeX accent commands
@@ -49,11 +51,11 @@ def generate_accent_patterns():
 
     for key in ACCENT_MAP:
         if key[0].isalpha():
-            patterns[key] = re.compile(
+            patterns[key] = lazy_compile(
                 r"\\" + key + r"((?:\s*\{)|(\s+\S)|(?![a-zA-Z@])\S)"
             )
         else:
-            patterns[key] = re.compile(r"\\" + re.escape(key) + r"\s*(\{|\S)")
+            patterns[key] = lazy_compile(r"\\" + re.escape(key) + r"\s*(\{|\S)")
 
     return patterns
 
@@ -106,27 +108,30 @@ def parse_diacritic_match(
 
     last_char = matched_str[-1]
     if last_char == "{":
-        out, nested_end_pos = extract_nested_content(text[end_pos - 1 :])
+        out, nested_end_pos = extract_nested_content(text, start=end_pos - 1)
         if out:
             out = out.strip()
             last_char = out
-            end_pos += nested_end_pos - 1
+            end_pos = nested_end_pos
 
     converted = apply_accent(last_char, accent_name)
     return converted, end_pos
 
 
 class DiacriticsHandler(TokenHandler):
-    def can_handle(self, content: str) -> bool:
+    def can_handle(self, content: str, pos: int = 0) -> bool:
         """Check if the content contains any diacritic commands"""
-        return any(pattern.match(content) for pattern in ACCENT_PATTERNS.values())
+        return any(pattern.match(content, pos) for pattern in ACCENT_PATTERNS.values())
+
+    def triggers(self):
+        return pattern_prefixes(ACCENT_PATTERNS.values())
 
     def handle(
-        self, content: str, prev_token: Optional[Dict] = None
+        self, content: str, prev_token: Optional[Dict] = None, pos: int = 0
     ) -> Tuple[Optional[Dict], int]:
         """Handle diacritic commands and return appropriate token"""
         for accent_name, pattern in ACCENT_PATTERNS.items():
-            match = pattern.match(content)
+            match = pattern.match(content, pos)
             if match:
                 converted, end_pos = parse_diacritic_match(content, match, accent_name)
                 return {"type": "text", "content": converted}, end_pos
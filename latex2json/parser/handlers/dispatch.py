@@ -0,0 +1,279 @@
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+# private regex parser, prefixes fall back to "always a candidate" if it is missing
+# or its output cannot be read
+try:
+    from re import _parser as sre_parse  # python 3.11+
+except ImportError:  # pragma: no cover
+    try:
+        import sre_parse
+    except ImportError:
+        sre_parse = None
+
+from latex2json.parser.handlers.base import TokenHandler
+
+# caps on how far a prefix is spelled out before it is cut short (still a valid prefix)
+MAX_PREFIX_LENGTH = 32
+MAX_PREFIXES = 256
+MAX_CHAR_CLASS = 16
+# case-insensitive prefixes are spelled out in every case, so keep them short
+MAX_IGNORECASE_PREFIX_LENGTH = 4
+# non-ascii chars that re.IGNORECASE also matches against these ascii letters
+EXTRA_CASE_FOLDS = {"i": "\u0130\u0131", "k": "\u212a", "s": "\u017f"}
+
+
+def _class_chars(items) -> Optional[List[str]]:
+    """Expand a small [...] char class into its chars, None if it is negated/too broad"""
+    chars = []
+    for op, av in items:
+        op = str(op)
+        if op == "LITERAL":
+            chars.append(chr(av))
+        elif op == "RANGE" and av[1] - av[0] < MAX_CHAR_CLASS:
+            chars.extend(chr(c) for c in range(av[0], av[1] + 1))
+        elif op == "CATEGORY" and str(av) == "CATEGORY_DIGIT":
+            chars.extend("0123456789")
+        else:
+            return None
+    return chars if len(chars) <= MAX_CHAR_CLASS else None
+
+
+def _item_prefixes(op, av) -> set:
+    """(literal, complete) alternatives for one regex item; complete means the item
+    matches exactly that literal so the prefix can be extended with the next item"""
+    op = str(op)
+    if op == "LITERAL":
+        return {(chr(av), True)}
+    if op in ("AT", "ASSERT", "ASSERT_NOT"):
+        # zero width
+        return {("", True)}
+    if op == "IN":
+        chars = _class_chars(av)
+        if chars is None:
+            return {("", False)}
+        return {(c, True) for c in chars}
+    if op == "SUBPATTERN":
+        return _sequence_prefixes(av[-1])
+    if op == "BRANCH":
+        out = set()
+        for branch in av[1]:
+            out |= _sequence_prefixes(branch)
+        return out
+    if op in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"):
+        min_count, max_count, body = av
+        body_prefixes = _sequence_prefixes(body)
+        if min_count == max_count == 1:
+            return body_prefixes
+        # more repetitions may follow, so the body prefix cannot be extended further
+        out = {(s, False) for s, _ in body_prefixes}
+        if min_count == 0:
+            out.add(("", True))
+        return out
+    return {("", False)}
+
+
+def _sequence_prefixes(items) -> set:
+    partials = {("", True)}
+    for op, av in items:
+        if not any(complete for _, complete in partials):
+            break
+        item = _item_prefixes(op, av)
+        extended = set()
+        for prefix, complete in partials:
+            if not complete:
+                extended.add((prefix, False))
+                continue
+            for literal, literal_complete in item:
+                extended.add((prefix + literal, literal_complete))
+        if len(extended) > MAX_PREFIXES:
+            return {(prefix, False) for prefix, _ in partials}
+        partials = {
+            (p[:MAX_PREFIX_LENGTH], c and len(p) < MAX_PREFIX_LENGTH)
+            for p, c in extended
+        }
+    return partials
+
+
+def _case_variants(prefix: str) -> Optional[List[str]]:
+    variants = [""]
+    for char in prefix[:MAX_IGNORECASE_PREFIX_LENGTH]:
+        if not char.isascii():
+            return None
+        chars = {char, char.lower(), char.upper()}
+        chars.update(EXTRA_CASE_FOLDS.get(char.lower(), ""))
+        variants = [v + c for v in variants for c in chars]
+    return variants
+
+
+def literal_prefixes(pattern: re.Pattern) -> FrozenSet[str]:
+    """Literal prefixes that any match of pattern must start with ("" if unknown)"""
+    return _literal_prefixes(pattern.pattern, pattern.flags)
+
+
+# user commands are registered with every command manager (preprocessor and parser)
+@lru_cache(maxsize=4096)
+def _literal_prefixes(pattern: str, flags: int) -> FrozenSet[str]:
+    if sre_parse is None:
+        return frozenset([""])
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+        prefixes = {prefix for prefix, _ in _sequence_prefixes(parsed)}
+        ignorecase = parsed.state.flags & re.IGNORECASE
+    except Exception:
+        return frozenset([""])
+    if ignorecase:
+        folded = set()
+        for prefix in prefixes:
+            variants = _case_variants(prefix)
+            if variants is None:
+                return frozenset([""])
+            folded.update(variants)
+        prefixes = folded
+    return _shortest_prefixes(prefixes)
+
+
+def pattern_prefixes(patterns: Iterable[re.Pattern]) -> FrozenSet[str]:
+    r"""Literal prefixes that any match of the given patterns must start with.
+
+    e.g. \\(?:sub)*section\s*{ -> {"\\sub", "\\section"}. An empty string in the result
+    means a pattern can start with anything.
+    """
+    return _merged_prefixes(tuple(patterns))
+
+
+@lru_cache(maxsize=None)
+def _merged_prefixes(patterns: Tuple[re.Pattern, ...]) -> FrozenSet[str]:
+    prefixes = set()
+    for pattern in patterns:
+        prefixes |= literal_prefixes(pattern)
+    return _shortest_prefixes(prefixes)
+
+
+def _shortest_prefixes(prefixes: Iterable[str]) -> FrozenSet[str]:
+    # a prefix already covers every longer one that starts with it
+    # (sorted order puts each prefix right before the strings it covers)
+    kept = []
+    for prefix in sorted(prefixes):
+        if not kept or not prefix.startswith(kept[-1]):
+            kept.append(prefix)
+    return frozenset(kept)
+
+
+class _TrieNode:
+    __slots__ = ("children", "handlers", "slot")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.handlers: List[int] = []
+        # index into _PrefixTrie.slots of the candidates this node resolves to
+        self.slot = 0
+
+
+class _PrefixTrie:
+    """Trie over the prefixes of a list of items, holding item indices only so that
+    tables of items with the same prefixes can share it"""
+
+    def __init__(self, prefixes: List[Optional[FrozenSet[str]]]):
+        self.root = _TrieNode()
+        for index, triggers in enumerate(prefixes):
+            if triggers is None or "" in triggers:
+                self.root.handlers.append(index)
+                continue
+            for trigger in triggers:
+                node = self.root
+                for char in trigger:
+                    node = node.children.setdefault(char, _TrieNode())
+                if index not in node.handlers:
+                    node.handlers.append(index)
+        # each distinct candidate list (item indices, in item order) is stored once
+        self.slots: List[Tuple[int, ...]] = []
+        self._resolve(self.root, None)
+
+    def _resolve(self, node: _TrieNode, parent: Optional[_TrieNode]):
+        # each node resolves to every item along its path, nodes that add no items
+        # share their parent's candidates
+        if parent is None or node.handlers:
+            inherited = self.slots[parent.slot] if parent is not None else ()
+            node.slot = len(self.slots)
+            self.slots.append(tuple(sorted(set(inherited) | set(node.handlers))))
+        else:
+            node.slot = parent.slot
+        for child in node.children.values():
+            self._resolve(child, node)
+
+    def find(self, content: str, pos: int) -> int:
+        """Slot of the deepest node matching content at pos"""
+        node = self.root
+        end = len(content)
+        while pos < end:
+            child = node.children.get(content[pos])
+            if child is None:
+                break
+            node = child
+            pos += 1
+        return node.slot
+
+
+# handler triggers are static per class, so handler lists of the same types share a trie
+_HANDLER_TRIES: Dict[Tuple[type, ...], _PrefixTrie] = {}
+
+
+def _handler_trie(handlers: List[TokenHandler]) -> _PrefixTrie:
+    key = tuple(type(handler) for handler in handlers)
+    trie = _HANDLER_TRIES.get(key)
+    if trie is None:
+        trie = _PrefixTrie([handler.triggers() for handler in handlers])
+        _HANDLER_TRIES[key] = trie
+    return trie
+
+
+class PrefixDispatchTable:
+    """Routes a position in the content to the items whose prefixes it starts with.
+
+    Item order is preserved, so trying the candidates in turn finds the same first
+    match as trying every item; items without prefixes are candidates everywhere.
+    """
+
+    def __init__(
+        self,
+        items: List,
+        prefixes: Optional[List[Optional[FrozenSet[str]]]] = None,
+        trie: Optional[_PrefixTrie] = None,
+    ):
+        self.items = items
+        self.trie = trie if trie is not None else _PrefixTrie(prefixes)
+        # candidate lists of the trie slots, built on first use
+        self._slot_items: List[Optional[List]] = [None] * len(self.trie.slots)
+
+    def candidates(self, content: str, pos: int = 0) -> List:
+        """Items that may match content at pos, in priority order"""
+        slot = self.trie.find(content, pos)
+        items = self._slot_items[slot]
+        if items is None:
+            items = [self.items[i] for i in self.trie.slots[slot]]
+            self._slot_items[slot] = items
+        return items
+
+
+class HandlerDispatchTable(PrefixDispatchTable):
+    """Routes a position in the content to the handlers whose triggers it starts with.
+
+    Handler order is preserved, so the first candidate that can_handle wins exactly as
+    in a full sequential scan; handlers without triggers are candidates everywhere.
+    """
+
+    def __init__(self, handlers: List[TokenHandler]):
+        super().__init__(handlers, trie=_handler_trie(handlers))
+        self.handlers = handlers
+
+
+class PatternDispatchTable(PrefixDispatchTable):
+    """Names of the patterns (in their dict order) that may match at a position"""
+
+    def __init__(self, patterns: Dict[str, re.Pattern]):
+        super().__init__(
+            list(patterns),
+            [literal_prefixes(pattern) for pattern in patterns.values()],
+        )
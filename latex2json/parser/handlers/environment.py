@@ -1,6 +1,9 @@
 import re
+from bisect import bisect_left
 from typing import Callable, Dict, List, Optional, Tuple
 from latex2json.parser.handlers.base import TokenHandler
+from latex2json.parser.handlers.dispatch import pattern_prefixes
+from latex2json.utils.brace_index import TextIndex
 from latex2json.utils.tex_utils import (
     extract_args,
     extract_nested_content,
@@ -25,6 +28,12 @@ ENVIRONMENT_PATTERN = re.compile(
     re.DOTALL,
 )
 
+# the parts of ENVIRONMENT_PATTERN, for EnvStartIndex
+BEGIN_ENV_PATTERN = re.compile(r"\\begin\s*" + ENV_NAME_BRACE_PATTERN)
+ENV_PAIR_NAME_PATTERN = re.compile(r"(?:\w|@)+")
+END_ENV_PAIR_PATTERN = re.compile(r"\\end((?:\w|@)*)")
+COMMAND_START_PATTERN = re.compile(r"\\(?=\w|@)")
+
 NEW_ENVIRONMENT_PATTERN = re.compile(
     r"\\(?:new|renew|provide)environment\*?\s*\{([^}]*?)\}",
 )
@@ -133,6 +142,126 @@ def convert_any_env_pairs_to_begin_end(content: str) -> str:
     return content
 
 
+def _add_prefixes(last_end: Dict[str, int], name: str, from_end: int) -> None:
+    for length in range(1, len(name) + 1):
+        last_end[name[:length]] = from_end
+
+
+class EnvStartIndex(TextIndex):
+    r"""Where the environments and groups of one text start.
+
+    next_start(pos) is the start of BaseEnvironmentHandler.search(text, pos), without
+    the search: at every \name, the \name ... \endname alternative of
+    ENVIRONMENT_PATTERN runs to the end of the text and backtracks looking for an
+    \endname, so each search is quadratic in the length of the text. All it needs to
+    know is whether an \endname follows, so the index records the last \end<prefix>
+    of every prefix once, and walks the command starts forward from the first lookup.
+    is_start(pos) answers the same for a single position (see can_handle).
+
+    The last \end<prefix> are kept as distances from the end of the text, which a
+    splice before them does not change: after_splice carries them over to the new
+    text and only scans the spliced in part.
+    """
+
+    def __init__(self, text: str):
+        super().__init__(text)
+        self.origin: Optional[int] = None
+        self._commands = None
+        # starts found so far, in text order
+        self._starts: List[int] = []
+        self._last_end: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def after_splice(cls, index: "EnvStartIndex", text: str, tail_start: int):
+        if index._last_end is None:
+            return None
+        last_end = {}
+        # (the names of the spliced in part can run on into the tail)
+        for match in END_ENV_PAIR_PATTERN.finditer(text):
+            if match.start() >= tail_start:
+                break
+            _add_prefixes(last_end, match.group(1), len(text) - match.start())
+        # the \end<prefix> of the tail come last where there are any
+        tail_length = len(text) - tail_start
+        for prefix, from_end in index._last_end.items():
+            if from_end <= tail_length:
+                last_end[prefix] = from_end
+
+        new_index = cls(text)
+        new_index._last_end = last_end
+        return new_index
+
+    def _last_end_positions(self) -> Dict[str, int]:
+        r"""Distance from the end of the text to its last \end<prefix>, by prefix"""
+        if self._last_end is None:
+            last_end = {}
+            text_length = len(self.text)
+            for match in END_ENV_PAIR_PATTERN.finditer(self.text):
+                _add_prefixes(last_end, match.group(1), text_length - match.start())
+            self._last_end = last_end
+        return self._last_end
+
+    def is_start(self, pos: int) -> bool:
+        """Whether an environment or group starts at pos"""
+        text = self.text
+        if BEGIN_ENV_PATTERN.match(text, pos) or BEGIN_GROUP_PATTERN.match(text, pos):
+            return True
+        return self.pair_name(pos) is not None
+
+    def pair_name(self, pos: int) -> Optional[str]:
+        r"""Name of the \name ... \endname environment at pos, None if there is none"""
+        text = self.text
+        if not text.startswith("\\", pos):
+            return None
+        name = ENV_PAIR_NAME_PATTERN.match(text, pos + 1)
+        if not name:
+            return None
+        # \name ... \endname, the name can stop short at a word boundary (e.g. at an @)
+        name = name.group(0)
+        last_end = self._last_end_positions()
+        for length in range(len(name), 0, -1):
+            if length == len(name):
+                # followed by a non word char
+                at_boundary = name[-1] != "@"
+            else:
+                at_boundary = (name[length - 1] == "@") != (name[length] == "@")
+            # the \end has to come after the name, i.e. closer to the end of the text
+            from_end = last_end.get(name[:length])
+            if at_boundary and from_end and from_end < len(text) - (pos + length):
+                return name[:length]
+        return None
+
+    def next_start(self, pos: int = 0) -> Optional[int]:
+        """Start of the next environment or group at or after pos, None if there is none"""
+        if self.origin is None:
+            self.origin = pos
+            self._commands = COMMAND_START_PATTERN.finditer(self.text, pos)
+        elif pos < self.origin:
+            match = BaseEnvironmentHandler.search(self.text, pos)
+            return match.start() if match else None
+
+        i = bisect_left(self._starts, pos)
+        if i < len(self._starts):
+            return self._starts[i]
+        for command in self._commands:
+            start = command.start()
+            if self.is_start(start):
+                self._starts.append(start)
+                if start >= pos:
+                    return start
+        return None
+
+
+def environment_starts_at(content: str, pos: int = 0) -> bool:
+    r"""Whether ENVIRONMENT_PATTERN matches at pos, without running it on long texts
+    (its \name ... \endname alternative runs to the end of the text and backtracks)"""
+    if len(content) < EnvStartIndex.MIN_TEXT_LENGTH:
+        return ENVIRONMENT_PATTERN.match(content, pos) is not None
+    if BEGIN_ENV_PATTERN.match(content, pos):
+        return True
+    return EnvStartIndex.for_text(content).pair_name(pos) is not None
+
+
 def find_pattern_while_skipping_nested_envs(
     content: str,
     pattern: re.Pattern,
@@ -151,31 +280,32 @@ def find_pattern_while_skipping_nested_envs(
         if no match is found
     """
     end_pos = -1
+    # e.g. \item after \item, the environments of content are only looked for once
+    env_starts = EnvStartIndex.for_text(content)
 
-    next_match = pattern.search(content[start_pos:])
+    next_match = pattern.search(content, start_pos)
     while next_match:
         # check for nested inner envs
-        env_match = BaseEnvironmentHandler.search(content[start_pos:])
-        if not env_match:
-            return start_pos + next_match.start()
+        start_env = env_starts.next_start(start_pos)
+        if start_env is None:
+            return next_match.start()
 
-        start_env = env_match.start()
         # If we find a nested environment after the next match,
         # we can safely exit
         if start_env > next_match.start():
-            return start_pos + next_match.start()
+            return next_match.start()
 
         # Handle and skip the inner environment
-        inner_token, inner_length = BaseEnvironmentHandler.try_handle(
-            content[start_pos + start_env :]
+        inner_token, inner_end = BaseEnvironmentHandler.try_handle(
+            content, pos=start_env
         )
         if not inner_token:
             return end_pos
 
-        start_pos += start_env + inner_length
+        start_pos = inner_end
         end_pos = start_pos
 
-        next_match = pattern.search(content[start_pos:])
+        next_match = pattern.search(content, start_pos)
 
     return len(content) if end_pos >= 0 else -1
 
@@ -197,12 +327,15 @@ class BaseEnvironmentHandler(TokenHandler):
         self._newtheorems = {}
         self._floatnames = {}
 
-    def can_handle(self, content: str) -> bool:
+    def can_handle(self, content: str, pos: int = 0) -> bool:
         return (
-            ENVIRONMENT_PATTERN.match(content) is not None
-            or BEGIN_GROUP_PATTERN.match(content) is not None
+            environment_starts_at(content, pos)
+            or BEGIN_GROUP_PATTERN.match(content, pos) is not None
         )
 
+    def triggers(self):
+        return pattern_prefixes([ENVIRONMENT_PATTERN, BEGIN_GROUP_PATTERN])
+
     def _handle_environment(self, env_name: str, inner_content: str) -> None:
 
         contains_asterisk = "*" in env_name
@@ -256,11 +389,12 @@ class BaseEnvironmentHandler(TokenHandler):
 
     @staticmethod
     def try_match_env(
-        content: str, match: Optional[re.Match] = None
+        content: str, match: Optional[re.Match] = None, pos: int = 0
     ) -> Tuple[Optional[Dict], int]:
-        """Try to match an environment pattern"""
-        if not match:
-            match = ENVIRONMENT_PATTERN.match(content)
+        """Try to match an environment pattern at pos"""
+        if not match and environment_starts_at(content, pos):
+            # only matched for its groups once it is known to match
+            match = ENVIRONMENT_PATTERN.match(content, pos)
         if match and match.re.pattern == ENVIRONMENT_PATTERN.pattern:
             # Verify it's an environment match
             is_begin = match.group(0).startswith("\\begin")
@@ -268,7 +402,7 @@ class BaseEnvironmentHandler(TokenHandler):
             if is_begin:
                 env_name = match.group(1).strip()
                 start_pos, end_pos, inner_content = find_matching_env_block(
-                    content, env_name
+                    content, env_name, pos
                 )
             else:
                 all_str = match.group(0)
@@ -277,7 +411,7 @@ class BaseEnvironmentHandler(TokenHandler):
                 )
 
                 start_pos, end_pos, inner_content = extract_nested_content_pattern(
-                    content, r"\\" + env_name, r"\\end" + env_name
+                    content, r"\\" + env_name, r"\\end" + env_name, pos
                 )
                 if env_name == "@float":
                     # e.g. \@float{table} -> \begin{@float}{table} -> \begin{table}
@@ -306,22 +440,22 @@ class BaseEnvironmentHandler(TokenHandler):
 
     @staticmethod
     def try_match_group(
-        content: str, match: Optional[re.Match] = None
+        content: str, match: Optional[re.Match] = None, pos: int = 0
     ) -> Tuple[Optional[Dict], int]:
-        """Try to match a group pattern"""
+        """Try to match a group pattern at pos"""
         if not match:
-            match = BEGIN_GROUP_PATTERN.match(content)
+            match = BEGIN_GROUP_PATTERN.match(content, pos)
         if (
             match and match.re.pattern == BEGIN_GROUP_PATTERN.pattern
         ):  # Verify it's a group match
             is_bgroup = "bgroup" in match.group(0)
             if is_bgroup:
                 start_pos, end_pos, inner_content = extract_nested_content_pattern(
-                    content, r"\\bgroup\b", r"\\egroup\b"
+                    content, r"\\bgroup\b", r"\\egroup\b", pos
                 )
             else:
                 start_pos, end_pos, inner_content = extract_nested_content_pattern(
-                    content, r"\\begingroup\b", r"\\endgroup\b"
+                    content, r"\\begingroup\b", r"\\endgroup\b", pos
                 )
 
             if end_pos == -1:
@@ -338,10 +472,10 @@ class BaseEnvironmentHandler(TokenHandler):
         return None, 0
 
     def handle(
-        self, content: str, prev_token: Optional[Dict] = None
+        self, content: str, prev_token: Optional[Dict] = None, pos: int = 0
     ) -> Tuple[Optional[Dict], int]:
         # If not a definition, proceed with regular environment handling
-        matched, out = BaseEnvironmentHandler.try_match_env(content)
+        matched, out = BaseEnvironmentHandler.try_match_env(content, pos=pos)
         if matched:
             env_name = out["name"]
             if out.get("incomplete"):
@@ -355,11 +489,11 @@ class BaseEnvironmentHandler(TokenHandler):
             env_token = self._handle_environment(env_name, out["content"])
             return env_token, out["end_pos"]
 
-        return BaseEnvironmentHandler.try_match_group(content)
+        return BaseEnvironmentHandler.try_match_group(content, pos=pos)
 
     @staticmethod
-    def try_handle(content: str) -> Tuple[Optional[Dict], int]:
-        matched, out = BaseEnvironmentHandler.try_match_env(content)
+    def try_handle(content: str, pos: int = 0) -> Tuple[Optional[Dict], int]:
+        matched, out = BaseEnvironmentHandler.try_match_env(content, pos=pos)
         if matched:
             env_name = out["name"]
             env_type = get_env_type(env_name)
@@ -369,14 +503,14 @@ class BaseEnvironmentHandler(TokenHandler):
                 "content": out["content"],
             }, out["end_pos"]
 
-        return BaseEnvironmentHandler.try_match_group(content)
+        return BaseEnvironmentHandler.try_match_group(content, pos=pos)
 
     @staticmethod
-    def search(content: str) -> Optional[re.Match]:
-        """Search for the next environment or group pattern match"""
+    def search(content: str, pos: int = 0) -> Optional[re.Match]:
+        """Search for the next environment or group pattern match from pos"""
         # search both to see which one appears first
-        env_match = ENVIRONMENT_PATTERN.search(content)
-        group_match = BEGIN_GROUP_PATTERN.search(content)
+        env_match = ENVIRONMENT_PATTERN.search(content, pos)
+        group_match = BEGIN_GROUP_PATTERN.search(content, pos)
 
         # Return the first match found (or None if neither found)
         if not env_match and not group_match:
@@ -479,11 +613,16 @@ class EnvironmentHandler(BaseEnvironmentHandler):
         super().clear()
         self.environment_processor.clear()
 
-    def can_handle(self, content: str) -> bool:
+    def can_handle(self, content: str, pos: int = 0) -> bool:
         return (
-            ENVIRONMENT_PATTERN.match(content) is not None
-            or BEGIN_GROUP_PATTERN.match(content) is not None
-            or NEW_ENVIRONMENT_PATTERN.match(content) is not None
+            environment_starts_at(content, pos)
+            or BEGIN_GROUP_PATTERN.match(content, pos) is not None
+            or NEW_ENVIRONMENT_PATTERN.match(content, pos) is not None
+        )
+
+    def triggers(self):
+        return pattern_prefixes(
+            [ENVIRONMENT_PATTERN, BEGIN_GROUP_PATTERN, NEW_ENVIRONMENT_PATTERN]
         )
 
     def process_newenvironment(
@@ -499,11 +638,11 @@ class EnvironmentHandler(BaseEnvironmentHandler):
         )
 
     def handle_newenvironment(
-        self, content: str, match: Optional[re.Match] = None
+        self, content: str, match: Optional[re.Match] = None, pos: int = 0
     ) -> Tuple[Optional[Dict], int]:
         """Handle \newenvironment definitions - copied from new_definition.py"""
         if not match:
-            match = NEW_ENVIRONMENT_PATTERN.match(content)
+            match = NEW_ENVIRONMENT_PATTERN.match(content, pos)
         if not match:
             return None, 0
         env_name = match.group(1)
@@ -566,15 +705,15 @@ class EnvironmentHandler(BaseEnvironmentHandler):
         return super()._handle_environment(env_name, inner_content)
 
     def handle(
-        self, content: str, prev_token: Optional[Dict] = None
+        self, content: str, prev_token: Optional[Dict] = None, pos: int = 0
     ) -> Tuple[Optional[Dict], int]:
         # First check for newenvironment definitions
-        newenv_match = NEW_ENVIRONMENT_PATTERN.match(content)
+        newenv_match = NEW_ENVIRONMENT_PATTERN.match(content, pos)
         if newenv_match:
             out, end_pos = self.handle_newenvironment(content, newenv_match)
             return None, end_pos
 
-        return super().handle(content, prev_token)
+        return super().handle(content, prev_token, pos)
 
 
 if __name__ == "__main__":
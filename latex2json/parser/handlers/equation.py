@@ -11,6 +11,7 @@ from latex2json.utils.tex_utils import (
 )
 from latex2json.parser.patterns import LABEL_PATTERN
 from latex2json.parser.handlers.base import TokenHandler
+from latex2json.parser.handlers.dispatch import HandlerDispatchTable, pattern_prefixes
 from latex2json.parser.handlers.environment import convert_any_env_pairs_to_begin_end
 from latex2json.parser.handlers.formatting import FormattingHandler
 
@@ -49,6 +50,20 @@ PATTERNS = OrderedDict(
 )
 PATTERNS.update(RAW_PATTERNS)
 
+# Where an equation can start. Only the patterns for that start are tried in full,
+# as their bodies may scan far ahead before failing.
+EQUATION_START_PATTERN = re.compile(
+    r"\$|\\[\[(]|\\begin\s*\{(?P<env>"
+    + "|".join(sorted(EQUATION_ENV, key=len, reverse=True))
+    + r")\*?\}"
+)
+
+START_CANDIDATES = {
+    "$": ("equation_display_$$", "equation_inline_$"),
+    "\\[": ("equation_display_brackets",),
+    "\\(": ("equation_inline_brackets",),
+}
+
 
 class EquationHandler(TokenHandler):
     should_extract_content_placeholders = True
@@ -61,47 +76,90 @@ class EquationHandler(TokenHandler):
         self.box_handler = BoxHandler()
         # content command handler to parse out e.g. includegraphics/eqref etc inside equation/math itself
         self.content_command = ContentCommandHandler()
+        # formatting commands and boxes stripped out of the equation, by leading string
+        # (built on first strip, the trie is shared by every EquationHandler)
+        self._strip_table: Optional[HandlerDispatchTable] = None
+        self._last_match: Optional[Tuple[str, int, Optional[Tuple[str, re.Match]]]] = (
+            None
+        )
 
     def clear(self):
         self.box_handler.clear()
-
-    def can_handle(self, content: str) -> bool:
-        """Check if content contains an equation pattern."""
-        return any(pattern.match(content) for pattern in PATTERNS.values())
-
-    def _strip_out_formatting(self, equation: str) -> str:
-        """Remove LaTeX formatting commands from equation."""
-        backslash_pos = equation.find("\\")
-        while backslash_pos >= 0:
-            incr = 1
-            x, end_pos = self.formatter.handle(
-                equation[backslash_pos:], exclude_patterns=["spacing"]
-            )
-            if end_pos > 0:
-                content = ""
-                if x and isinstance(x.get("content", ""), str):
-                    content = x.get("content")
-                equation = (
-                    equation[:backslash_pos]
-                    + content
-                    + equation[backslash_pos + end_pos :]
+        self._last_match = None
+
+    def _match(self, content: str, pos: int) -> Optional[Tuple[str, re.Match]]:
+        """(pattern name, match) of the equation at pos, if any"""
+        # can_handle is followed by handle at the same position, match only once
+        last = self._last_match
+        if last is not None and last[0] is content and last[1] == pos:
+            return last[2]
+
+        result = None
+        start = EQUATION_START_PATTERN.match(content, pos)
+        if start:
+            env = start.group("env")
+            names = (env,) if env else START_CANDIDATES[start.group(0)]
+            for pattern_name in names:
+                match = PATTERNS[pattern_name].match(content, pos)
+                if match:
+                    result = pattern_name, match
+                    break
+        self._last_match = (content, pos, result)
+        return result
+
+    def can_handle(self, content: str, pos: int = 0) -> bool:
+        """Check if content contains an equation pattern at pos."""
+        return self._match(content, pos) is not None
+
+    def triggers(self):
+        return pattern_prefixes(PATTERNS.values())
+
+    def _strip_command(self, equation: str, pos: int) -> Tuple[Optional[str], int]:
+        """(replacement, end) of the formatting command or box at pos, None if neither"""
+        if self._strip_table is None:
+            self._strip_table = HandlerDispatchTable([self.formatter, self.box_handler])
+        for handler in self._strip_table.candidates(equation, pos):
+            if handler is self.formatter:
+                x, end_pos = self.formatter.handle(
+                    equation, exclude_patterns=["spacing"], pos=pos
                 )
-                incr = 0
+                if end_pos > pos:
+                    content = ""
+                    if x and isinstance(x.get("content", ""), str):
+                        content = x.get("content")
+                    return content, end_pos
             else:
                 # check box handling to remove boxes e.g. raisebox
-                x, end_pos = self.box_handler.handle(equation[backslash_pos:])
-                if end_pos > 0:
+                x, end_pos = self.box_handler.handle(equation, pos=pos)
+                if end_pos > pos:
                     content = ""
                     if x and isinstance(x.get("content", ""), str):
                         content = x.get("content").strip().strip("$")
-                    equation = (
-                        equation[:backslash_pos]
-                        + content
-                        + equation[backslash_pos + end_pos :]
-                    )
-                    incr = 0
-            backslash_pos = equation.find("\\", backslash_pos + incr)
-        return equation.strip()
+                    return content, end_pos
+        return None, pos
+
+    def _strip_out_formatting(self, equation: str) -> str:
+        """Remove LaTeX formatting commands from equation."""
+        out: List[str] = []
+        copied_to = 0
+        backslash_pos = equation.find("\\")
+        while backslash_pos >= 0:
+            content, end_pos = self._strip_command(equation, backslash_pos)
+            if content is None:
+                backslash_pos = equation.find("\\", backslash_pos + 1)
+                continue
+            out.append(equation[copied_to:backslash_pos])
+            if "\\" in content:
+                # the replacement may hold commands of its own, scan it along with the rest
+                equation = content + equation[end_pos:]
+                copied_to = 0
+                backslash_pos = equation.find("\\")
+            else:
+                out.append(content)
+                copied_to = end_pos
+                backslash_pos = equation.find("\\", end_pos)
+        out.append(equation[copied_to:])
+        return "".join(out).strip()
 
     def _handle_labels(self, equation: str) -> Tuple[str, list[str]]:
         """Extract and remove labels from equation."""
@@ -143,15 +201,13 @@ class EquationHandler(TokenHandler):
 
         while current_pos < len(math):
             if (
-                match_start := self.content_command.search(math[current_pos:])
+                match_start := self.content_command.search(math, current_pos)
             ) is not None:
                 # Copy text before the command
-                if match_start > 0:
-                    out_math += math[current_pos : current_pos + match_start]
+                if match_start > current_pos:
+                    out_math += math[current_pos:match_start]
 
-                token, end_pos = self.content_command.handle(
-                    math[current_pos + match_start :]
-                )
+                token, end_pos = self.content_command.handle(math, pos=match_start)
                 if token:
                     # store the token as placeholder
                     placeholder = f"___PLACEHOLDER_{len(blocks)}___"
@@ -160,10 +216,10 @@ class EquationHandler(TokenHandler):
                     )
                     out_math += placeholder
 
-                if end_pos > 0:
-                    current_pos += match_start + end_pos
+                if end_pos > match_start:
+                    current_pos = end_pos
                 else:
-                    current_pos += match_start + 1
+                    current_pos = match_start + 1
             else:
                 # Copy remaining text
                 out_math += math[current_pos:]
@@ -174,41 +230,56 @@ class EquationHandler(TokenHandler):
             eq_token["placeholders"] = blocks
         return eq_token
 
+    def _find_equation(
+        self, content: str, pos: int
+    ) -> Optional[Tuple[str, re.Match, str, int]]:
+        """(pattern name, match, equation, end) of the equation at pos, if any"""
+        matched = self._match(content, pos)
+        if not matched:
+            return None
+        pattern_name, match = matched
+        equation = match.group(1).strip()
+        end_pos = match.end()
+
+        if not equation:
+            return pattern_name, match, equation, end_pos
+
+        if pattern_name == "alignat":
+            # extract out {}
+            extracted_args, inner_end_pos = extract_args(equation, 1)
+            if extracted_args:
+                equation = equation[inner_end_pos:].strip()
+        elif not pattern_name in EQUATION_ENV and not check_delimiter_balance(equation):
+            # Handle unbalanced braces for non-environment equations
+            delimiter = self._get_equation_delimiter(pattern_name)
+            if not delimiter:
+                return None
+
+            equation, proper_end = extract_equation_content(
+                content, delimiter, match.start()
+            )
+            if proper_end > 0:
+                end_pos = proper_end
+        return pattern_name, match, equation, end_pos
+
+    def find_end(self, content: str, pos: int = 0) -> int:
+        """End of the equation at pos as handle returns it (0 if there is none), for
+        callers that keep the equation as it is and only need to skip over it."""
+        found = self._find_equation(content, pos)
+        return found[3] if found else 0
+
     def handle(
-        self, content: str, prev_token: Optional[Dict] = None
+        self, content: str, prev_token: Optional[Dict] = None, pos: int = 0
     ) -> Tuple[Optional[Dict], int]:
         """Handle equation content and return token."""
 
-        for pattern_name, pattern in PATTERNS.items():
-            match = pattern.match(content)
-            if not match:
-                continue
+        found = self._find_equation(content, pos)
+        if found:
+            pattern_name, match, equation, end_pos = found
 
-            equation = match.group(1).strip()
-            end_pos = match.end()
-
-            if not equation:
+            if not match.group(1).strip():
                 return None, end_pos
 
-            if pattern_name == "alignat":
-                # extract out {}
-                extracted_args, inner_end_pos = extract_args(equation, 1)
-                if extracted_args:
-                    equation = equation[inner_end_pos:].strip()
-            elif not pattern_name in EQUATION_ENV and not check_delimiter_balance(
-                equation
-            ):
-                # Handle unbalanced braces for non-environment equations
-                delimiter = self._get_equation_delimiter(pattern_name)
-                if not delimiter:
-                    return None, 0
-
-                equation, proper_end = extract_equation_content(
-                    content[match.start() :], delimiter
-                )
-                if proper_end > 0:
-                    end_pos = match.start() + proper_end
-
             # Process equation content
             equation, labels = self._handle_labels(equation)
             equation = convert_any_env_pairs_to_begin_end(equation)
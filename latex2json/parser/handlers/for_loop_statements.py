@@ -3,6 +3,7 @@ from typing import Dict, List, Optional, Tuple
 import re
 
 from latex2json.parser.handlers.base import TokenHandler
+from latex2json.parser.handlers.dispatch import pattern_prefixes
 from latex2json.utils.tex_utils import extract_nested_content_sequence_blocks
 
 
@@ -17,14 +18,17 @@ PATTERNS = OrderedDict(
 
 class ForLoopHandler(TokenHandler):
 
-    def can_handle(self, content: str) -> bool:
-        return any(pattern.match(content) for _, pattern in PATTERNS.items())
+    def can_handle(self, content: str, pos: int = 0) -> bool:
+        return any(pattern.match(content, pos) for _, pattern in PATTERNS.items())
+
+    def triggers(self):
+        return pattern_prefixes(PATTERNS.values())
 
     def handle(
-        self, content: str, prev_token: Optional[Dict] = None
+        self, content: str, prev_token: Optional[Dict] = None, pos: int = 0
     ) -> Tuple[Optional[Dict], int]:
         for name, pattern in PATTERNS.items():
-            match = pattern.match(content)
+            match = pattern.match(content, pos)
             if match:
                 max_blocks = 4 if name == "forloop" else 2
                 start_pos = match.end() - 1  # -1 to exclude the opening brace
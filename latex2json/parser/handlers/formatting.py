@@ -1,8 +1,10 @@
 # import datetime
 import re
 from collections import OrderedDict
+from functools import lru_cache
 from typing import Callable, Dict, List, Optional, Tuple
 from latex2json.parser.handlers.base import TokenHandler
+from latex2json.parser.handlers.dispatch import PatternDispatchTable, pattern_prefixes
 from latex2json.parser.patterns import (
     NUMBER_PATTERN,
     OPTIONAL_BRACE_PATTERN,
@@ -10,6 +12,7 @@ from latex2json.parser.patterns import (
     number_points_suffix,
     command_with_opt_brace_pattern,
 )
+from latex2json.utils.lazy_regex import lazy_compile
 from latex2json.utils.tex_utils import (
     extract_nested_content,
     extract_nested_content_sequence_blocks,
@@ -279,9 +282,9 @@ RAW_PATTERNS = OrderedDict(
     ]
 )
 
-# Then compile them into a new dictionary
+# Then compile them into a new dictionary (on first use)
 PATTERNS = OrderedDict(
-    (key, pattern if isinstance(pattern, re.Pattern) else re.compile(pattern))
+    (key, pattern if isinstance(pattern, re.Pattern) else lazy_compile(pattern))
     for key, pattern in RAW_PATTERNS.items()
 )
 PATTERNS["color_cells"] = COLOR_CELLS_PATTERN
@@ -289,6 +292,12 @@ PATTERNS["color_cells"] = COLOR_CELLS_PATTERN
 number_regex_compiled = re.compile(number_regex)
 
 
+@lru_cache(maxsize=None)
+def _pattern_table() -> PatternDispatchTable:
+    """PATTERNS by their leading strings, so handle only tries the ones that can match"""
+    return PatternDispatchTable(PATTERNS)
+
+
 def strip_trailing_number_from_token(token: Dict) -> Dict:
     if not token or not isinstance(token, dict) or token.get("type") != "text":
         return token
@@ -344,20 +353,27 @@ class FormattingHandler(TokenHandler):
         except (ValueError, decimal.InvalidOperation, AttributeError) as e:
             return number
 
-    def can_handle(self, content: str) -> bool:
-        return any(pattern.match(content) for pattern in PATTERNS.values())
+    def can_handle(self, content: str, pos: int = 0) -> bool:
+        return any(
+            PATTERNS[pattern_name].match(content, pos)
+            for pattern_name in _pattern_table().candidates(content, pos)
+        )
+
+    def triggers(self):
+        return pattern_prefixes(PATTERNS.values())
 
     def handle(
         self,
         content: str,
         prev_token: Optional[Dict] = None,
         exclude_patterns: Optional[List[str]] = None,
+        pos: int = 0,
     ) -> Tuple[Optional[Dict], int]:
         # Try each pattern until we find a match
-        for pattern_name, pattern in PATTERNS.items():
+        for pattern_name in _pattern_table().candidates(content, pos):
             if exclude_patterns and pattern_name in exclude_patterns:
                 continue
-            match = pattern.match(content)
+            match = PATTERNS[pattern_name].match(content, pos)
             if match:
                 if pattern_name == "comment":
                     return None, match.end()
@@ -407,25 +423,25 @@ class FormattingHandler(TokenHandler):
                     # extracted nested
                     start_pos = match.end() - 1
                     extracted_content, end_pos = extract_nested_content(
-                        content[start_pos:]
+                        content, start=start_pos
                     )
-                    return None, start_pos + end_pos
+                    return None, end_pos
                 elif pattern_name == "ensuremath":
                     start_pos = match.end() - 1
                     extracted_content, end_pos = extract_nested_content(
-                        content[start_pos:]
+                        content, start=start_pos
                     )
                     return {
                         "type": "equation",
                         "content": extracted_content,
                         "display": "inline",
-                    }, start_pos + end_pos
+                    }, end_pos
                 elif pattern_name == "date":
                     start_pos = match.end() - 1
                     extracted_content, end_pos = extract_nested_content(
-                        content[start_pos:]
+                        content, start=start_pos
                     )
-                    return None, start_pos + end_pos
+                    return None, end_pos
                 elif pattern_name == "today":
                     return None, match.end()
                 elif pattern_name == "titlecontents":
@@ -454,14 +470,14 @@ class FormattingHandler(TokenHandler):
                     if match.group(0).endswith("["):
                         start_pos = match.end() - 1
                         extracted_content, end_pos = extract_nested_content(
-                            content[start_pos:], "[", "]"
+                            content, "[", "]", start=start_pos
                         )
-                        return None, start_pos + end_pos
+                        return None, end_pos
                     return None, match.end()
                 elif pattern_name == "phantom":
                     start_pos = match.end() - 1
                     extracted_content, end_pos = extract_nested_content(
-                        content[start_pos:]
+                        content, start=start_pos
                     )
                     # Check if it's hphantom or vphantom
                     if match.group(0).startswith("\\hphantom"):
@@ -469,13 +485,13 @@ class FormattingHandler(TokenHandler):
                         return {
                             "type": "text",
                             "content": " " * len(extracted_content),
-                        }, start_pos + end_pos
+                        }, end_pos
                     else:  # vphantom
                         # Vertical phantom - create line break without horizontal space
                         return {
                             "type": "text",
                             "content": "\n",
-                        }, start_pos + end_pos
+                        }, end_pos
                 return None, match.end()
 
         return None, 0
@@ -520,9 +536,7 @@ class FormattingHandler(TokenHandler):
         out = match.group(0)
         if out.endswith("{"):
             start_pos = match.end() - 1
-            _, end_pos = extract_nested_content(content[start_pos:])
-
-            end_pos += start_pos
+            _, end_pos = extract_nested_content(content, start=start_pos)
             return None, end_pos
         return None, match.end()
 
@@ -5,6 +5,7 @@ import re
 
 from latex2json.parser.handlers.base import TokenHandler
 from latex2json.parser.handlers.new_definition import extract_and_concat_nested_csname
+from latex2json.utils.lazy_regex import lazy_compile
 from latex2json.utils.tex_utils import extract_nested_content_sequence_blocks
 from latex2json.parser.patterns import command_with_opt_brace_pattern, command_or_dim
 
@@ -28,7 +29,7 @@ tex_token_pattern = r"""
 """
 
 # Pattern for \ifx with two tokens to compare
-ifx_pattern = re.compile(
+ifx_pattern = lazy_compile(
     r"\\ifx\s*"
     + rf"({tex_token_pattern})\s*"  # First token
     + rf"({tex_token_pattern})",  # Second token
@@ -61,20 +62,20 @@ EQUAL_PATTERN = re.compile(r"\\equal\s*\{")
 # ordered dict so that ifthenelse/ifnum etc is matched before general if
 IF_PATTERNS_DEFAULT_LIST = OrderedDict(
     {
-        "ifthenelse": re.compile(r"\\ifthenelse\s*\{"),
+        "ifthenelse": lazy_compile(r"\\ifthenelse\s*\{"),
         "ifx": ifx_pattern,
-        "ifdefined": re.compile(
+        "ifdefined": lazy_compile(
             r"\\if(?:un)?defined\s*%s" % (command_with_opt_brace_pattern)
         ),
-        "ifnum": re.compile(ifnum_pattern),
-        "ifdim": re.compile(ifdim_pattern),
-        "ifcat": re.compile(ifcat_pattern),
-        "ifcase": re.compile(r"\\ifcase" + default_if_pattern),
-        "iffileexists": re.compile(r"\\IfFileExists\s*\{"),
-        "@ifclassloaded": re.compile(r"\\@ifclassloaded\s*\{"),
-        "@ifpackageloaded": re.compile(r"\\@ifpackageloaded\s*\{"),
-        "@ifundefined": re.compile(r"\\@ifundefined\s*\{"),
-        "@ifstar": re.compile(r"\\@ifstar\s*\{"),
+        "ifnum": lazy_compile(ifnum_pattern),
+        "ifdim": lazy_compile(ifdim_pattern),
+        "ifcat": lazy_compile(ifcat_pattern),
+        "ifcase": lazy_compile(r"\\ifcase" + default_if_pattern),
+        "iffileexists": lazy_compile(r"\\IfFileExists\s*\{"),
+        "@ifclassloaded": lazy_compile(r"\\@ifclassloaded\s*\{"),
+        "@ifpackageloaded": lazy_compile(r"\\@ifpackageloaded\s*\{"),
+        "@ifundefined": lazy_compile(r"\\@ifundefined\s*\{"),
+        "@ifstar": lazy_compile(r"\\@ifstar\s*\{"),
         "if": IF_PATTERN,
     }
 )
@@ -86,9 +87,11 @@ def extract_else_elseif_fi(
     end_delimiter: re.Pattern = FI_PATTERN,
     else_delimiter: re.Pattern = ELSE_PATTERN,
     elsif_delimiter: re.Pattern = ELSIF_PATTERN,
+    start_pos: int = 0,
 ) -> Tuple[str, str, list, int]:
+    """Split the conditional body starting at start_pos; the returned end is an offset into content"""
     nesting_level = 1
-    pos = 0
+    pos = start_pos
     content_length = len(content)
     if_content = []
     else_content = []
@@ -97,10 +100,10 @@ def extract_else_elseif_fi(
 
     while pos < content_length and nesting_level > 0:
         # Find all possible next matches
-        start_match = start_delimiter.search(content[pos:])
-        end_match = end_delimiter.search(content[pos:])
-        else_match = else_delimiter.search(content[pos:])
-        elsif_match = elsif_delimiter.search(content[pos:])
+        start_match = start_delimiter.search(content, pos)
+        end_match = end_delimiter.search(content, pos)
+        else_match = else_delimiter.search(content, pos)
+        elsif_match = elsif_delimiter.search(content, pos)
 
         valid_matches = []
         if start_match:
@@ -119,10 +122,10 @@ def extract_else_elseif_fi(
 
         # Add content up to (but not including) the match for top-level else/elsif/fi
         if nesting_level == 1 and (match_type in ["else", "elsif", "end"]):
-            current_buffer.append(content[pos : pos + next_match.start()])
+            current_buffer.append(content[pos : next_match.start()])
         else:
             # For nested structures, include the full match
-            current_buffer.append(content[pos : pos + next_match.end()])
+            current_buffer.append(content[pos : next_match.end()])
 
         if match_type == "start":
             nesting_level += 1
@@ -151,7 +154,7 @@ def extract_else_elseif_fi(
             elsif_branches.append((elsif_condition, ""))
             current_buffer = []  # Reset buffer to collect the elsif content
 
-        pos += next_match.end()
+        pos = next_match.end()
 
     return (
         "".join(if_content).strip(),
@@ -187,7 +190,7 @@ class IfElseBlockHandler(TokenHandler):
         super().__init__(**kwargs)
         self.logger = logger or logging.getLogger(__name__)
         self.all_ifs: List[Tuple[str, re.Pattern]] = []
-        self.all_ifs_compiled: re.Pattern | None = None
+        self._all_ifs_compiled: re.Pattern | None = None
         self._reset()
 
     def clear(self):
@@ -209,18 +212,22 @@ class IfElseBlockHandler(TokenHandler):
         return any(name == var_name for name, _ in self.all_ifs)
 
     def _recompile_all_ifs(self):
-        if len(self.all_ifs) == 0:
-            self.all_ifs_compiled = None
-            return
-        pattern = ""
-        for k, v in self.all_ifs:
-            pattern += "|" + v.pattern
-        if pattern.startswith("|"):
-            pattern = pattern[1:]
-        self.all_ifs_compiled = re.compile(pattern)
-
-    def can_handle(self, content: str) -> bool:
-        return any(pattern.match(content) for _, pattern in self.all_ifs)
+        # compiled on first use, as every \newif changes it
+        self._all_ifs_compiled = None
+
+    @property
+    def all_ifs_compiled(self) -> re.Pattern | None:
+        if self._all_ifs_compiled is None and self.all_ifs:
+            pattern = ""
+            for k, v in self.all_ifs:
+                pattern += "|" + v.pattern
+            if pattern.startswith("|"):
+                pattern = pattern[1:]
+            self._all_ifs_compiled = re.compile(pattern)
+        return self._all_ifs_compiled
+
+    def can_handle(self, content: str, pos: int = 0) -> bool:
+        return any(pattern.match(content, pos) for _, pattern in self.all_ifs)
 
     def _handle_atif(
         self, content: str, match: re.Match, name: str
@@ -276,10 +283,10 @@ class IfElseBlockHandler(TokenHandler):
         }, start_pos + end_pos
 
     def handle(
-        self, content: str, prev_token: Optional[Dict] = None
+        self, content: str, prev_token: Optional[Dict] = None, pos: int = 0
     ) -> Tuple[Optional[Dict], int]:
         for name, pattern in self.all_ifs:
-            match = pattern.match(content)
+            match = pattern.match(content, pos)
             if match:
                 if name == "ifthenelse":
                     token, end_pos = try_handle_ifthenelse(content, match)
@@ -307,11 +314,11 @@ class IfElseBlockHandler(TokenHandler):
                     cs_name_ind = out_str.find("\\csname")
                     condition = out_str.replace(" ", "")
                     if cs_name_ind != -1:
-                        inner, pos = extract_and_concat_nested_csname(
-                            content[start_pos + cs_name_ind :]
+                        inner, csname_end = extract_and_concat_nested_csname(
+                            content, start_pos + cs_name_ind
                         )
                         if inner:
-                            start_pos += cs_name_ind + pos
+                            start_pos = csname_end
                             condition = inner.strip()
                     else:
                         start_pos = match.end()
@@ -324,8 +331,9 @@ class IfElseBlockHandler(TokenHandler):
                     try:
                         if_content, else_content, elsif_branches, end_pos = (
                             extract_else_elseif_fi(
-                                content[start_pos:],
+                                content,
                                 start_delimiter=self.all_ifs_compiled or IF_PATTERN,
+                                start_pos=start_pos,
                             )
                         )
                         # Swap if_content and else_content for \iffalse
@@ -343,7 +351,7 @@ class IfElseBlockHandler(TokenHandler):
                         "if_content": if_content,
                         "else_content": else_content,
                         "elsif_branches": elsif_branches,
-                    }, start_pos + end_pos
+                    }, end_pos
 
         return None, 0
 
@@ -1,5 +1,6 @@
 from typing import Callable, Dict, List, Optional, Tuple
 import re
+from latex2json.parser.handlers.dispatch import pattern_prefixes
 from latex2json.parser.handlers.environment import (
     BaseEnvironmentHandler,
     find_pattern_while_skipping_nested_envs,
@@ -13,13 +14,16 @@ ITEM_PATTERN = re.compile(
 
 class ItemHandler(BaseEnvironmentHandler):
 
-    def can_handle(self, content: str) -> bool:
-        return ITEM_PATTERN.match(content) is not None
+    def can_handle(self, content: str, pos: int = 0) -> bool:
+        return ITEM_PATTERN.match(content, pos) is not None
+
+    def triggers(self):
+        return pattern_prefixes([ITEM_PATTERN])
 
     def handle(
-        self, content: str, prev_token: Optional[Dict] = None
+        self, content: str, prev_token: Optional[Dict] = None, pos: int = 0
     ) -> Tuple[Optional[Dict], int]:
-        match = ITEM_PATTERN.match(content)
+        match = ITEM_PATTERN.match(content, pos)
         if match:
             end_of_item = match.group(2)
             end_pos = match.end()
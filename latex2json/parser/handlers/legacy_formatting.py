@@ -92,14 +92,14 @@ OPENING_BRACE_PATTERN = re.compile(r"(?<!\\){")
 
 
 class LegacyFormattingHandler(TokenHandler):
-    def can_handle(self, content: str) -> bool:
-        return any(pattern.match(content) for pattern in PATTERNS.values())
+    def can_handle(self, content: str, pos: int = 0) -> bool:
+        return any(pattern.match(content, pos) for pattern in PATTERNS.values())
 
     def handle(
-        self, content: str, prev_token: Optional[Dict] = None
+        self, content: str, prev_token: Optional[Dict] = None, pos: int = 0
     ) -> Tuple[str, int]:
         for pattern_name, pattern in PATTERNS.items():
-            match = pattern.match(content)
+            match = pattern.match(content, pos)
 
             if match:
                 matched_str = match.group(0)
@@ -128,9 +128,8 @@ class LegacyFormattingHandler(TokenHandler):
                 if matched_str.endswith("{"):
                     # simple \tt{text}
                     next_pos -= 1  # remove the opening brace
-                    text, end_pos = extract_nested_content(content[next_pos:])
+                    text, total_pos = extract_nested_content(content, start=next_pos)
                     content_to_format = text.strip()
-                    total_pos = next_pos + end_pos
                     formatted_text = "\\%s{%s}" % (modern_command, content_to_format)
                     return formatted_text, total_pos
                 else:
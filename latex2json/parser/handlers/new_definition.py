@@ -6,6 +6,7 @@ from latex2json.parser.patterns import (
     command_pattern,
     command_with_opt_brace_pattern,
 )
+from latex2json.utils.lazy_regex import lazy_compile
 from latex2json.utils.tex_utils import (
     extract_nested_content,
     extract_nested_content_pattern,
@@ -46,68 +47,68 @@ declare_pattern_N_blocks = {
 # Compile patterns for definition commands
 PATTERNS = {
     # Matches newcommand/renewcommand, supports both {\commandname} and \commandname syntax
-    "newcommand": re.compile(
+    "newcommand": lazy_compile(
         r"\\(?:new|renew|provide)command" + POST_NEW_COMMAND_PATTERN_STR, re.DOTALL
     ),
-    "let": re.compile(LET_COMMAND_PREFIX),
+    "let": lazy_compile(LET_COMMAND_PREFIX),
     # declares
-    "declarerobustcommand": re.compile(
+    "declarerobustcommand": lazy_compile(
         r"\\DeclareRobustCommand" + POST_NEW_COMMAND_PATTERN_STR, re.DOTALL
     ),
-    "declarepairedelimiter": re.compile(
+    "declarepairedelimiter": lazy_compile(
         r"\\DeclarePairedDelimiter\s*(?:{\\([^\s{}]+)}|\\([^\s{]+))\s*{",
         re.DOTALL,
     ),
     # declares for math mode
-    "declaremathoperator": re.compile(
+    "declaremathoperator": lazy_compile(
         r"\\DeclareMathOperator" + POST_NEW_COMMAND_PATTERN_STR, re.DOTALL
     ),
-    "declarealphabets": re.compile(
+    "declarealphabets": lazy_compile(
         r"\\(DeclareMathAlphabet|DeclareSymbolFontAlphabet)\s*{",
         re.DOTALL,
     ),
     # Matches \def commands - always with backslash before command name
-    "def": re.compile(DEF_COMMAND_PREFIX),
-    "@namedef": re.compile(r"\\@namedef\s*{([^}]*)}"),
+    "def": lazy_compile(DEF_COMMAND_PREFIX),
+    "@namedef": lazy_compile(r"\\@namedef\s*{([^}]*)}"),
     # Matches newtheorem with all its optional arguments
-    "newtheorem": re.compile(
+    "newtheorem": lazy_compile(
         r"\\newtheorem\*?{([^}]*)}(?:\[([^]]*)\])?{([^}]*)}(?:\[([^]]*)\])?", re.DOTALL
     ),
-    "newtheoremstyle": re.compile(r"\\newtheoremstyle\*?{", re.DOTALL),
-    "crefname": re.compile(r"\\[cC]refname{([^}]*)}{([^}]*)}(?:{([^}]*)})?", re.DOTALL),
-    "newtoks": re.compile(
+    "newtheoremstyle": lazy_compile(r"\\newtheoremstyle\*?{", re.DOTALL),
+    "crefname": lazy_compile(r"\\[cC]refname{([^}]*)}{([^}]*)}(?:{([^}]*)})?", re.DOTALL),
+    "newtoks": lazy_compile(
         r"\\newtoks\s*(%s)" % (command_with_opt_brace_pattern), re.DOTALL
     ),
-    "newif": re.compile(r"\\(?:re)?newif\s*\\if([^\s{\\]+)", re.DOTALL),
-    "newboolean": re.compile(
+    "newif": lazy_compile(r"\\(?:re)?newif\s*\\if([^\s{\\]+)", re.DOTALL),
+    "newboolean": lazy_compile(
         r"\\(?:re)?newboolean\s*" + BRACE_CONTENT_PATTERN, re.DOTALL
     ),
-    "newlength": re.compile(
+    "newlength": lazy_compile(
         r"\\((?:re)?newlength)\s*" + command_with_opt_brace_pattern, re.DOTALL
     ),
-    "setlength": re.compile(
+    "setlength": lazy_compile(
         r"\\(setlength|addtolength|settoheight|settodepth|settowidth)\s*%s\s*{"
         % (command_with_opt_brace_pattern),
         re.DOTALL,
     ),
-    "newcounter": re.compile(
+    "newcounter": lazy_compile(
         r"\\(?:(?:re)?newcounter|stepcounter)\s*" + BRACE_CONTENT_PATTERN, re.DOTALL
     ),
-    "newother": re.compile(r"\\(?:re)?new(?:count|dimen|skip|muskip)\s*\\([^\s{[]+)"),
-    "newcolumntype": re.compile(
+    "newother": lazy_compile(r"\\(?:re)?new(?:count|dimen|skip|muskip)\s*\\([^\s{[]+)"),
+    "newcolumntype": lazy_compile(
         r"\\(?:newcolumntype|renewcolumntype)\s*\{[^}]*\}(?:\s*\[\d+\])?\s*{", re.DOTALL
     ),
-    "newfam": re.compile(r"\\newfam\s*\\([^\s{[]+)"),
-    "setcounter": re.compile(
+    "newfam": lazy_compile(r"\\newfam\s*\\([^\s{[]+)"),
+    "setcounter": lazy_compile(
         r"\\setcounter\s*%s\s*%s" % (BRACE_CONTENT_PATTERN, BRACE_CONTENT_PATTERN),
         re.DOTALL,
     ),
-    "floatname": re.compile(r"\\floatname{([^}]*)}{([^}]*)}"),
+    "floatname": lazy_compile(r"\\floatname{([^}]*)}{([^}]*)}"),
     "expandafter": EXPAND_PATTERN,
     "endcsname": END_CSNAME_PATTERN,  # for trailing \endcsname?
     # color/font
-    "definecolor": re.compile(r"\\definecolor\s*{"),
-    "font": re.compile(
+    "definecolor": lazy_compile(r"\\definecolor\s*{"),
+    "font": lazy_compile(
         r"\\font\s*\\([^\s=]+)\s*=\s*([^\s]+)(?:\s+at\s+(\d+(?:\.\d+)?)(pt|cm|mm|in|ex|em|bp|dd|pc|sp))?"
     ),
 }
@@ -115,11 +116,11 @@ PATTERNS = {
 USAGE_SUFFIX = r"(?![a-zA-Z@])"
 
 
-def extract_and_concat_nested_csname(content: str) -> Tuple[str, int]:
-    match = START_CSNAME_PATTERN.match(content)
+def extract_and_concat_nested_csname(content: str, pos: int = 0) -> Tuple[str, int]:
+    match = START_CSNAME_PATTERN.match(content, pos)
     if match:
         _, next_end_pos, inner = extract_nested_content_pattern(
-            content, START_CSNAME_PATTERN, END_CSNAME_PATTERN
+            content, START_CSNAME_PATTERN, END_CSNAME_PATTERN, pos
         )
         if next_end_pos == -1:
             return "", -1
@@ -135,16 +136,16 @@ def extract_and_concat_nested_csname(content: str) -> Tuple[str, int]:
 
 class NewDefinitionHandler(TokenHandler):
 
-    def can_handle(self, content: str) -> bool:
+    def can_handle(self, content: str, pos: int = 0) -> bool:
         """Check if the content contains any definition commands"""
-        return any(pattern.match(content) for pattern in PATTERNS.values())
+        return any(pattern.match(content, pos) for pattern in PATTERNS.values())
 
     def handle(
-        self, content: str, prev_token: Optional[Dict] = None
+        self, content: str, prev_token: Optional[Dict] = None, pos: int = 0
     ) -> Tuple[Optional[Dict], int]:
         """Handle definition commands and return appropriate token with definition details"""
         for pattern_name, pattern in PATTERNS.items():
-            match = pattern.match(content)
+            match = pattern.match(content, pos)
             if match:
                 if pattern_name == "declarepairedelimiter":
                     return self._handle_paired_delimiter(content, match)
@@ -208,8 +209,8 @@ class NewDefinitionHandler(TokenHandler):
                     }, match.end()
                 elif pattern_name in ["expandafter", "endcsname"]:
                     next_pos = match.end()
-                    token, end_pos = self.handle(content[next_pos:])
-                    return token, next_pos + end_pos
+                    token, end_pos = self.handle(content, pos=next_pos)
+                    return token, max(end_pos, next_pos)
                 elif pattern_name == "newcolumntype":
                     return self._handle_newcolumntype(content, match)
                 else:
@@ -278,7 +279,7 @@ class NewDefinitionHandler(TokenHandler):
     def _handle_newlength(self, match: re.Match) -> Tuple[Optional[Dict], int]:
         r"""Handle \newlength definitions"""
         s = match.group(0)
-        s = s[match.end(1) :]
+        s = s[match.end(1) - match.start() :]
         var_name = self._parse_varname_from_brace_or_backslash(s)
         if not var_name:
             return None, match.end()
@@ -290,7 +291,7 @@ class NewDefinitionHandler(TokenHandler):
     ) -> Tuple[Optional[Dict], int]:
         r"""Handle \newlength definitions"""
         s = match.group(0)
-        s = s[match.end(1) : -1]
+        s = s[match.end(1) - match.start() : -1]
         var_name = self._parse_varname_from_brace_or_backslash(s)
         start_pos = match.end(0) - 1
         len_def, end_pos = extract_nested_content(content[start_pos:])
@@ -356,7 +357,7 @@ class NewDefinitionHandler(TokenHandler):
         r"""Handle \newcommand and \renewcommand definitions"""
         start_pos = match.end()
         definition, end_pos = extract_nested_content(
-            content[start_pos - 1 :]
+            content, start=start_pos - 1
         )  # -1 to go back {
         if definition is None:
             return None, start_pos
@@ -393,7 +394,7 @@ class NewDefinitionHandler(TokenHandler):
             "usage_pattern": pattern,
         }
 
-        return token, start_pos + end_pos - 1
+        return token, end_pos
 
     def _handle_newtheorem(self, match) -> Tuple[Optional[Dict], int]:
         """Handle \newtheorem definitions"""
@@ -461,16 +462,16 @@ class NewDefinitionHandler(TokenHandler):
                 # extract inner inside \csname <INNER> \endcsname
                 if len(inner_csnames) < max_csname_blocks:
                     # strip out all expandafter patterns
-                    _match = expand_after_pattern.match(content[start_pos:])
+                    _match = expand_after_pattern.match(content, start_pos)
                     if _match:
-                        start_pos += _match.end()
+                        start_pos = _match.end()
                         continue
 
                     inner, next_pos = extract_and_concat_nested_csname(
-                        content[start_pos:]
+                        content, start_pos
                     )
                     if next_pos != -1:
-                        start_pos += next_pos
+                        start_pos = next_pos
                         inner_csnames.append(inner)
                         continue
 
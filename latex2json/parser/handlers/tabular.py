@@ -1,6 +1,9 @@
 import re
-from typing import Callable, Dict, List, Optional, Tuple
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from latex2json.parser.flatten import flatten_tokens
+from latex2json.parser.handlers.dispatch import pattern_prefixes
 from latex2json.parser.handlers.environment import BaseEnvironmentHandler
 from latex2json.utils.tex_utils import (
     extract_nested_content,
@@ -27,6 +30,81 @@ MAKECELL_SHORTSTACK_PATTERN = re.compile(
     r"\\(?:makecell|shortstack)(?:\s*\[[^\]]*\])?\s*{", re.DOTALL
 )
 
+# placeholders of extract_table_structures and flatten_tokens
+TABLE_STRUCT_KEY_PATTERN = re.compile(r"`\|TABLE_STRUCT_\d+\|`")
+# lookahead, as adjacent keys share their backtick
+REF_KEY_PATTERN = re.compile(r"(?=(`\|REF_\d+\|`))")
+
+
+@lru_cache(maxsize=None)
+def _split_pattern(delimiter: str) -> re.Pattern:
+    # braces, and every position a delimiter starts at (delimiters like \\ may overlap)
+    return re.compile(r"[{}]|(?=%s)" % re.escape(delimiter))
+
+
+def _strip_span(content: str, start: int, end: int) -> Tuple[int, int]:
+    """(start, end) of content[start:end].strip()"""
+    while start < end and content[start].isspace():
+        start += 1
+    while end > start and content[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def find_split_spans(
+    content: str, delimiter: str, skip_empty: bool = False
+) -> List[Tuple[int, int]]:
+    """
+    Offsets of the parts split_latex_content returns, found in one scan over the
+    braces and delimiters of content (no substrings are made).
+
+    Args:
+        content: The LaTeX content to split
+        delimiter: The delimiter to split on ('\\\\' for rows, '&' for cells)
+        skip_empty: Whether to leave out empty parts (rows) or keep them (cells)
+
+    Returns:
+        List of (start, end) offsets of each part in content, whitespace stripped
+    """
+    spans = []
+    nesting_level = 0
+    part_start = 0
+    # the rest of a split delimiter is not looked at again
+    skip_to = 0
+
+    for match in _split_pattern(delimiter).finditer(content):
+        i = match.start()
+        if i < skip_to:
+            continue
+        char = content[i]
+        if char == "{":
+            nesting_level += 1
+            continue
+        if char == "}":
+            nesting_level -= 1
+            continue
+        if nesting_level != 0:
+            continue
+
+        # Count backslashes before delimiter, if odd the delimiter is escaped
+        pos = i - 1
+        while pos >= 0 and content[pos] == "\\":
+            pos -= 1
+        if (i - 1 - pos) % 2 == 1:
+            continue
+
+        # Only split when we're not inside brackets and delimiter is not escaped
+        span = _strip_span(content, part_start, i)
+        if not skip_empty or span[0] < span[1]:
+            spans.append(span)
+        part_start = skip_to = i + len(delimiter)
+
+    # Add the last part if it exists (for rows) or always (for cells)
+    span = _strip_span(content, part_start, len(content))
+    if not skip_empty or span[0] < span[1]:
+        spans.append(span)
+    return spans
+
 
 def split_latex_content(
     content: str, delimiter: str, is_row_split: bool = False
@@ -43,60 +121,10 @@ def split_latex_content(
         List of split content, with separators and empty lines filtered out for rows,
         but preserving empty cells for cell splitting
     """
-
-    parts = []
-    current_part = []
-    nesting_level = 0
-    i = 0
-
-    while i < len(content):
-        # Check for escaped delimiter
-        is_escaped = False
-        if content[i : i + len(delimiter)] == delimiter:
-            # Count backslashes before delimiter
-            backslash_count = 0
-            pos = i - 1
-            while pos >= 0 and content[pos] == "\\":
-                backslash_count += 1
-                pos -= 1
-            # If odd number of backslashes, the delimiter is escaped
-            is_escaped = (backslash_count % 2) == 1
-
-        if content[i] == "{":
-            nesting_level += 1
-            current_part.append(content[i])
-        elif content[i] == "}":
-            nesting_level -= 1
-            current_part.append(content[i])
-        elif (
-            content[i : i + len(delimiter)] == delimiter
-            and nesting_level == 0
-            and not is_escaped
-        ):
-            # Only split when we're not inside brackets and delimiter is not escaped
-            current_part = "".join(current_part).strip()
-            if is_row_split:
-                # For rows, only add non-empty parts
-                if current_part:
-                    parts.append(current_part)
-            else:
-                # For cells, preserve empty cells
-                parts.append(current_part)
-            current_part = []
-            i += len(delimiter) - 1  # Skip the rest of delimiter
-        else:
-            current_part.append(content[i])
-        i += 1
-
-    # Add the last part if it exists (for rows) or always (for cells)
-    current_part = "".join(current_part).strip()
-    if is_row_split:
-        if current_part:
-            parts.append(current_part)
-    else:
-        parts.append(current_part)
-
-    return parts
+    return [
+        content[start:end]
+        for start, end in find_split_spans(content, delimiter, skip_empty=is_row_split)
+    ]
 
 
 def split_rows(latex_table: str) -> List[str]:
@@ -117,67 +145,82 @@ def split_cells(row: str) -> List[str]:
     return out_cells
 
 
-def parse_tabular(latex_table: str, cell_parser_fn=None) -> List[List[Dict]]:
+def _parse_multicell(cell: str) -> Tuple[str, int, int]:
+    """(content, rowspan, colspan) of a cell, unwrapping multicolumn/multirow"""
+    content = cell
+    colspan = 1
+    rowspan = 1
+
+    # Handle multicolumn first
+    mcol_match = MULTICOLUMN_PATTERN.search(content)
+    if mcol_match:
+        colspan = int(mcol_match.group(1))
+        blocks, end_pos = extract_nested_content_sequence_blocks(
+            content, max_blocks=2, start=mcol_match.end() - 1
+        )
+        content = blocks[-1].strip() if blocks else ""
+
+    # Then handle multirow within the content
+    mrow_match = MULTIROW_PATTERN.search(content)
+    if mrow_match:
+        rowspan = int(mrow_match.group(1))
+        blocks, end_pos = extract_nested_content_sequence_blocks(
+            content, max_blocks=2, start=mrow_match.end() - 1
+        )
+        content = blocks[-1].strip() if blocks else ""
+
+    return content, rowspan, colspan
+
+
+def parse_tabular(
+    latex_table: str,
+    cell_parser_fn: Optional[Callable[[str], Any]] = None,
+    cells_parser_fn: Optional[Callable[[List[str]], List[Any]]] = None,
+) -> List[List[Dict]]:
     """
     Parse LaTeX table into structured format with rows and cells containing content and span information
 
+    The cells are split out first and then parsed in table order, either all in one
+    cells_parser_fn call or one cell_parser_fn call per cell.
+
     Returns:
         List of rows, where each row is a list of cell dictionaries containing:
         - content: List of parsed elements (text/equations)
         - rowspan: Number of rows this cell spans
         - colspan: Number of columns this cell spans
     """
-    # Split into rows, ignoring empty lines
-    rows = split_rows(latex_table)
+    # Split into rows (ignoring empty lines) and cells
+    rows = [
+        [_parse_multicell(cell) for cell in split_cells(row)]
+        for row in split_rows(latex_table)
+    ]
+
+    contents = [content for row in rows for content, _, _ in row]
+    if cells_parser_fn:
+        parsed_contents = iter(cells_parser_fn(contents))
+    elif cell_parser_fn:
+        parsed_contents = map(cell_parser_fn, contents)
+    else:
+        parsed_contents = iter(contents)
 
     parsed_rows = []
-
-    for row_idx, row in enumerate(rows):
-        row = row.strip()
-        if row:
-            cells = split_cells(row)
-            parsed_row = []
-
-            for cell in cells:
-                # Parse nested multicolumn/multirow
-                content = cell
-                colspan = 1
-                rowspan = 1
-
-                # Handle multicolumn first
-                mcol_match = MULTICOLUMN_PATTERN.search(content)
-                if mcol_match:
-                    colspan = int(mcol_match.group(1))
-                    start_pos = mcol_match.end() - 1
-                    blocks, end_pos = extract_nested_content_sequence_blocks(
-                        content[start_pos:], max_blocks=2
-                    )
-                    content = blocks[-1].strip() if blocks else ""
-
-                # Then handle multirow within the content
-                mrow_match = MULTIROW_PATTERN.search(content)
-                if mrow_match:
-                    rowspan = int(mrow_match.group(1))
-                    start_pos = mrow_match.end() - 1
-                    blocks, end_pos = extract_nested_content_sequence_blocks(
-                        content[start_pos:], max_blocks=2
-                    )
-                    content = blocks[-1].strip() if blocks else ""
-
-                # Create cell structure
-                parsed_content = cell_parser_fn(content) if cell_parser_fn else content
-                parsed_cell = parsed_content
-                if rowspan > 1 or colspan > 1:
-                    parsed_cell = {
-                        "content": parsed_content,
-                        "rowspan": rowspan,
-                        "colspan": colspan,
-                    }
-
-                parsed_row.append(parsed_cell)
-
-            if parsed_row:
-                parsed_rows.append(parsed_row)
+    for row in rows:
+        parsed_row = []
+        for content, rowspan, colspan in row:
+            # Create cell structure
+            parsed_content = next(parsed_contents)
+            parsed_cell = parsed_content
+            if rowspan > 1 or colspan > 1:
+                parsed_cell = {
+                    "content": parsed_content,
+                    "rowspan": rowspan,
+                    "colspan": colspan,
+                }
+
+            parsed_row.append(parsed_cell)
+
+        if parsed_row:
+            parsed_rows.append(parsed_row)
 
     # strip out start/end empty rows (incl empty cells)
     if parsed_rows:
@@ -206,15 +249,18 @@ def extract_table_structures(content: str) -> Tuple[str, Dict[str, Dict]]:
     }
 
     for pattern, block_count in patterns.items():
+        # the text up to pos is final for this pattern, collected in out
+        out: List[str] = []
+        copied_to = 0
         pos = 0
         while True:
-            match = pattern.search(current_content[pos:])
+            match = pattern.search(current_content, pos)
             if not match:
                 break
 
-            start_pos = pos + match.end() - 1
+            start_pos = match.end() - 1
             blocks, end_pos = extract_nested_content_sequence_blocks(
-                current_content[start_pos:], max_blocks=block_count
+                current_content, max_blocks=block_count, start=start_pos
             )
 
             if not blocks:
@@ -225,37 +271,52 @@ def extract_table_structures(content: str) -> Tuple[str, Dict[str, Dict]]:
             ref_key = f"`|TABLE_STRUCT_{ref_counter}|`"
             ref_counter += 1
 
-            original_content = current_content[
-                pos + match.start() : start_pos + end_pos
-            ]
             reference_map[ref_key] = {
                 "type": "table_structure",
-                "content": original_content,
+                "content": current_content[match.start() : end_pos],
             }
 
             # Replace content with reference
-            current_content = (
-                current_content[: pos + match.start()]
-                + ref_key
-                + current_content[start_pos + end_pos :]
-            )
+            out.append(current_content[copied_to : match.start()])
+            out.append(ref_key)
+            copied_to = pos = end_pos
 
-            pos += match.start() + len(ref_key)
+        if out:
+            out.append(current_content[copied_to:])
+            current_content = "".join(out)
 
     return current_content, reference_map
 
 
+def restore_table_structures(content: str, table_structures: Dict[str, Dict]) -> str:
+    """Put the structures taken out by extract_table_structures back into content"""
+    if not table_structures:
+        return content
+    return TABLE_STRUCT_KEY_PATTERN.sub(
+        lambda match: table_structures.get(match.group(0), {}).get(
+            "content", match.group(0)
+        ),
+        content,
+    )
+
+
 class TabularHandler(BaseEnvironmentHandler):
     def __init__(
         self,
         process_content_fn: Optional[Callable[[str], str]] = None,
         cell_parser_fn: Optional[Callable[[str], List[Dict]]] = None,
+        cells_parser_fn: Optional[Callable[[List[str]], List[List[Dict]]]] = None,
     ):
         super().__init__(process_content_fn=process_content_fn)
         self.cell_parser_fn = cell_parser_fn
+        # parses all cells of a table in one call, used over cell_parser_fn if set
+        self.cells_parser_fn = cells_parser_fn
 
-    def can_handle(self, content: str) -> bool:
-        return bool(re.match(TABULAR_PATTERN, content))
+    def can_handle(self, content: str, pos: int = 0) -> bool:
+        return bool(TABULAR_PATTERN.match(content, pos))
+
+    def triggers(self):
+        return pattern_prefixes([TABULAR_PATTERN])
 
     def _clean_cell(self, cell: List | Dict | str) -> List[Dict] | str | None:
         if isinstance(cell, list):
@@ -276,10 +337,105 @@ class TabularHandler(BaseEnvironmentHandler):
             content = self.cell_parser_fn(content)
         return self._clean_cell(content)
 
+    def _parse_cell_contents(self, contents: List[str]) -> List:
+        if self.cells_parser_fn:
+            return self.cells_parser_fn(contents)
+        if self.cell_parser_fn:
+            return [self.cell_parser_fn(content) for content in contents]
+        return list(contents)
+
+    @staticmethod
+    def _find_references(text: str, key_order: Dict[str, int]) -> List[Tuple[int, str]]:
+        """(position, ref_key) of the references in text, taken in reference_map order,
+        each one at its first occurrence after the previous one"""
+        positions: Dict[str, List[int]] = {}
+        for match in REF_KEY_PATTERN.finditer(text):
+            ref_key = match.group(1)
+            if ref_key in key_order:
+                positions.setdefault(ref_key, []).append(match.start())
+
+        found = []
+        current_pos = 0
+        for ref_key in sorted(positions, key=key_order.get):
+            ref_positions = positions[ref_key]
+            i = bisect_left(ref_positions, current_pos)
+            if i < len(ref_positions):
+                found.append((ref_positions[i], ref_key))
+                current_pos = ref_positions[i] + len(ref_key)
+        return found
+
+    def _split_references(
+        self, cell: Dict, reference_map: Dict[str, Dict], key_order: Dict[str, int]
+    ) -> List[Dict]:
+        # fetch the references in text content and replace it with the reference content token(s) chunks
+        # e.g. {type: "text", content: "hello `|REF_1|` world `|REF_2|`", styles: ["bold"]}
+        # becomes {type: "text", content: "hello "}, REF_1 token, {type: "text", content: " world "}, REF_2 token
+        # and all these token chunks maintain the same styles as original
+        content = cell["content"]
+        styles = cell.get("styles", [])
+        chunks: List[Dict] = []
+        current_pos = 0
+
+        for ref_pos, ref_key in self._find_references(content, key_order):
+            # Add text before reference if any
+            if ref_pos > current_pos:
+                chunks.append({"type": "text", "content": content[current_pos:ref_pos]})
+
+            # Add reference token
+            chunks.append(reference_map[ref_key].copy())
+            current_pos = ref_pos + len(ref_key)
+
+        # Add remaining text if any
+        if current_pos < len(content):
+            chunks.append({"type": "text", "content": content[current_pos:]})
+
+        # now add style if exists
+        if styles:
+            for chunk in chunks:
+                cur_styles = chunk.get("styles", [])
+                # Preserve order while removing duplicates
+                chunk["styles"] = list(dict.fromkeys(styles + cur_styles))
+        return chunks
+
+    def _parse_cells(
+        self, contents: List[str], reference_map: Dict[str, Dict]
+    ) -> List[List[Dict] | str | None]:
+        """Parse the cells of a table, restoring the tokens flattened out to references"""
+        contents = [content.strip() for content in contents]
+        parsed_contents = self._parse_cell_contents(contents)
+        key_order = {ref_key: i for i, ref_key in enumerate(reference_map)}
+
+        out = []
+        for content, cells in zip(contents, parsed_contents):
+            # check if content even has any references
+            has_references = bool(key_order) and any(
+                match.group(1) in key_order
+                for match in REF_KEY_PATTERN.finditer(content)
+            )
+
+            if not has_references:
+                cells = self._clean_cell(cells)
+            else:
+                if not self.cells_parser_fn and not self.cell_parser_fn:
+                    cells = [{"type": "text", "content": content}]
+
+                out_cells = []
+                for cell in cells:
+                    if isinstance(cell, dict) and cell.get("type") == "text":
+                        out_cells.extend(
+                            self._split_references(cell, reference_map, key_order)
+                        )
+                    else:
+                        out_cells.append(cell)
+                cells = out_cells
+
+            out.append(cells if cells else None)
+        return out
+
     def handle(
-        self, content: str, prev_token: Optional[Dict] = None
+        self, content: str, prev_token: Optional[Dict] = None, pos: int = 0
     ) -> Tuple[Optional[Dict], int]:
-        match = re.match(TABULAR_PATTERN, content)
+        match = TABULAR_PATTERN.match(content, pos)
 
         if not match:
             return None, 0
@@ -300,11 +456,11 @@ class TabularHandler(BaseEnvironmentHandler):
 
         if is_begin:
             start_pos, end_pos, inner_content = find_matching_env_block(
-                content, env_type
+                content, env_type, pos
             )
         else:
             start_pos, end_pos, inner_content = extract_nested_content_pattern(
-                content, r"\\tabular", r"\\endtabular"
+                content, r"\\tabular", r"\\endtabular", pos
             )
         if start_pos == -1:
             return None, match.end()
@@ -348,89 +504,16 @@ class TabularHandler(BaseEnvironmentHandler):
             flattened_content, reference_map = flatten_tokens(processed_content)
 
             # then set back the table structures to the original content
-            for ref_key, structure in table_structures.items():
-                flattened_content = flattened_content.replace(
-                    ref_key, structure["content"]
-                )
-
-            def cell_parser_fn(content: str):
-                content = content.strip()
-                cells = []
-                current_pos = 0
-
-                # check if content even has any references
-                has_references = False
-                for ref_key in reference_map:
-                    if ref_key in content:
-                        has_references = True
-                        break
-
-                if not has_references:
-                    cells = self._parse_cell(content)
-                else:
-                    if self.cell_parser_fn:
-                        cells = self.cell_parser_fn(content)
-                    else:
-                        cells = [{"type": "text", "content": content}]
-
-                    out_cells = []
-                    for cell in cells:
-                        if isinstance(cell, dict) and cell.get("type") == "text":
-                            # fetch the references in text content and replace it with the reference content token(s) chunks
-                            # e.g. {type: "text", content: "hello `|REF_1|` world `|REF_2|`", styles: ["bold"]}
-                            # becomes {type: "text", content: "hello "}, REF_1 token, {type: "text", content: " world "}, REF_2 token
-                            # and all these token chunks maintain the same styles as original
-                            content = cell["content"]
-                            styles = cell.get("styles", [])
-                            chunks: List[Dict] = []
-                            current_pos = 0
-
-                            for ref_key in reference_map:
-                                # only one occurence of each reference key and in order
-                                if ref_key in content[current_pos:]:
-                                    # Find next reference position
-                                    ref_pos = content.find(ref_key, current_pos)
-
-                                    # Add text before reference if any
-                                    if ref_pos > current_pos:
-                                        text_chunk = {
-                                            "type": "text",
-                                            "content": content[current_pos:ref_pos],
-                                        }
-                                        chunks.append(text_chunk)
-
-                                    # Add reference token
-                                    ref_token = reference_map[ref_key].copy()
-                                    chunks.append(ref_token)
-
-                                    current_pos = ref_pos + len(ref_key)
-
-                            # Add remaining text if any
-                            if current_pos < len(content):
-                                text_chunk = {
-                                    "type": "text",
-                                    "content": content[current_pos:],
-                                }
-                                chunks.append(text_chunk)
-
-                            # now add style if exists
-                            if styles:
-                                for chunk in chunks:
-                                    cur_styles = chunk.get("styles", [])
-                                    # Preserve order while removing duplicates
-                                    chunk["styles"] = list(
-                                        dict.fromkeys(styles + cur_styles)
-                                    )
-                            out_cells.extend(chunks)
-                        else:
-                            out_cells.append(cell)
-                    cells = out_cells
-
-                if cells:
-                    return cells
-                return None
+            flattened_content = restore_table_structures(
+                flattened_content, table_structures
+            )
 
-            result = parse_tabular(flattened_content, cell_parser_fn)
+            result = parse_tabular(
+                flattened_content,
+                cells_parser_fn=lambda contents: self._parse_cells(
+                    contents, reference_map
+                ),
+            )
             token["content"] = result
 
         return token, total_pos
@@ -4,6 +4,7 @@ from typing import Callable, Dict, List, Optional, Tuple
 import re
 
 from latex2json.parser.handlers.base import TokenHandler
+from latex2json.parser.handlers.dispatch import pattern_prefixes
 from latex2json.parser.patterns import BRACE_CONTENT_PATTERN, OPTIONAL_BRACE_PATTERN
 from latex2json.utils.conversions import int_to_roman
 from latex2json.utils.tex_utils import (
@@ -93,8 +94,11 @@ def normalize_text_token(token: str | Dict | List) -> Dict:
 
 
 class TextFormattingHandler(TokenHandler):
-    def can_handle(self, content: str) -> bool:
-        return any(pattern.match(content) for pattern in PATTERNS.values())
+    def can_handle(self, content: str, pos: int = 0) -> bool:
+        return any(pattern.match(content, pos) for pattern in PATTERNS.values())
+
+    def triggers(self):
+        return pattern_prefixes(PATTERNS.values())
 
     def _process_content(self, content: str):
         if self.process_content_fn:
@@ -113,17 +117,17 @@ class TextFormattingHandler(TokenHandler):
         if next_content:
             if next_content.endswith("{"):
                 next_pos = match.end(2)
-                text, end_pos = extract_nested_content("{" + content[next_pos:])
+                text, end_pos = extract_nested_content(content, start=match.start(3))
                 if text is None:
                     # should not happen if there is proper closing brace
                     content_to_format = "{"
                     total_pos = next_pos
                 elif text.strip() == "":
                     # ignore empty \text{} i.e. return None since there's nothing to format
-                    return None, next_pos + end_pos - 1
+                    return None, end_pos
                 else:
                     content_to_format = text
-                    total_pos = next_pos + end_pos - 1
+                    total_pos = end_pos
             else:
                 # get first character that is not space
                 index = find_first_nonspace(next_content)
@@ -293,9 +297,9 @@ class TextFormattingHandler(TokenHandler):
         roman_numeral = int_to_roman(numeral)
         return {"type": "text", "content": roman_numeral}, match.end()
 
-    def handle(self, content: str, prev_token: Optional[Dict] = None):
+    def handle(self, content: str, prev_token: Optional[Dict] = None, pos: int = 0):
         for name, pattern in PATTERNS.items():
-            match = pattern.match(content)
+            match = pattern.match(content, pos)
             if not match:
                 continue
             if name == "styled":
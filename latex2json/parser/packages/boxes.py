@@ -2,6 +2,7 @@ from typing import Dict, List, Tuple, Optional
 import re
 
 from latex2json.parser.handlers.base import TokenHandler
+from latex2json.parser.handlers.dispatch import pattern_prefixes
 from latex2json.parser.handlers.new_definition import command_with_opt_brace_pattern
 from latex2json.parser.patterns import OPTIONAL_BRACE_PATTERN
 from latex2json.utils.tex_utils import (
@@ -69,12 +70,17 @@ class BoxHandler(TokenHandler):
     saved_boxes = {}
     numbered_boxes = {}  # Add storage for numbered boxes
 
-    def can_handle(self, content: str) -> bool:
+    def can_handle(self, content: str, pos: int = 0) -> bool:
         return bool(
-            BOX_PATTERN.match(content)
-            or FANCYHEAD_PATTERN.match(content)
-            or SAVED_BOX_PATTERN.match(content)
-            or SETBOX_PATTERN.match(content)
+            BOX_PATTERN.match(content, pos)
+            or FANCYHEAD_PATTERN.match(content, pos)
+            or SAVED_BOX_PATTERN.match(content, pos)
+            or SETBOX_PATTERN.match(content, pos)
+        )
+
+    def triggers(self):
+        return pattern_prefixes(
+            [BOX_PATTERN, FANCYHEAD_PATTERN, SAVED_BOX_PATTERN, SETBOX_PATTERN]
         )
 
     def clear(self):
@@ -82,19 +88,19 @@ class BoxHandler(TokenHandler):
         self.numbered_boxes = {}  # Clear numbered boxes too
 
     def handle(
-        self, content: str, prev_token: Dict = None
+        self, content: str, prev_token: Dict = None, pos: int = 0
     ) -> Tuple[Dict | List[Dict], int]:
         # Try to match setbox first
-        setbox_match = SETBOX_PATTERN.match(content)
+        setbox_match = SETBOX_PATTERN.match(content, pos)
         if setbox_match:
             return self._handle_setbox(content, setbox_match)
 
         # Try to match saved box commands first
-        saved_match = SAVED_BOX_PATTERN.match(content)
+        saved_match = SAVED_BOX_PATTERN.match(content, pos)
         if saved_match:
             return self._handle_saved_box(content, saved_match)
 
-        match = BOX_PATTERN.match(content) or FANCYHEAD_PATTERN.match(content)
+        match = BOX_PATTERN.match(content, pos) or FANCYHEAD_PATTERN.match(content, pos)
         if not match:
             return None, 0
 
@@ -105,9 +111,8 @@ class BoxHandler(TokenHandler):
         delimiter_str = BOX_DELIMITERS.get(match.group(1), start_char)
         N = len(delimiter_str)
         extracted_args, end_pos = extract_delimited_args(
-            content[start_pos:], delimiter_str
+            content, delimiter_str, start_pos
         )
-        end_pos += start_pos
 
         extracted_content = None
         if len(extracted_args) == N:
@@ -152,7 +157,7 @@ class BoxHandler(TokenHandler):
         elif command in ("sbox", "savebox"):
             # Extract the box content
             start_pos = match.end()
-            extracted_args, end_pos = extract_delimited_args(content[start_pos:], "{")
+            extracted_args, end_pos = extract_delimited_args(content, "{", start_pos)
             if extracted_args:
                 box_content = extracted_args[0]
                 if self.process_content_fn:
@@ -165,7 +170,7 @@ class BoxHandler(TokenHandler):
                     }
                 else:
                     self.saved_boxes[box_name] = box_content
-                return None, start_pos + end_pos
+                return None, end_pos
             return None, start_pos
 
         elif command == "usebox":
@@ -197,18 +202,17 @@ class BoxHandler(TokenHandler):
             start_pos += 1
 
         # Check if the content after = matches any box pattern
-        remaining_content = content[start_pos:]
-        box_match = BOX_PATTERN.match(remaining_content)
+        box_match = BOX_PATTERN.match(content, start_pos)
 
         if box_match:
             # Use the existing box handling logic
-            box_result, end_pos = self.handle(remaining_content)
+            box_result, end_pos = self.handle(content, pos=start_pos)
             if box_result:
                 save_box_dict[box_name] = box_result
-                return None, start_pos + end_pos
+                return None, end_pos
 
         # Fallback to direct content extraction if no box pattern matches
-        extracted_args, end_pos = extract_delimited_args(remaining_content, "{")
+        extracted_args, end_pos = extract_delimited_args(content, "{", start_pos)
         if extracted_args:
             box_content = extracted_args[0]
             if self.process_content_fn:
@@ -221,7 +225,7 @@ class BoxHandler(TokenHandler):
                 }
             else:
                 save_box_dict[box_name] = box_content
-            return None, start_pos + end_pos
+            return None, end_pos
 
         return None, start_pos
 
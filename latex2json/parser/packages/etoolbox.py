@@ -1,6 +1,7 @@
 import re
 from typing import Dict, Optional, Tuple
 from latex2json.parser.handlers.base import TokenHandler
+from latex2json.parser.handlers.dispatch import pattern_prefixes
 from latex2json.utils.tex_utils import extract_nested_content_sequence_blocks
 
 # Compile patterns at module level
@@ -22,15 +23,18 @@ class EtoolboxHandler(TokenHandler):
     def clear(self):
         self.bool_definitions = {}
 
-    def can_handle(self, content: str) -> bool:
-        return any(pattern.match(content) for pattern in PATTERNS.values())
+    def can_handle(self, content: str, pos: int = 0) -> bool:
+        return any(pattern.match(content, pos) for pattern in PATTERNS.values())
+
+    def triggers(self):
+        return pattern_prefixes(PATTERNS.values())
 
     def handle(
-        self, content: str, prev_token: Optional[Dict] = None
+        self, content: str, prev_token: Optional[Dict] = None, pos: int = 0
     ) -> Tuple[Optional[Dict], int]:
         """Handle etoolbox boolean commands"""
         for pattern_name, pattern in PATTERNS.items():
-            match = pattern.match(content)
+            match = pattern.match(content, pos)
             if match:
                 if pattern_name == "ifnotbool":
                     return self._handle_ifnotbool(content, match)
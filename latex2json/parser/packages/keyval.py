@@ -3,6 +3,7 @@ from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
 from latex2json.parser.handlers.base import TokenHandler
+from latex2json.parser.handlers.dispatch import pattern_prefixes
 from latex2json.utils.tex_utils import (
     extract_nested_content_sequence_blocks,
     substitute_args,
@@ -31,8 +32,11 @@ class KeyValHandler(TokenHandler):
         super().__init__(**kwargs)
         self.key_definitions: Dict[str, Dict[str, KeyDefinition]] = {}
 
-    def can_handle(self, content: str) -> bool:
-        return any(pattern.match(content) for pattern in PATTERNS.values())
+    def can_handle(self, content: str, pos: int = 0) -> bool:
+        return any(pattern.match(content, pos) for pattern in PATTERNS.values())
+
+    def triggers(self):
+        return pattern_prefixes(PATTERNS.values())
 
     def _handle_define_key_match(
         self, match: re.Match, content: str
@@ -129,10 +133,10 @@ class KeyValHandler(TokenHandler):
 
         return codeblocks
 
-    def _handle(self, content: str) -> Tuple[Optional[Dict], int]:
+    def _handle(self, content: str, pos: int = 0) -> Tuple[Optional[Dict], int]:
         """Handle keyval commands and return appropriate token"""
         for pattern_name, pattern in PATTERNS.items():
-            match = pattern.match(content)
+            match = pattern.match(content, pos)
             if match:
                 if pattern_name == "define_key":
                     return self._handle_define_key_match(match, content)
@@ -146,10 +150,10 @@ class KeyValHandler(TokenHandler):
         return None, 0
 
     def handle(
-        self, content: str, prev_token: Optional[Dict] = None
+        self, content: str, prev_token: Optional[Dict] = None, pos: int = 0
     ) -> Tuple[Optional[Dict], int]:
-        token, pos = self._handle(content)
-        return token, pos
+        token, end_pos = self._handle(content, pos)
+        return token, end_pos
 
     def process_keyval_definition(
         self, family: str, key: str, default: Optional[str], codeblock: Optional[str]
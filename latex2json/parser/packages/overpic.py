@@ -2,6 +2,7 @@ import re
 from typing import Callable, Dict, List, Optional, Tuple
 
 from latex2json.parser.handlers.base import TokenHandler
+from latex2json.parser.handlers.dispatch import pattern_prefixes
 from latex2json.parser.handlers.environment import (
     find_pattern_while_skipping_nested_envs,
 )
@@ -16,17 +17,22 @@ class OverpicHandler(TokenHandler):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-    def can_handle(self, content: str) -> bool:
-        return OVERPIC_PATTERN_START.match(content) is not None
+    def can_handle(self, content: str, pos: int = 0) -> bool:
+        return OVERPIC_PATTERN_START.match(content, pos) is not None
+
+    def triggers(self):
+        return pattern_prefixes([OVERPIC_PATTERN_START])
 
     def handle(
-        self, content: str, prev_token: Optional[Dict] = None
+        self, content: str, prev_token: Optional[Dict] = None, pos: int = 0
     ) -> Tuple[Optional[Dict], int]:
-        match = OVERPIC_PATTERN_START.match(content)
+        match = OVERPIC_PATTERN_START.match(content, pos)
         if not match:
             return None, 0
 
-        start_pos, end_pos, env_content = find_matching_env_block(content, "overpic")
+        start_pos, end_pos, env_content = find_matching_env_block(
+            content, "overpic", pos
+        )
 
         args, _ = extract_args(env_content, 1, 1)
         if args["req"]:
@@ -2,6 +2,7 @@ import re
 from typing import Callable, Dict, List, Optional, Tuple
 
 from latex2json.parser.handlers.base import TokenHandler
+from latex2json.parser.handlers.dispatch import pattern_prefixes
 from latex2json.parser.handlers.environment import (
     find_pattern_while_skipping_nested_envs,
 )
@@ -26,28 +27,31 @@ class TikzPGFHandler(TokenHandler):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-    def can_handle(self, content: str) -> bool:
-        return any(pattern.match(content) for pattern in PATTERNS.values())
+    def can_handle(self, content: str, pos: int = 0) -> bool:
+        return any(pattern.match(content, pos) for pattern in PATTERNS.values())
+
+    def triggers(self):
+        return pattern_prefixes(PATTERNS.values())
 
     def handle(
-        self, content: str, prev_token: Optional[Dict] = None
+        self, content: str, prev_token: Optional[Dict] = None, pos: int = 0
     ) -> Tuple[Optional[Dict], int]:
         for pattern_name, pattern in PATTERNS.items():
-            match = pattern.match(content)
+            match = pattern.match(content, pos)
             if match:
                 # If a \uselibrary command is found, just ignore it
                 if pattern_name == "uselibrary":
                     start_pos = match.end() - 1
-                    content, end_pos = extract_nested_content(content[start_pos:])
-                    return None, start_pos + end_pos
+                    content, end_pos = extract_nested_content(content, start=start_pos)
+                    return None, end_pos
                 elif pattern_name == "pgfplotsset":
                     start_pos = match.end() - 1
-                    content, end_pos = extract_nested_content(content[start_pos:])
-                    return None, start_pos + end_pos
+                    content, end_pos = extract_nested_content(content, start=start_pos)
+                    return None, end_pos
                 elif pattern_name == "begin_picture":
                     env_name = match.group(1)
                     start_pos, end_pos, inner_content = find_matching_env_block(
-                        content, env_name
+                        content, env_name, pos
                     )
                     return {
                         "type": "diagram",
@@ -2,6 +2,7 @@ import re
 from typing import Callable, Dict, List, Optional, Tuple
 
 from latex2json.parser.handlers.base import TokenHandler
+from latex2json.parser.handlers.dispatch import pattern_prefixes
 
 from latex2json.parser.patterns import OPTIONAL_BRACE_PATTERN, BRACE_CONTENT_PATTERN
 from latex2json.parser.handlers.environment import (
@@ -47,23 +48,26 @@ class TitlesecHandler(TokenHandler):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-    def can_handle(self, content: str) -> bool:
-        return any(pattern.match(content) for pattern in PATTERNS.values())
+    def can_handle(self, content: str, pos: int = 0) -> bool:
+        return any(pattern.match(content, pos) for pattern in PATTERNS.values())
+
+    def triggers(self):
+        return pattern_prefixes(PATTERNS.values())
 
     def handle(
-        self, content: str, prev_token: Optional[Dict] = None
+        self, content: str, prev_token: Optional[Dict] = None, pos: int = 0
     ) -> Tuple[Optional[Dict], int]:
         for pattern_name, pattern in PATTERNS.items():
-            match = pattern.match(content)
+            match = pattern.match(content, pos)
             if match:
                 start_pos = match.end() - 1
                 delimiters = DELIMITERS.get(pattern_name)
                 if delimiters:
                     # ignore?
                     args, end_pos = extract_delimited_args(
-                        content[start_pos:], delimiters
+                        content, delimiters, start_pos
                     )
-                    return None, start_pos + end_pos
+                    return None, end_pos
                 return None, start_pos
         return None, 0
 
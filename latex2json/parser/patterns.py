@@ -24,6 +24,29 @@ command_or_dim = rf"(?:[-+]?\s*{command_with_opt_brace_pattern}|{number_points_s
 DELIM_PATTERN = re.compile(
     r"(?<!\\)(?:\\\\|\$|%|(?:^|[ \t])\{|\s{|{}|\\\^|\\(?![$%&_#{}^~\\]))"
 )
+# longest text any delimiter alternative (incl. lookahead) needs to see
+DELIM_MATCH_WINDOW = 3
+
+
+def find_next_delimiter(
+    content: str, pos: int = 0, pattern: re.Pattern = DELIM_PATTERN
+) -> int:
+    """Find the offset of the next delimiter at or after pos, or -1 if there is none.
+
+    Behaves like pattern.search(content[pos:]) without copying the tail: the '^' and
+    escape lookbehind anchors treat pos as the start of input, so pos itself is checked
+    against a small window and the rest is searched in place.
+    """
+    if pattern.match(content[pos : pos + DELIM_MATCH_WINDOW]):
+        return pos
+    match = pattern.search(content, pos + 1)
+    return match.start() if match else -1
+
+
+# control word (\foo, \@foo) or run of backticks: a delimiter scan that finds nothing
+# to do at its start can step over it whole (no delimiter starts at a letter)
+CONTROL_SEQUENCE_PATTERN = re.compile(r"\\[a-zA-Z@]+|`+")
+
 
 DOCUMENTCLASS_PATTERN = re.compile(
     r"\\documentclass\s*%s\s*%s" % (OPTIONAL_BRACE_PATTERN, BRACE_CONTENT_PATTERN),
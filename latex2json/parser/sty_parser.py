@@ -1,6 +1,8 @@
 from collections import OrderedDict
+from dataclasses import astuple
+import marshal
 import re
-from typing import List, Dict, Tuple, Union
+from typing import List, Dict, Optional, Tuple, Union
 import sys, os
 
 
@@ -18,6 +20,7 @@ logging.basicConfig(
 from latex2json.parser.handlers import (
     IfElseBlockHandler,
 )
+from latex2json.utils.splice_buffer import SpliceBuffer
 from latex2json.utils.tex_utils import (
     extract_nested_content,
     read_tex_file_content,
@@ -26,15 +29,24 @@ from latex2json.utils.tex_utils import (
 from latex2json.parser.patterns import (
     USEPACKAGE_PATTERN,
     WHITELISTED_COMMANDS,
-    DELIM_PATTERN,
     LOADCLASS_PATTERN,
+    find_next_delimiter,
 )
 from latex2json.parser.handlers.command_manager import CommandManager
+from latex2json.utils.disk_cache import (
+    cache_key,
+    get_cache_dir,
+    load_cache,
+    package_code_key,
+    save_cache,
+)
 
 INCLUDE_PATTERN = re.compile(r"\\input\s*\{([^}]+)\}", re.DOTALL)
 
 AT_BEGIN_DOC_PATTERN = re.compile(r"\\AtBeginDocument\s*{", re.IGNORECASE)
 
+_CACHE_NAMESPACE = "sty_parser"
+
 
 class LatexStyParser:
     def __init__(self, logger: logging.Logger = None):
@@ -44,6 +56,13 @@ class LatexStyParser:
         self.current_file_dir = None
         self.parsed_files = set()
 
+        # names the parser state for the disk cache: "" when fresh, the cache key of
+        # the last file parsed since, None if unknown (e.g. after a parse() call)
+        self._state_key: Optional[str] = ""
+        # (path relative to the file dir, exists) of the files checked while parsing
+        # a file that may be cached, None if the result cannot be cached
+        self._file_checks: Optional[List[Tuple[str, bool]]] = None
+
         self.command_manager = CommandManager(
             command_types={"newif"},
             logger=self.logger,
@@ -54,12 +73,14 @@ class LatexStyParser:
     def clear(self):
         self.current_file_dir = None
         self.parsed_files.clear()
+        self._state_key = ""
+        self._file_checks = None
         self.if_else_block_handler.clear()
         self.command_manager.clear()
 
-    def _check_for_new_definitions(self, content: str):
-        """Check for new definitions in the content and process them"""
-        token, end_pos = self.command_manager.process_definition(content)
+    def _check_for_new_definitions(self, content: str, pos: int = 0):
+        """Check for new definitions in the content at pos and process them"""
+        token, end_pos = self.command_manager.process_definition(content, pos=pos)
         if token:
             cmd_name = token.get("name", "")
             if not cmd_name:
@@ -71,7 +92,7 @@ class LatexStyParser:
                 self.if_else_block_handler.process_newif(cmd_name)
 
             return token, end_pos
-        return None, 0
+        return None, pos
 
     def _parse_packages(self, package_names: list[str], extension=".sty") -> list[Dict]:
         tokens = []
@@ -81,41 +102,58 @@ class LatexStyParser:
                 package_path = os.path.join(self.current_file_dir, package_path)
             if not package_path.endswith(extension):
                 package_path += extension
-            if os.path.exists(package_path):
+            if self._check_file_exists(package_path, parsed=True):
                 tokens.extend(self.parse_file(package_path))
         return tokens
 
-    def _check_usepackage(self, content: str) -> Tuple[List[Dict], int]:
+    def _check_file_exists(self, file_path: str, parsed: bool = False) -> bool:
+        """os.path.exists, noted down as a dependency of the file being parsed"""
+        exists = os.path.exists(file_path)
+        if self._file_checks is not None:
+            try:
+                rel_path = os.path.relpath(file_path, self.current_file_dir)
+            except ValueError:  # e.g. on another drive
+                rel_path = None
+            if rel_path is None or (exists and parsed):
+                # the cache entry would depend on the contents of that file too
+                self._file_checks = None
+            else:
+                self._file_checks.append((rel_path, exists))
+        return exists
+
+    def _check_usepackage(self, content: str, pos: int = 0) -> Tuple[List[Dict], int]:
         """Check for usepackage commands and parse any found .sty files
 
         Returns:
             tuple: (list of tokens from sty files, end_position)
         """
-        match = USEPACKAGE_PATTERN.match(content) or INCLUDE_PATTERN.match(content)
+        match = USEPACKAGE_PATTERN.match(content, pos) or INCLUDE_PATTERN.match(
+            content, pos
+        )
         if match:
             package_names = match.group(1).strip()
             tokens = self._parse_packages(package_names.split(","))
             return tokens, match.end()
-        return [], 0
+        return [], pos
 
-    def _check_loadclass(self, content: str) -> Tuple[List[Dict], int]:
+    def _check_loadclass(self, content: str, pos: int = 0) -> Tuple[List[Dict], int]:
         r"""Check for \loadclass commands and parse any found .cls files
 
         Returns:
             tuple: (list of tokens from cls files, end_position)
         """
-        match = LOADCLASS_PATTERN.match(content)
+        match = LOADCLASS_PATTERN.match(content, pos)
         if match:
             class_names = match.group(1).strip()
             tokens = self._parse_packages(class_names.split(","), extension=".cls")
             return tokens, match.end()
-        return [], 0
+        return [], pos
 
     def _handle_if_else_block(self, content: str, current_pos: int) -> Tuple[str, int]:
         """Handle if-else blocks and return the processed content and new position"""
-        if self.if_else_block_handler.can_handle(content[current_pos:]):
-            token, end_pos = self.if_else_block_handler.handle(content[current_pos:])
-            if end_pos > 0:
+        if self.if_else_block_handler.can_handle(content, current_pos):
+            token, end_pos = self.if_else_block_handler.handle(content, pos=current_pos)
+            if end_pos > current_pos:
                 block = ""
                 if token:
                     typing = token.get("type", "")
@@ -131,9 +169,9 @@ class LatexStyParser:
                                 file_path = os.path.join(
                                     self.current_file_dir, file_path
                                 )
-                            if os.path.exists(file_path):
+                            if self._check_file_exists(file_path):
                                 block = token.get("if_content", "")
-                return block, current_pos + end_pos
+                return block, end_pos
         return None, current_pos
 
     def parse(
@@ -154,6 +192,8 @@ class LatexStyParser:
         Returns:
             List[Dict[str, str]]: List of parsed tokens
         """
+        # the state now depends on content, parse_file names it again if it can
+        self._state_key = None
         if file_path:
             self.current_file_dir = os.path.dirname(os.path.abspath(file_path))
 
@@ -162,6 +202,8 @@ class LatexStyParser:
 
         tokens = []
         current_pos = 0
+        # expansions are spliced in at current_pos; the buffer drops consumed text
+        buffer = SpliceBuffer(content, keep_consumed=False)
 
         while current_pos < len(content):
             # Skip whitespace
@@ -173,13 +215,15 @@ class LatexStyParser:
             # Add handling for bare braces at the start i.e. latex grouping {content here}
             if content[current_pos] == "{":
                 # Find matching closing brace
-                inner_content, end_pos = extract_nested_content(content[current_pos:])
+                inner_content, end_pos = extract_nested_content(
+                    content, start=current_pos
+                )
                 if inner_content is not None:
                     # Parse the content within the braces
                     nested_tokens = self.parse(inner_content)
                     if nested_tokens:
                         tokens.extend(nested_tokens)
-                    current_pos += end_pos
+                    current_pos = end_pos
                     continue
 
             # print(content[current_pos : current_pos + 20])
@@ -189,57 +233,49 @@ class LatexStyParser:
             # find the next delimiter (this block allows us to quickly identify and process chunks of text between special LaTeX delimiters
             # without it, we would have to parse the entire content string character by character. which would be slower.)
             # if next delimiter exists, we need to store the text before the next delimiter (or all remaining text if no delimiter)
-            next_delimiter = DELIM_PATTERN.search(content[current_pos:])
-            next_pos = (
-                len(content[current_pos:])
-                if not next_delimiter
-                else next_delimiter.start()
-            )
-            if next_pos > 0:
-                current_pos += next_pos
-                if not next_delimiter:
-                    break
+            delim_pos = find_next_delimiter(content, current_pos)
+            if delim_pos == -1:
+                break
+            if delim_pos > current_pos:
+                current_pos = delim_pos
                 continue
 
-            match = AT_BEGIN_DOC_PATTERN.match(content[current_pos:])
+            match = AT_BEGIN_DOC_PATTERN.match(content, current_pos)
             if match:
-                start_pos = current_pos + match.end() - 1
-                text, end_pos = extract_nested_content(content[start_pos:])
+                text, end_pos = extract_nested_content(content, start=match.end() - 1)
                 if text:
                     # replace the matched user command with the expanded text
                     text = text.strip()
-                    content = (
-                        content[:current_pos] + text + content[start_pos + end_pos :]
-                    )
+                    current_pos = buffer.splice(current_pos, end_pos, text)
+                    content = buffer.text
                     continue
 
             # check for user defined commands (important to check before new definitions in case of floating \csname)
-            if self.command_manager.can_handle(content[current_pos:]):
-                text, end_pos = self.command_manager.handle(content[current_pos:])
-                if end_pos > 0:
+            if self.command_manager.can_handle(content, current_pos):
+                text, end_pos = self.command_manager.handle(content, current_pos)
+                if end_pos > current_pos:
                     # replace the matched user command with the expanded text
-                    content = (
-                        content[:current_pos] + text + content[current_pos + end_pos :]
-                    )
+                    current_pos = buffer.splice(current_pos, end_pos, text)
+                    content = buffer.text
                     continue
 
-            new_tokens, end_pos = self._check_usepackage(content[current_pos:])
-            if end_pos > 0:
-                current_pos += end_pos
+            new_tokens, end_pos = self._check_usepackage(content, current_pos)
+            if end_pos > current_pos:
+                current_pos = end_pos
                 tokens.extend(new_tokens)
                 continue
 
             # Add check for loadclass
-            new_tokens, end_pos = self._check_loadclass(content[current_pos:])
-            if end_pos > 0:
-                current_pos += end_pos
+            new_tokens, end_pos = self._check_loadclass(content, current_pos)
+            if end_pos > current_pos:
+                current_pos = end_pos
                 tokens.extend(new_tokens)
                 continue
 
             # check for new definition commands
-            token, end_pos = self._check_for_new_definitions(content[current_pos:])
-            if end_pos > 0:
-                current_pos += end_pos
+            token, end_pos = self._check_for_new_definitions(content, current_pos)
+            if end_pos > current_pos:
+                current_pos = end_pos
                 if token:
                     tokens.append(token)
                 continue
@@ -247,7 +283,8 @@ class LatexStyParser:
             # check for if else blocks
             result, new_pos = self._handle_if_else_block(content, current_pos)
             if result is not None:
-                content = content[:current_pos] + result + content[new_pos:]
+                current_pos = buffer.splice(current_pos, new_pos, result)
+                content = buffer.text
                 continue
 
             current_pos += 1
@@ -269,20 +306,79 @@ class LatexStyParser:
             content = read_tex_file_content(file_path, extension=extension)
             self.parsed_files.add(file_path)
 
-            tokens = self.parse(content, file_path=file_path)
-
-            for token in tokens:
-                token["is_sty"] = True
+            key = self._get_cache_key(content)
+            tokens = self._load_cached(key, file_path)
+            if tokens is None:
+                self._file_checks = [] if key else None
+                known_keys = set(self._key_definitions())
+                tokens = self.parse(content, file_path=file_path)
+
+                for token in tokens:
+                    token["is_sty"] = True
+
+                if self._file_checks is None:
+                    key = None
+                else:
+                    key_definitions = [
+                        d for d in self._key_definitions() if d not in known_keys
+                    ]
+                    entry = (tokens, self._file_checks, key_definitions)
+                    save_cache(_CACHE_NAMESPACE, key, entry, serializer=marshal)
+                self._file_checks = None
+            self._state_key = key
 
             self.current_file_dir = current_file_dir
             self.logger.info(f"Finished parsing file: {file_path}")
             return tokens
         except Exception as e:
+            self._state_key = None
+            self._file_checks = None
             self.logger.error(
                 f"Failed to parse file: {file_path}, error: {str(e)}", exc_info=True
             )
             return []
 
+    def _get_cache_key(self, content: str) -> Optional[str]:
+        """Cache key for parsing content in the current state, None if not cached"""
+        if self._state_key is None or not get_cache_dir():
+            return None
+        return cache_key(package_code_key(), self._state_key, content)
+
+    def _load_cached(self, key: Optional[str], file_path: str) -> Optional[List[Dict]]:
+        """Tokens of a cached parse, restoring the parser state it left behind.
+
+        Entries are shared between documents (the same style file in another directory),
+        so the files checked while parsing have to be (missing) here as well.
+        """
+        if key is None:
+            return None
+        entry = load_cache(_CACHE_NAMESPACE, key, serializer=marshal)
+        if entry is None:
+            return None
+        tokens, file_checks, key_definitions = entry
+        file_dir = os.path.dirname(file_path)
+        for rel_path, exists in file_checks:
+            if os.path.exists(os.path.join(file_dir, rel_path)) != exists:
+                return None
+        self.logger.info(f"Using cached tokens for file: {file_path}")
+        # the \newifs and keyval keys are all the state a parse leaves behind
+        for token in tokens:
+            if token["type"] == "newif":
+                self.command_manager.register_command(token)
+                self.if_else_block_handler.process_newif(token["name"])
+        for definition in key_definitions:
+            self.command_manager.keyval_handler.process_keyval_definition(*definition)
+        return tokens
+
+    def _key_definitions(self) -> List[Tuple]:
+        """The keyval keys defined so far, as (family, key, default, codeblock)"""
+        key_definitions = self.command_manager.keyval_handler.key_definitions
+        return [
+            astuple(definition)
+            for definitions in key_definitions.values()
+            for definition in definitions.values()
+        ]
+
 
 if __name__ == "__main__":
     # More detailed logging configuration for direct script execution
@@ -1,6 +1,6 @@
 from collections import OrderedDict
 import re
-from typing import List, Dict, Tuple, Union
+from typing import List, Dict, Optional, Set, Tuple, Union
 import sys, os, traceback
 import logging
 
@@ -27,16 +27,27 @@ from latex2json.parser.handlers import (
     ForLoopHandler,
 )
 from latex2json.parser.handlers.environment import BaseEnvironmentHandler
+from latex2json.parser.handlers.dispatch import HandlerDispatchTable
 from latex2json.parser.handlers.command_manager import CommandManager
+from latex2json.utils.brace_index import IndexCache
+from latex2json.utils.splice_buffer import SpliceBuffer
 from latex2json.utils.tex_utils import (
     extract_nested_content,
     read_tex_file_content,
     strip_latex_comments,
+    is_comment_stripped,
+    collapse_whitespace,
+)
+from latex2json.parser.tex_preprocessor import (
+    DELIM_PATTERN_WITH_QUOTES,
+    VERBATIM_BLOCK_PATTERN,
+    LatexPreprocessor,
 )
-from latex2json.parser.tex_preprocessor import LatexPreprocessor
 from latex2json.parser.patterns import (
-    PATTERNS,
+    CONTROL_SEQUENCE_PATTERN,
     DELIM_PATTERN,
+    PATTERNS,
+    find_next_delimiter,
 )
 from latex2json.parser.packages import get_all_custom_handlers
 
@@ -44,11 +55,14 @@ UNKNOWN_COMMAND_PATTERN = re.compile(r"(\\[@a-zA-Z\*]+(?:\s*{)?)")
 
 
 class LatexParser:
-    def __init__(self, logger: logging.Logger = None):
+    def __init__(self, logger: logging.Logger = None, cited_bib_only: bool = False):
         # for logging
         self.logger = logger or logging.getLogger(__name__)
         self._unknown_commands = {}
 
+        # only keep (and parse) the bibliography entries that the document cites
+        self.cited_bib_only = cited_bib_only
+
         # state vars
         self.labels = {}
         self.current_env = (
@@ -60,6 +74,18 @@ class LatexParser:
         # color definitions via \definecolor
         self.colors = {}  # e.g. {"mycolor": {"format": "HTML", "value": "FF0000"}}
 
+        # keys of all citation tokens so far
+        self.cite_keys = set()
+
+        # brace/environment indexes of the texts being parsed
+        self.index_cache = IndexCache()
+
+        # (bibliography token, file path, file dir) resolved once the document is parsed
+        self._pending_bibliographies = []
+        self._parse_depth = 0
+        # preprocessing is done inside the parse loop (see parse(fused=True))
+        self._fused = False
+
         # Bib parser
         self.bib_parser = BibParser(logger=self.logger)
 
@@ -93,6 +119,7 @@ class LatexParser:
                     handle_legacy_formatting=False,
                 ),
                 cell_parser_fn=self.parse,
+                cells_parser_fn=self.parse_cells,
             ),
             # make sure to add EnvironmentHandler after equation/tabular or other env related formats, since it will greedily parse any begin/end block. Add as last to be safe
             self.env_handler,
@@ -103,10 +130,18 @@ class LatexParser:
             DiacriticsHandler(),
             # self.legacy_formatting_handler,
         ]
+        # routes each position to the handlers whose triggers it starts with (built on first use)
+        self._handler_table = None
 
         # Add preprocessor
         self.preprocessor = LatexPreprocessor(logger=self.logger)
 
+    @property
+    def handler_table(self) -> HandlerDispatchTable:
+        if self._handler_table is None:
+            self._handler_table = HandlerDispatchTable(self.handlers)
+        return self._handler_table
+
     # getter for commands
     @property
     def commands(self):
@@ -120,6 +155,8 @@ class LatexParser:
         self.labels = {}
         self._unknown_commands = {}
         self.colors = {}
+        self.cite_keys = set()
+        self._pending_bibliographies = []
         self.current_str = ""
         self.current_file_dir = None
         self.current_env = None
@@ -134,6 +171,7 @@ class LatexParser:
         self.preprocessor.clear()
         # bib parser
         self.bib_parser.clear()
+        self.index_cache.clear()
 
     def get_colors(self) -> Dict[str, Dict[str, str]]:
         return self.colors.copy()
@@ -215,10 +253,10 @@ class LatexParser:
 
             tokens.append(token_dict)
 
-    def _check_unknown_command(self, content: str) -> Tuple[bool, int]:
+    def _check_unknown_command(self, content: str, pos: int = 0) -> Tuple[bool, int]:
         """Convert unknown LaTeX command into a text token with original syntax"""
         # Get the full matched text to preserve all arguments
-        match = UNKNOWN_COMMAND_PATTERN.match(content)
+        match = UNKNOWN_COMMAND_PATTERN.match(content, pos)
         if match:
             command = match.group(0)
             end_pos = match.end()
@@ -227,10 +265,9 @@ class LatexParser:
             total_content = command
             if command.endswith("{"):
                 command = command[:-1]
-                inner_content, inner_end_pos = extract_nested_content(
-                    content[end_pos - 1 :]
+                inner_content, end_pos = extract_nested_content(
+                    content, start=end_pos - 1
                 )
-                end_pos += inner_end_pos - 1
                 total_content += inner_content + "}"
 
             expanded = self._expand_command(total_content)
@@ -280,9 +317,9 @@ class LatexParser:
             # Register the command with CommandManager
             self.command_manager.register_command(token)
 
-    def _check_for_new_definitions(self, content: str) -> None:
-        """Check for new definitions in the content and process them"""
-        token, end_pos = self.command_manager.process_definition(content)
+    def _check_for_new_definitions(self, content: str, pos: int = 0) -> int:
+        """Check for new definitions at pos and process them, returning the end offset"""
+        token, end_pos = self.command_manager.process_definition(content, pos=pos)
         if token:
             self._process_new_definition_token(token)
         return end_pos
@@ -290,7 +327,12 @@ class LatexParser:
     def _convert_bibentry_tokens(self, entry: BibTexEntry) -> Dict:
         content = entry.content
         if entry.format == "bibitem":
-            content = self.parse(content)
+            # bibliographies are not preprocessed, fused or not
+            fused_before, self._fused = self._fused, False
+            try:
+                content = self.parse(content)
+            finally:
+                self._fused = fused_before
         return {
             "type": "bibitem",
             "format": entry.format,
@@ -300,12 +342,15 @@ class LatexParser:
             "fields": entry.fields,
         }
 
-    def _parse_bib_file(self, file_path: str) -> Dict:
+    def _parse_bib_file(
+        self, file_path: str, cite_keys: Optional[Set[str]] = None
+    ) -> Dict:
         """Parse a bibliography file and return its contents as a token.
 
         Args:
             file_path: Path to the bibliography file (with or without extension)
                 Can be a comma-separated list of files like "references, another_references, ..."
+            cite_keys: Only the entries with one of these keys (all if None)
 
         Returns:
             Dict with bibliography token containing parsed contents
@@ -324,7 +369,7 @@ class LatexParser:
             )
 
             try:
-                entries = self.bib_parser.parse_file(full_path)
+                entries = self.bib_parser.parse_file(full_path, cite_keys)
                 all_tokens.extend(
                     [self._convert_bibentry_tokens(entry) for entry in entries]
                 )
@@ -344,6 +389,17 @@ class LatexParser:
 
         return {"type": "bibliography", "content": non_duplicate_tokens}
 
+    def _resolve_pending_bibliographies(self):
+        """Fill in the bibliography tokens left for the end, with the cited entries"""
+        pending, self._pending_bibliographies = self._pending_bibliographies, []
+        current_file_dir = self.current_file_dir
+        # \cite{*} stands for all entries
+        cite_keys = None if "*" in self.cite_keys else frozenset(self.cite_keys)
+        for token, file_path, file_dir in pending:
+            self.current_file_dir = file_dir
+            token.update(self._parse_bib_file(file_path, cite_keys))
+        self.current_file_dir = current_file_dir
+
     def _process_token(
         self, token: str | Dict | List[Dict], tokens: List[Dict], is_env_type=False
     ) -> None:
@@ -361,7 +417,12 @@ class LatexParser:
                         self._convert_bibentry_tokens(entry) for entry in entries
                     ]
             elif token["type"] == "bibliography_file":
-                if token["content"]:
+                if token["content"] and self.cited_bib_only:
+                    # citations may still follow, the entries are filled in at the end
+                    pending = (token["content"], self.current_file_dir)
+                    token = {"type": "bibliography", "content": []}
+                    self._pending_bibliographies.append((token, *pending))
+                elif token["content"]:
                     token = self._parse_bib_file(token["content"])
             elif token["type"] == "input_file":
                 # open input file
@@ -387,6 +448,7 @@ class LatexParser:
                 if "title" in token:
                     token["title"] = self.parse(token["title"])
             elif token["type"] == "citation":
+                self.cite_keys.update(token["content"])
                 if "title" in token:
                     token["title"] = self.parse(token["title"])
             elif token["type"] == "title":
@@ -413,31 +475,37 @@ class LatexParser:
 
         self.add_token(token, tokens)
 
-    def _check_handlers(self, content: str, tokens: List[Dict]) -> Tuple[bool, int]:
-        """Process content through available handlers.
+    def _check_handlers(
+        self, content: str, tokens: List[Dict], pos: int = 0
+    ) -> Tuple[bool, int]:
+        """Process content at pos through available handlers.
 
         Returns:
             Tuple[bool, int]: (whether content was matched, new position)
         """
-        for handler in self.handlers:
-            if handler.can_handle(content):
+        for handler in self.handler_table.candidates(content, pos):
+            if handler.can_handle(content, pos):
                 prev_token = tokens[-1] if tokens else None
-                token, end_pos = handler.handle(content, prev_token)
+                token, end_pos = handler.handle(content, prev_token, pos=pos)
                 if token:
                     self._process_token(
                         token,
                         tokens,
                         is_env_type=isinstance(handler, BaseEnvironmentHandler),
                     )
-                return True, end_pos
-        return False, 0
+                return True, max(end_pos, pos)
+        return False, pos
 
     def _check_remaining_patterns(
-        self, content: str, tokens: List[Dict], line_break_delimiter: str = "\n"
+        self,
+        content: str,
+        tokens: List[Dict],
+        line_break_delimiter: str = "\n",
+        pos: int = 0,
     ) -> Tuple[bool, int]:
         # Try each pattern
         for pattern_type, pattern in PATTERNS.items():
-            match = re.match(pattern, content)
+            match = pattern.match(content, pos)
             if match:
                 matched_type = pattern_type
                 break
@@ -445,10 +513,10 @@ class LatexParser:
         if match:
             if matched_type == "label":
                 start_pos = match.end() - 1  # -1 to account for the label command '{'
-                label, end_pos = extract_nested_content(content[start_pos:])
+                label, end_pos = extract_nested_content(content, start=start_pos)
                 if label:
                     self._handle_label(label, tokens)
-                return True, start_pos + end_pos
+                return True, end_pos
             elif matched_type == "newline":
                 self.add_token("\n", tokens)
             elif matched_type == "break_spacing":
@@ -463,7 +531,7 @@ class LatexParser:
 
             return True, match.end()
 
-        return False, 0
+        return False, pos
 
     def parse(
         self,
@@ -472,8 +540,9 @@ class LatexParser:
         handle_unknown_commands: bool = True,
         handle_legacy_formatting: bool = True,
         preprocess: bool = False,
+        fused: bool = False,
     ) -> List[Dict]:
-        """
+        r"""
         Parse LaTeX content string into tokens.
 
         Args:
@@ -482,22 +551,82 @@ class LatexParser:
             handle_unknown_commands: Whether to process unknown commands
             handle_legacy_formatting: Whether to handle legacy formatting
             file_path: Optional path to the source file (used for resolving relative paths)
+            preprocess: Whether to preprocess the content first (see LatexPreprocessor)
+            fused: With preprocess, do the preprocessing inside the parse loop instead
+                of as a separate pass over the content, rewriting each part as a pass
+                would have by the time the parser gets to it. The tokens are those of
+                the two-pass result, except where a pass goes wrong in a way that the
+                parse loop does not follow:
+                - a pass takes the $ after \\ for an escaped one, and so takes the math
+                  that follows for text (and the other way round) up to the next
+                  unpaired $, where the parse loop goes on with the math as it is
+                - a pass glues a control word onto the letters of a rewrite right after
+                  it (e.g. \small\ifflag T\fi gives \smallT), which the parse loop only
+                  does for the control word right before the rewrite, not for a run of
+                  them (\small\small\ifflag T\fi) or across whitespace
 
         Returns:
             List[Dict[str, str]]: List of parsed tokens
         """
+        fused_before = self._fused
+        if preprocess:
+            # also applies to everything parsed out of this content
+            self._fused = fused
+        self._parse_depth += 1
+        try:
+            with self.index_cache.use():
+                tokens = self._parse(
+                    content,
+                    line_break_delimiter,
+                    handle_unknown_commands,
+                    handle_legacy_formatting,
+                    preprocess,
+                )
+        finally:
+            self._parse_depth -= 1
+            self._fused = fused_before
+        # the outermost parse has seen all citations of the document
+        if self._parse_depth == 0 and self._pending_bibliographies:
+            self._resolve_pending_bibliographies()
+        return tokens
+
+    def _parse(
+        self,
+        content: str,
+        line_break_delimiter: str = "\n",
+        handle_unknown_commands: bool = True,
+        handle_legacy_formatting: bool = True,
+        preprocess: bool = False,
+    ) -> List[Dict]:
         if not isinstance(content, str):
             return content
 
         content = strip_latex_comments(content)
 
+        fused_content = self._fused
         if preprocess:
-            content = self.preprocess(content)
+            if fused_content:
+                content = self._start_fused_preprocess(content)
+            else:
+                content = self.preprocess(content)
 
         tokens = []
         current_pos = 0
+        # expansions are spliced in at current_pos; the buffer drops consumed text
+        buffer = SpliceBuffer(content, keep_consumed=False)
+        # when fused, content before raw_end is the expansion of a command that a
+        # preprocessing pass leaves to the parser, so it is not preprocessed here either
+        raw_end = 0
+        # delimiter last found to need no fused rewrite (saves checking it twice)
+        rewrite_checked_pos = -1
 
         while current_pos < len(content):
+            # only good until the next splice, which the text branch does not do
+            checked_pos, rewrite_checked_pos = rewrite_checked_pos, -1
+            fused = fused_content and current_pos >= raw_end
+            # applies to everything parsed out of the content here too
+            self._fused = fused
+
             # Skip whitespace
             while current_pos < len(content) and content[current_pos].isspace():
                 self.current_str += content[current_pos]
@@ -508,33 +637,59 @@ class LatexParser:
             # Add handling for bare braces at the start i.e. latex grouping {content here}
             if content[current_pos] == "{":
                 # Find matching closing brace
-                inner_content, end_pos = extract_nested_content(content[current_pos:])
+                inner_content, end_pos = extract_nested_content(
+                    content, start=current_pos
+                )
                 if inner_content is not None:
                     # Parse the content within the braces
                     nested_tokens = self.parse(inner_content)
                     if nested_tokens:
                         for token in nested_tokens:
                             self.add_token(token, tokens)
-                    current_pos += end_pos
+                    current_pos = end_pos
                     continue
 
             # find the next delimiter (this block allows us to quickly identify and process chunks of text between special LaTeX delimiters
             # without it, we would have to parse the entire content string character by character. which would be slower.)
             # if next delimiter exists, we need to store the text before the next delimiter (or all remaining text if no delimiter)
-            next_delimiter = DELIM_PATTERN.search(content[current_pos:])
-            next_pos = (
-                len(content[current_pos:])
-                if not next_delimiter
-                else next_delimiter.start()
+            # NOTE: all positions below are offsets into content; handlers are given pos instead of a content[current_pos:] copy
+            delim_pos = self._find_next_delimiter(
+                content, current_pos, raw_end if fused_content else None
             )
-            if next_pos > 0:
+            # rewrite the delimiters ending the text first, so that the text runs on
+            # into the rewritten part as it would in the preprocessed content
+            while fused_content and delim_pos > current_pos and delim_pos >= raw_end:
+                text, end_pos = self._fused_rewrite_at(content, delim_pos)
+                if text is None:
+                    rewrite_checked_pos = delim_pos
+                    break
+                text = content[current_pos:delim_pos] + text
+                start = current_pos
+                current_pos = buffer.splice(current_pos, end_pos, text)
+                content = buffer.text
+                raw_end += current_pos - start
+                delim_pos = self._find_next_delimiter(content, current_pos, raw_end)
+            next_pos = len(content) if delim_pos == -1 else delim_pos
+            if next_pos > current_pos:
                 # convert text before next delimiter to tokens
-                text = content[current_pos : current_pos + next_pos]
+                text = content[current_pos:next_pos]
                 if text:
                     # skip delimited braces for next pass
                     if text.endswith("{"):
                         text = text[:-1]
                         next_pos -= 1
+                    if fused_content and next_pos > raw_end:
+                        raw = max(0, raw_end - current_pos)
+                        rest = collapse_whitespace(text[raw:])
+                        # preprocessed text would end there without the whitespace:
+                        # it is merged into a whitespace delimiter or trimmed at the end
+                        if (
+                            content[delim_pos].isspace()
+                            if delim_pos != -1
+                            else preprocess
+                        ):
+                            rest = rest.rstrip()
+                        text = text[:raw] + rest
                     if handle_unknown_commands:
                         text = self._expand_command(text)
                     # check if preceding text is a space
@@ -542,82 +697,186 @@ class LatexParser:
                     if current_pos > 0 and content[current_pos - 1].isspace():
                         add_space = True
                     self.add_token(text, tokens, add_space)
-                current_pos += next_pos
-                if not next_delimiter:
+                current_pos = next_pos
+                if delim_pos == -1:
                     break
                 continue
 
+            if fused:
+                text = None
+                if current_pos != checked_pos:
+                    text, end_pos = self._fused_rewrite_at(content, current_pos)
+                if text is None:
+                    # the pass goes on right after a control word that it leaves, so
+                    # what follows is rewritten before the parser takes the control
+                    # word (a rewrite starting with a letter even runs on into it)
+                    match = CONTROL_SEQUENCE_PATTERN.match(content, current_pos)
+                    if match and match.end() == find_next_delimiter(
+                        content, match.end() - 1, DELIM_PATTERN_WITH_QUOTES
+                    ):
+                        text, end_pos = self._fused_rewrite_at(content, match.end())
+                        if text is not None:
+                            text = match.group() + text
+                            rewrite_checked_pos = current_pos
+                if text is not None:
+                    start = current_pos
+                    current_pos = buffer.splice(current_pos, end_pos, text)
+                    content = buffer.text
+                    raw_end += current_pos - start
+                    if rewrite_checked_pos == start:
+                        rewrite_checked_pos = current_pos
+                    continue
+                match = VERBATIM_BLOCK_PATTERN.match(content, current_pos)
+                if match:
+                    # a pass goes through verbatim as well, keeping only its whitespace
+                    block = self._fused_preprocess_call(match.group())
+                    current_pos = buffer.splice(current_pos, match.end(), block)
+                    content = buffer.text
+                    raw_end = current_pos + len(block)
+                    continue
+
             # check for user defined commands (important to check before new definitions in case of floating \csname)
-            if self.command_manager.can_handle(content[current_pos:]):
-                text, end_pos = self.command_manager.handle(content[current_pos:])
-                if end_pos > 0:
+            if self.command_manager.can_handle(content, current_pos):
+                text, end_pos = self.command_manager.handle(content, current_pos)
+                if end_pos > current_pos and fused:
+                    # a preprocessing pass has been through the arguments by now
+                    call = content[current_pos:end_pos]
+                    preprocessed = self._fused_preprocess_call(call)
+                    if preprocessed != call:
+                        start = current_pos
+                        current_pos = buffer.splice(current_pos, end_pos, preprocessed)
+                        content = buffer.text
+                        raw_end += current_pos - start
+                        text, end_pos = self.command_manager.handle(
+                            content, current_pos
+                        )
+                    # and on past the call, which the expansion can run on into
+                    while end_pos > current_pos:
+                        rewritten, rewrite_end = self._fused_rewrite_at(
+                            content, end_pos
+                        )
+                        if rewritten is None:
+                            break
+                        call = content[current_pos:end_pos] + rewritten
+                        start = current_pos
+                        current_pos = buffer.splice(current_pos, rewrite_end, call)
+                        content = buffer.text
+                        raw_end += current_pos - start
+                        text, end_pos = self.command_manager.handle(
+                            content, current_pos
+                        )
+                if end_pos > current_pos:
                     # replace the matched user command with the expanded text
-                    content = (
-                        content[:current_pos] + text + content[current_pos + end_pos :]
-                    )
+                    current_pos = buffer.splice(current_pos, end_pos, text)
+                    content = buffer.text
+                    raw_end = current_pos + len(text) + max(0, raw_end - end_pos)
                     continue
 
             # check for new definition commands
-            end_pos = self._check_for_new_definitions(content[current_pos:])
-            if end_pos > 0:
-                current_pos += end_pos
+            end_pos = self._check_for_new_definitions(content, current_pos)
+            if end_pos > current_pos:
+                current_pos = end_pos
                 continue
 
             # check for if else blocks
-            if self.if_else_block_handler.can_handle(content[current_pos:]):
+            if self.if_else_block_handler.can_handle(content, current_pos):
                 token, end_pos = self.if_else_block_handler.handle(
-                    content[current_pos:]
+                    content, pos=current_pos
                 )
-                if end_pos > 0:
+                if end_pos > current_pos:
                     block = ""
                     if token:
                         block = token.get("if_content", "")
-                    content = (
-                        content[:current_pos] + block + content[current_pos + end_pos :]
-                    )
+                    current_pos = buffer.splice(current_pos, end_pos, block)
+                    content = buffer.text
+                    raw_end = current_pos + len(block) + max(0, raw_end - end_pos)
                     continue
 
             # check if legacy formatting
             if handle_legacy_formatting and self.legacy_formatting_handler.can_handle(
-                content[current_pos:]
+                content, current_pos
             ):
                 parsed_text, end_pos = self.legacy_formatting_handler.handle(
-                    content[current_pos:]
+                    content, pos=current_pos
                 )
-                if end_pos > 0:
-                    content = (
-                        content[:current_pos]
-                        + parsed_text
-                        + content[current_pos + end_pos :]
-                    )
+                walk_pos = max(current_pos, raw_end)
+                if fused_content and end_pos > walk_pos:
+                    # a preprocessing pass has been through what it applies to by now
+                    rest = content[walk_pos:end_pos]
+                    preprocessed = self._fused_preprocess_call(rest)
+                    if preprocess and end_pos == len(content):
+                        preprocessed = preprocessed.rstrip()
+                    if preprocessed != rest:
+                        call = content[current_pos:walk_pos] + preprocessed
+                        start = current_pos
+                        current_pos = buffer.splice(current_pos, end_pos, call)
+                        content = buffer.text
+                        raw_end += current_pos - start
+                        parsed_text, end_pos = self.legacy_formatting_handler.handle(
+                            content, pos=current_pos
+                        )
+                if end_pos > current_pos:
+                    current_pos = buffer.splice(current_pos, end_pos, parsed_text)
+                    content = buffer.text
+                    # all raw now, the part that was not is preprocessed above
+                    raw_end = current_pos + len(parsed_text) + max(0, raw_end - end_pos)
+                    continue
+
+            if fused and self.env_handler.can_handle(content, current_pos):
+                matched, env = BaseEnvironmentHandler.try_match_env(
+                    content, pos=current_pos
+                )
+                env_processor = self.env_handler.environment_processor
+                if matched and env_processor.has_environment(env["name"]):
+                    # a user environment expands around its content, which a pass has
+                    # preprocessed by then, so the expansion is parsed as it is
+                    end_pos = env["end_pos"]
+                    block = self._fused_preprocess_call(content[current_pos:end_pos])
+                    if preprocess and end_pos == len(content):
+                        block = block.rstrip()
+                    current_pos = buffer.splice(current_pos, end_pos, block)
+                    content = buffer.text
+                    raw_end = current_pos + len(block)
                     continue
 
             # try each handler
-            matched, end_pos = self._check_handlers(content[current_pos:], tokens)
-            current_pos += end_pos
+            matched, current_pos = self._check_handlers(content, tokens, current_pos)
             if matched:
                 continue
 
             # check remaining patterns
-            matched, end_pos = self._check_remaining_patterns(
-                content[current_pos:], tokens, line_break_delimiter
+            matched, current_pos = self._check_remaining_patterns(
+                content, tokens, line_break_delimiter, current_pos
             )
-            current_pos += end_pos
             if matched:
                 continue
 
             # check for unknown command
             if handle_unknown_commands:
-                token, end_pos = self._check_unknown_command(content[current_pos:])
-                current_pos += end_pos
+                token, end_pos = self._check_unknown_command(content, current_pos)
+                args_pos = content.find("{", current_pos, end_pos) if token else -1
+                if fused and args_pos != -1:
+                    # the token keeps its arguments as text, preprocessed in a pass
+                    args = content[args_pos:end_pos]
+                    preprocessed = self._fused_preprocess_call(args)
+                    if preprocessed != args:
+                        call = content[current_pos:args_pos] + preprocessed
+                        start = current_pos
+                        current_pos = buffer.splice(current_pos, end_pos, call)
+                        content = buffer.text
+                        raw_end += current_pos - start
+                        token, end_pos = self._check_unknown_command(
+                            content, current_pos
+                        )
                 if token:
+                    pos = current_pos
+                    current_pos = end_pos
                     self.add_token(token, tokens)
                     if token["type"] == "command":
                         cmd_name = token["command"]
                         if cmd_name not in self._unknown_commands:
                             self._unknown_commands[cmd_name] = token
 
-                            pos = current_pos - end_pos
                             surrounding_content = (
                                 content[max(0, pos - 100) : pos]
                                 + "-->"
@@ -637,6 +896,31 @@ class LatexParser:
 
         return tokens
 
+    def parse_cells(self, contents: List[str]) -> List[List[Dict]]:
+        """Parse the cells of a table in one call, in order (same as parse on each).
+
+        Plain text cells (numbers etc, most cells of a large results table) would only
+        become one text token of their expanded text, so they skip the parse loop.
+        """
+        out = []
+        delim_pattern = DELIM_PATTERN_WITH_QUOTES if self._fused else DELIM_PATTERN
+        for content in contents:
+            if (
+                content
+                and not content[0].isspace()
+                and "{" not in content
+                and find_next_delimiter(content, 0, delim_pattern) == -1
+                and is_comment_stripped(content)
+            ):
+                text = content
+                if self._fused:
+                    text = collapse_whitespace(text)
+                text = self._expand_command(text)
+                out.append([{"type": "text", "content": text}] if text else [])
+            else:
+                out.append(self.parse(content))
+        return out
+
     def preprocess(self, content: str) -> str:
         # Preprocess content before parsing
         content, definition_tokens = self.preprocessor.preprocess(
@@ -649,8 +933,50 @@ class LatexParser:
 
         return content
 
+    def _find_next_delimiter(
+        self, content: str, pos: int, raw_end: Optional[int]
+    ) -> int:
+        """find_next_delimiter for the parse loop. raw_end is None if the content is not
+        preprocessed in the loop (fused), else quotes are delimiters from raw_end on.
+        """
+        if raw_end is None:
+            return find_next_delimiter(content, pos, DELIM_PATTERN)
+        if pos >= raw_end:
+            return find_next_delimiter(content, pos, DELIM_PATTERN_WITH_QUOTES)
+        delim_pos = find_next_delimiter(content, pos, DELIM_PATTERN)
+        end = len(content) if delim_pos == -1 else delim_pos
+        quote_pos = content.find("`", raw_end, end) if end > raw_end else -1
+        return delim_pos if quote_pos == -1 else quote_pos
+
+    def _fused_preprocess_call(self, content: str) -> str:
+        """Preprocess a part that the parser takes as a whole in a fused parse"""
+        content, definition_tokens = self.preprocessor.preprocess_call(
+            content, self.current_file_dir
+        )
+        for token in definition_tokens:
+            self._process_new_definition_token(token)
+        return content
+
+    def _fused_rewrite_at(self, content: str, pos: int) -> tuple[Optional[str], int]:
+        """Apply the preprocessing rewrite at pos for a fused parse (see rewrite_at)"""
+        text, end_pos, definition_tokens = self.preprocessor.rewrite_at(
+            content, pos, self.current_file_dir
+        )
+        for token in definition_tokens:
+            self._process_new_definition_token(token)
+        return text, end_pos
+
+    def _start_fused_preprocess(self, content: str) -> str:
+        """The part of preprocessing done before the fused parse loop (documentclass)"""
+        content, definition_tokens = self.preprocessor.split_documentclass(
+            content, self.current_file_dir
+        )
+        for token in definition_tokens:
+            self._process_new_definition_token(token)
+        return content.strip()
+
     def parse_file(
-        self, file_path: str, extension: str = ".tex"
+        self, file_path: str, extension: str = ".tex", fused: bool = False
     ) -> List[Dict[str, str]]:
         """
         Parse a LaTeX file directly from the file path.
@@ -658,6 +984,8 @@ class LatexParser:
         Args:
             file_path: Path to the LaTeX file to parse
             extension: File extension to try if not found (default: .tex)
+            fused: Preprocess inside the parse loop instead of in a separate pass
+                (see parse), files input by the document are parsed the same way
 
         Returns:
             List[Dict[str, str]]: List of parsed tokens
@@ -676,7 +1004,15 @@ class LatexParser:
                 return []
 
             preprocess = should_preprocess_file(file_path)
-            out = self.parse(content, preprocess=preprocess)
+            if preprocess:
+                out = self.parse(content, preprocess=True, fused=fused or self._fused)
+            else:
+                # not preprocessed in either mode
+                fused_before, self._fused = self._fused, False
+                try:
+                    out = self.parse(content)
+                finally:
+                    self._fused = fused_before
             self.logger.info(f"Finished parsing file: {file_path}")
             return out
         except Exception as e:
@@ -1,7 +1,7 @@
 import re
 import sys, os
 import logging
-from typing import Dict
+from typing import Dict, Optional
 
 from latex2json.parser.handlers.formatting import FormattingHandler
 from latex2json.parser.handlers.if_else_statements import IfElseBlockHandler
@@ -10,6 +10,8 @@ from latex2json.parser.patterns import (
     WHITELISTED_COMMANDS,
     DELIM_PATTERN,
     DOCUMENTCLASS_PATTERN,
+    CONTROL_SEQUENCE_PATTERN,
+    find_next_delimiter,
 )
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -19,15 +21,16 @@ from latex2json.parser.handlers.code_block import PATTERNS as VERBATIM_PATTERNS
 from latex2json.parser.handlers import (
     EquationHandler,
 )
+from latex2json.utils.splice_buffer import SpliceBuffer
 from latex2json.utils.tex_utils import (
     check_string_has_hash_number,
     strip_latex_comments,
     normalize_whitespace_and_lines,
+    collapse_whitespace,
 )
 from latex2json.parser.sty_parser import LatexStyParser
 from latex2json.parser.handlers.command_manager import CommandManager
 
-
 ADD_TO_PATTERN = re.compile(r"\\addto\s*(?:{?\\[^}\s]+}?)\s*\{")  # e.g. \addto\cmd{...}
 
 ALL_VERBATIM_PATTERNS = list(VERBATIM_PATTERNS.values())
@@ -43,6 +46,71 @@ ALL_VERBATIM_PATTERNS.append(
     )
 )
 
+
+def _shift_backreferences(pattern: str, offset: int) -> str:
+    r"""Renumber the \1 style backreferences of pattern by offset.
+
+    Only single digit backreferences outside of [...] sets are supported, anything
+    that reads differently once renumbered (\10, \0 octal escapes, \1 in a set)
+    raises ValueError.
+    """
+    out = []
+    i = 0
+    in_set = False
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern):
+            escaped = pattern[i + 1]
+            if escaped.isdigit():
+                if in_set or escaped == "0" or pattern[i + 2 : i + 3].isdigit():
+                    raise ValueError(f"Unsupported escape \\{escaped} in {pattern!r}")
+                escaped = str(int(escaped) + offset)
+            out.append("\\" + escaped)
+            i += 2
+            continue
+        if in_set:
+            # a ] right after the opening [ (or [^) is a literal
+            if char == "]" and i > set_start:
+                in_set = False
+        elif char == "[":
+            in_set = True
+            set_start = i + 1
+            if pattern[i + 1 : i + 2] == "^":
+                set_start += 1
+        out.append(char)
+        i += 1
+    return "".join(out)
+
+
+# flags that a combined pattern keeps per alternative (str patterns are always UNICODE)
+_COMBINABLE_FLAGS = re.DOTALL | re.UNICODE
+
+
+def _combine_patterns(patterns: list[re.Pattern]) -> re.Pattern:
+    """One alternation of the patterns, matching where the earliest of them matches.
+
+    At the same position the first pattern in the list wins, as the alternation tries
+    them in order. Each pattern keeps its own DOTALL flag; other flags and named groups
+    (which would clash between alternatives) raise ValueError.
+    """
+    alternatives = []
+    groups = 0
+    for pattern in patterns:
+        if pattern.flags & ~_COMBINABLE_FLAGS:
+            raise ValueError(f"Cannot combine the flags of {pattern.pattern!r}")
+        if pattern.groupindex:
+            raise ValueError(f"Cannot combine the named groups of {pattern.pattern!r}")
+        flag = "s" if pattern.flags & re.DOTALL else "-s"
+        alternatives.append(
+            "(?%s:%s)" % (flag, _shift_backreferences(pattern.pattern, groups))
+        )
+        groups += pattern.groups
+    return re.compile("|".join(alternatives))
+
+
+# every verbatim block in a single forward scan
+VERBATIM_BLOCK_PATTERN = _combine_patterns(ALL_VERBATIM_PATTERNS)
+
 DELIM_PATTERN_WITH_QUOTES = re.compile(DELIM_PATTERN.pattern + r"|`")
 
 QUOTE_PATTERNS = {
@@ -54,14 +122,58 @@ QUOTE_PATTERNS = {
     ),  # latex quotes e.g. `aaa' -> 'aaa'
 }
 
+# rules tried in turn at each delimiter, see LatexPreprocessor.rule_stats
+PREPROCESS_RULES = (
+    "add_to",
+    "equation",
+    "quotes",
+    "definitions",
+    "usepackage",
+    "formatting",
+    "commands",
+    "if_else",
+)
+
+
+def _empty_rule_stats() -> Dict[str, Dict[str, int]]:
+    return {rule: {"hit": 0, "miss": 0} for rule in PREPROCESS_RULES}
+
+
+# placeholders of the math and verbatim blocks taken out while preprocessing
+MATH_BLOCK_PLACEHOLDER = "__MATH_BLOCK_%d__"
+VERBATIM_BLOCK_PLACEHOLDER = "__VERBATIM_BLOCK__%d__"
+PLACEHOLDER_PATTERN = re.compile(r"__(?:MATH_BLOCK_|VERBATIM_BLOCK__)\d+__")
+
 
 def restore_placeholder_blocks(content: str, blocks: dict) -> str:
     """
     Restores the blocks in the content by replacing placeholders with the original blocks.
+
+    Same result as replacing each placeholder in turn (a block holding a placeholder
+    of a later block gets that one restored too), in a single scan over content.
     """
-    for placeholder, block in blocks.items():
-        content = content.replace(placeholder, block)
-    return content
+    if not blocks:
+        return content
+    if not all(PLACEHOLDER_PATTERN.fullmatch(placeholder) for placeholder in blocks):
+        for placeholder, block in blocks.items():
+            content = content.replace(placeholder, block)
+        return content
+
+    order = {placeholder: index for index, placeholder in enumerate(blocks)}
+    restored = {}
+
+    def restore(text: str, after: int) -> str:
+        return PLACEHOLDER_PATTERN.sub(lambda m: replace(m.group(0), after), text)
+
+    def replace(placeholder: str, after: int) -> str:
+        index = order.get(placeholder)
+        if index is None or index <= after:
+            return placeholder
+        if placeholder not in restored:
+            restored[placeholder] = restore(blocks[placeholder], index)
+        return restored[placeholder]
+
+    return restore(content, -1)
 
 
 class LatexPreprocessor:
@@ -76,10 +188,14 @@ class LatexPreprocessor:
         # added equation handler to parse out math mode
         self.equation_handler = EquationHandler()
 
+        # rule -> {"hit": n, "miss": n}, how often each rule applied (or not) at a delimiter
+        self.rule_stats = _empty_rule_stats()
+
     def clear(self):
         self.if_else_block_handler.clear()
         self.command_manager.clear()
         self.sty_parser.clear()
+        self.rule_stats = _empty_rule_stats()
 
     def preprocess(self, content: str, file_dir=None) -> tuple[str, list[Dict]]:
         """Main preprocessing pipeline
@@ -101,13 +217,25 @@ class LatexPreprocessor:
 
         # 4. After all expansions, normalize whitespace and lines
         # But make sure to not normalize verbatim environments (VERBATIM_PATTERNS)
-        # so we first need to find all verbatim environments, extract them out, normalize the rest, then put the verbatim environments back in
-        content, verbatim_blocks = self._extract_verbatim_blocks(content)
-        content = normalize_whitespace_and_lines(content)
-        content = restore_placeholder_blocks(content, verbatim_blocks)
+        # so we first need to find all verbatim environments, and normalize the text around them
+        verbatim_spans = self._find_verbatim_spans(content)
+        content = normalize_whitespace_and_lines(content, verbatim_spans)
 
         return content, out_tokens
 
+    def preprocess_call(self, content: str, file_dir=None) -> tuple[str, list[Dict]]:
+        """Preprocess a part of the content that the parser is about to take as a whole
+        in a fused preprocess (e.g. a command call and its arguments), as the
+        preprocessing pass would have. Whitespace at either end is not stripped.
+
+        Returns:
+            tuple: (processed_content, list of definition tokens)
+        """
+        content, tokens = self._process_definitions_and_expand(content, file_dir)
+        verbatim_spans = self._find_verbatim_spans(content)
+        content = normalize_whitespace_and_lines(content, verbatim_spans, strip=False)
+        return content, tokens
+
     def _process_new_definition_token(self, token: Dict) -> None:
         if token and "name" in token:
             # do not process content commands e.g. section etc
@@ -130,6 +258,110 @@ class LatexPreprocessor:
 
             self.command_manager.register_command(token)
 
+    def split_documentclass(
+        self, content: str, file_dir: str = None
+    ) -> tuple[str, list[Dict]]:
+        """First step of a fused (single pass) preprocess, done by LatexParser in its
+        parse loop: strip comments and parse the documentclass. The definition tokens
+        are returned for the caller to register as well.
+
+        Returns:
+            tuple: (content after the documentclass, list of tokens from the cls file)
+        """
+        content = strip_latex_comments(content)
+        end_pos, tokens = self._check_documentclass(content, file_dir)
+        return content[end_pos:], tokens
+
+    def rewrite_at(
+        self, content: str, pos: int, file_dir: str = None
+    ) -> tuple[Optional[str], int, list[Dict]]:
+        r"""The preprocessing rules at pos, for a fused preprocess in the parse loop.
+
+        Same rules in the same order as the preprocessing pass, except for math (see
+        below). Definitions that take arguments are left to the parser, which registers
+        them as it does after a preprocessing pass.
+
+        Returns:
+            tuple: (replacement or None if no rule applies, end_position,
+                list of definition tokens, left for the caller to register)
+        """
+        stats = self.rule_stats
+
+        match = ADD_TO_PATTERN.match(content, pos)
+        if match:
+            stats["add_to"]["hit"] += 1
+            return "", match.end() - 1, []
+        stats["add_to"]["miss"] += 1
+
+        # math is left as it is, only its whitespace is collapsed as a preprocess pass
+        # does (the parser's EquationHandler takes the block next)
+        if self.equation_handler.can_handle(content, pos):
+            end_pos = self.equation_handler.find_end(content, pos)
+            if end_pos > pos:
+                stats["equation"]["hit"] += 1
+                block = content[pos:end_pos]
+                collapsed = collapse_whitespace(block)
+                return (collapsed if collapsed != block else None), end_pos, []
+        stats["equation"]["miss"] += 1
+
+        if content.startswith("`", pos):
+            for quote_type, pattern in QUOTE_PATTERNS.items():
+                match = pattern.match(content, pos)
+                if match:
+                    stats["quotes"]["hit"] += 1
+                    quote = '"' if quote_type == "double_quotes" else "'"
+                    return quote + match.group(1) + quote, match.end(), []
+        stats["quotes"]["miss"] += 1
+
+        token, end_pos = self.command_manager.process_definition(
+            content, register=False, pos=pos
+        )
+        if token:
+            stats["definitions"]["hit"] += 1
+            if (
+                token.get("type", "").startswith("keyval")
+                or token.get("num_args", 0) > 0
+                or check_string_has_hash_number(token.get("content", ""))
+            ):
+                # left to the parser, with the whitespace collapsed as the pass does
+                block = content[pos:end_pos]
+                collapsed = collapse_whitespace(block)
+                return (collapsed if collapsed != block else None), end_pos, []
+            self._process_new_definition_token(token)
+            return "", max(end_pos, pos), [token]
+        stats["definitions"]["miss"] += 1
+
+        end_pos, sty_tokens = self._check_usepackage(content, file_dir, pos=pos)
+        if end_pos > pos:
+            stats["usepackage"]["hit"] += 1
+            return "", end_pos, sty_tokens
+        stats["usepackage"]["miss"] += 1
+
+        if self.formatting_handler.can_handle(content, pos):
+            token, end_pos = self.formatting_handler.handle(content, pos=pos)
+            if end_pos > pos:
+                stats["formatting"]["hit"] += 1
+                return (token.get("content", "") if token else ""), end_pos, []
+        stats["formatting"]["miss"] += 1
+
+        if self.command_manager.can_handle(content, pos):
+            expanded_text, end_pos = self.command_manager.handle(content, pos)
+            if end_pos > pos:
+                stats["commands"]["hit"] += 1
+                return expanded_text, end_pos, []
+        stats["commands"]["miss"] += 1
+
+        if self.if_else_block_handler.can_handle(content, pos):
+            token, end_pos = self.if_else_block_handler.handle(content, pos=pos)
+            if end_pos > pos:
+                stats["if_else"]["hit"] += 1
+                block = ""
+                if token and "@" not in token.get("type", ""):
+                    block = token.get("if_content", "")
+                return block, end_pos, []
+        stats["if_else"]["miss"] += 1
+        return None, pos, []
+
     def _check_documentclass(
         self, content: str, file_dir: str = None
     ) -> tuple[int, list[Dict]]:
@@ -146,7 +378,7 @@ class LatexPreprocessor:
         return 0, []
 
     def _check_usepackage(
-        self, content: str, file_dir: str = None
+        self, content: str, file_dir: str = None, pos: int = 0
     ) -> tuple[int, list[Dict]]:
         """Check for usepackage commands and parse any found .sty files
 
@@ -154,13 +386,13 @@ class LatexPreprocessor:
             tuple: (end_position, list of tokens from sty files)
         """
         # check for STY file
-        match = USEPACKAGE_PATTERN.match(content)
+        match = USEPACKAGE_PATTERN.match(content, pos)
         tokens = []
         if match:
             package_names = match.group(1).strip()
             tokens = self._parse_packages(package_names.split(","), file_dir, ".sty")
             return match.end(), tokens
-        return 0, []
+        return pos, []
 
     def _parse_packages(
         self, package_names: list[str], file_dir: str = None, extension=".sty"
@@ -189,177 +421,168 @@ class LatexPreprocessor:
         """
         current_pos = 0
         tokens = []  # Store all definition tokens
+        # definitions/expansions are spliced in at current_pos; consumed text is kept for the result
+        buffer = SpliceBuffer(content)
 
         math_blocks = {}
+        stats = self.rule_stats
 
         while current_pos < len(content):
             # find the next delimiter (this block allows us to quickly identify and process chunks of text between special LaTeX delimiters
             # without it, we would have to parse the entire content string character by character. which would be slower.)
             # if next delimiter exists, we need to store the text before the next delimiter (or all remaining text if no delimiter)
-            next_delimiter = DELIM_PATTERN_WITH_QUOTES.search(content[current_pos:])
-            next_pos = (
-                len(content[current_pos:])
-                if not next_delimiter
-                else next_delimiter.start()
+            delim_pos = find_next_delimiter(
+                content, current_pos, DELIM_PATTERN_WITH_QUOTES
             )
-            if next_pos > 0:
-                current_pos += next_pos
-                if not next_delimiter:
-                    break
+            if delim_pos == -1:
+                break
+            if delim_pos > current_pos:
+                current_pos = delim_pos
                 continue
 
             # Process addto by simply treating the content inside as {...}
-            match = ADD_TO_PATTERN.match(content[current_pos:])
+            match = ADD_TO_PATTERN.match(content, current_pos)
             if match:
-                content = (
-                    content[:current_pos] + content[current_pos + match.end() - 1 :]
-                )
+                stats["add_to"]["hit"] += 1
+                current_pos = buffer.splice(current_pos, match.end() - 1)
+                content = buffer.text
                 continue
+            stats["add_to"]["miss"] += 1
 
             # check math mode to ignore expansion of math mode commands
-            if self.equation_handler.can_handle(content[current_pos:]):
-                token, end_pos = self.equation_handler.handle(content[current_pos:])
-                if end_pos > 0:
+            # (only the extent is needed, the parser handles the equation itself later)
+            if self.equation_handler.can_handle(content, current_pos):
+                end_pos = self.equation_handler.find_end(content, current_pos)
+                if end_pos > current_pos:
+                    stats["equation"]["hit"] += 1
                     # store the math block as placeholder to restore later
-                    placeholder = f"__MATH_BLOCK_{len(math_blocks)}__"
-                    math_blocks[placeholder] = content[
-                        current_pos : current_pos + end_pos
-                    ]
-                    content = (
-                        content[:current_pos]
-                        + placeholder
-                        + content[current_pos + end_pos :]
-                    )
+                    placeholder = MATH_BLOCK_PLACEHOLDER % len(math_blocks)
+                    math_blocks[placeholder] = content[current_pos:end_pos]
+                    current_pos = buffer.splice(current_pos, end_pos, placeholder)
+                    content = buffer.text
                     continue
+            stats["equation"]["miss"] += 1
 
             # check quotes
+            quoted = False
             for quote_type, pattern in QUOTE_PATTERNS.items():
-                match = pattern.match(content[current_pos:])
+                match = pattern.match(content, current_pos)
                 if match:
+                    quoted = True
                     quote_content = match.group(1)
                     if quote_type == "double_quotes":
                         quote_content = '"' + quote_content + '"'
                     elif quote_type == "single_quotes":
                         quote_content = "'" + quote_content + "'"
-                    content = (
-                        content[:current_pos]
-                        + quote_content
-                        + content[current_pos + match.end() :]
-                    )
+                    current_pos = buffer.splice(current_pos, match.end(), quote_content)
+                    content = buffer.text
                     continue
+            stats["quotes"]["hit" if quoted else "miss"] += 1
 
             # Process definitions
             token, end_pos = self.command_manager.process_definition(
-                content[current_pos:], register=False
+                content, register=False, pos=current_pos
             )
             if token:
                 if token.get("type", "").startswith("keyval"):
-                    current_pos += end_pos
+                    stats["definitions"]["hit"] += 1
+                    current_pos = max(end_pos, current_pos)
                     continue
                 # Skip macro definitions that have parameters (#1, #2) or take arguments,
                 # as these need to be expanded later when actual values are provided
                 if token.get("num_args", 0) > 0 or check_string_has_hash_number(
                     token.get("content", "")
                 ):
-                    current_pos += end_pos
+                    stats["definitions"]["hit"] += 1
+                    current_pos = max(end_pos, current_pos)
                     continue
                 self._process_new_definition_token(token)
                 tokens.append(token)
-                if end_pos > 0:
-                    content = content[:current_pos] + content[current_pos + end_pos :]
+                if end_pos > current_pos:
+                    stats["definitions"]["hit"] += 1
+                    current_pos = buffer.splice(current_pos, end_pos)
+                    content = buffer.text
                     continue
+            stats["definitions"]["miss"] += 1
 
             # Update usepackage check to handle returned tokens
             end_pos, sty_tokens = self._check_usepackage(
-                content[current_pos:], file_dir
+                content, file_dir, pos=current_pos
             )
             tokens.extend(sty_tokens)  # Add sty tokens to our token list
-            if end_pos > 0:
-                content = content[:current_pos] + content[current_pos + end_pos :]
+            if end_pos > current_pos:
+                stats["usepackage"]["hit"] += 1
+                current_pos = buffer.splice(current_pos, end_pos)
+                content = buffer.text
                 continue
+            stats["usepackage"]["miss"] += 1
 
             # check for formatting (put formatting ahead so that we can ignore lots of unnecessary things)
-            if self.formatting_handler.can_handle(content[current_pos:]):
-                token, end_pos = self.formatting_handler.handle(content[current_pos:])
-                if end_pos > 0:
+            if self.formatting_handler.can_handle(content, current_pos):
+                token, end_pos = self.formatting_handler.handle(
+                    content, pos=current_pos
+                )
+                if end_pos > current_pos:
                     block = ""
                     if token:
                         block = token.get("content", "")
-                    content = (
-                        content[:current_pos] + block + content[current_pos + end_pos :]
-                    )
+                    stats["formatting"]["hit"] += 1
+                    current_pos = buffer.splice(current_pos, end_pos, block)
+                    content = buffer.text
                     continue
+            stats["formatting"]["miss"] += 1
 
             # Expand commands using command_manager instead of command_processor
-            if self.command_manager.can_handle(content[current_pos:]):
+            if self.command_manager.can_handle(content, current_pos):
                 expanded_text, end_pos = self.command_manager.handle(
-                    content[current_pos:]
+                    content, current_pos
                 )
-                if end_pos > 0:
-                    content = (
-                        content[:current_pos]
-                        + expanded_text
-                        + content[current_pos + end_pos :]
-                    )
+                if end_pos > current_pos:
+                    stats["commands"]["hit"] += 1
+                    current_pos = buffer.splice(current_pos, end_pos, expanded_text)
+                    content = buffer.text
                     continue
+            stats["commands"]["miss"] += 1
 
             # check for if else blocks
-            if self.if_else_block_handler.can_handle(content[current_pos:]):
+            if self.if_else_block_handler.can_handle(content, current_pos):
                 token, end_pos = self.if_else_block_handler.handle(
-                    content[current_pos:]
+                    content, pos=current_pos
                 )
-                if end_pos > 0:
+                if end_pos > current_pos:
                     block = ""
                     if token:
                         if "@" not in token.get("type", ""):
                             block = token.get("if_content", "")
-                    content = (
-                        content[:current_pos] + block + content[current_pos + end_pos :]
-                    )
+                    stats["if_else"]["hit"] += 1
+                    current_pos = buffer.splice(current_pos, end_pos, block)
+                    content = buffer.text
                     continue
+            stats["if_else"]["miss"] += 1
 
-            current_pos += 1
+            # nothing applies at a control word (or backtick run), so nothing applies
+            # inside it either: step onto its last char, which the next delimiter
+            # search then looks past as it did after each single step before
+            match = CONTROL_SEQUENCE_PATTERN.match(content, current_pos)
+            if match:
+                current_pos = max(current_pos + 1, match.end() - 1)
+            else:
+                current_pos += 1
+
+        content = buffer.getvalue()
 
         # restore math blocks
         content = restore_placeholder_blocks(content, math_blocks)
 
         return content, tokens
 
-    def _extract_verbatim_blocks(self, content: str) -> tuple[str, dict]:
+    def _find_verbatim_spans(self, content: str) -> list[tuple[int, int]]:
         """
-        Extracts verbatim environments from the content and replaces them with placeholders.
-        Returns the modified content and a dictionary mapping placeholders to the original verbatim blocks.
+        (start, end) of the verbatim environments in content, in order.
+        Same blocks as taking the earliest match of any of ALL_VERBATIM_PATTERNS
+        after the previous block, found in a single scan.
         """
-        blocks = {}
-        placeholder_prefix = "__VERBATIM_BLOCK__"
-        output = []
-        pos = 0
-        placeholder_index = 0
-
-        while pos < len(content):
-            earliest_match = None
-            earliest_start = len(content)
-            # Look for the earliest occurrence from any of the verbatim patterns
-            for pattern in ALL_VERBATIM_PATTERNS:
-                m = pattern.search(content, pos)
-                if m and m.start() < earliest_start:
-                    earliest_match = m
-                    earliest_start = m.start()
-
-            if earliest_match:
-                # Append the text before the match
-                output.append(content[pos : earliest_match.start()])
-                # Create a unique placeholder
-                placeholder = f"{placeholder_prefix}{placeholder_index}__"
-                output.append(placeholder)
-                blocks[placeholder] = earliest_match.group(0)
-                placeholder_index += 1
-                pos = earliest_match.end()
-            else:
-                output.append(content[pos:])
-                break
-
-        return "".join(output), blocks
+        return [match.span() for match in VERBATIM_BLOCK_PATTERN.finditer(content)]
 
 
 if __name__ == "__main__":
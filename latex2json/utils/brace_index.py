@@ -0,0 +1,181 @@
+import re
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Set, Tuple
+
+# delimiter pairs the index scans for, anything else is matched by a plain scan
+INDEXED_DELIMITERS = {"{": "}", "[": "]"}
+
+_DELIMITER_PATTERNS = {
+    open_delim: re.compile(r"\\*[" + re.escape(open_delim + close_delim) + "]")
+    for open_delim, close_delim in INDEXED_DELIMITERS.items()
+}
+
+
+class _PairScan:
+    """Pairs of one delimiter type, found by a single forward scan from origin.
+
+    The closing delimiter of an opening one only depends on the text after it, so the
+    scan can start at the first position asked for. It only runs as far as needed
+    to answer each lookup and picks up where it left off for the next one.
+    """
+
+    def __init__(self, text: str, open_delim: str, origin: int):
+        self.open_delim = open_delim
+        self.origin = origin
+        # runs of backslashes before a delimiter come with it, to tell if it is escaped
+        self._matches = _DELIMITER_PATTERNS[open_delim].finditer(text, origin)
+        self._scanned_to = origin
+        self._stack: List[int] = []
+        self._pending: Set[int] = set()
+        # opening delimiter -> position after its closing delimiter
+        self.pairs: Dict[int, int] = {}
+
+    def end_of(self, start: int) -> Optional[int]:
+        end = self.pairs.get(start)
+        if end is not None:
+            return end
+        while start >= self._scanned_to or start in self._pending:
+            match = next(self._matches, None)
+            if match is None:
+                self._scanned_to = float("inf")
+                break
+            pos = match.end() - 1
+            self._scanned_to = pos + 1
+            if (pos - match.start()) % 2 == 1:
+                continue  # escaped
+            if match.string[pos] == self.open_delim:
+                self._stack.append(pos)
+                self._pending.add(pos)
+            elif self._stack:
+                opened = self._stack.pop()
+                self._pending.discard(opened)
+                self.pairs[opened] = pos + 1
+        return self.pairs.get(start)
+
+
+class TextIndex:
+    """Base for lookup tables built over one (large) text.
+
+    for_text reuses the index of a text from the active IndexCache. Splicing a buffer
+    makes a new string, which gets a new index on its first lookup.
+    """
+
+    # shorter texts are cheaper to scan directly than to index
+    MIN_TEXT_LENGTH = 512
+
+    def __init__(self, text: str):
+        self.text = text
+
+    @classmethod
+    def for_text(cls, text: str):
+        cache = _active_cache.get()
+        if cache is None:
+            return cls(text)
+        return cache.get(cls, text)
+
+    @classmethod
+    def after_splice(cls, index: "TextIndex", text: str, tail_start: int):
+        """Index of text, made by a splice into index.text that left text[tail_start:]
+        as it was. None to build it anew on its first lookup."""
+        return None
+
+
+class IndexCache:
+    """The TextIndexes of the most recently used texts, per index type.
+
+    An index holds on to its text, so the cache belongs to whoever parses the texts
+    (see LatexParser) and is cleared along with it. for_text only uses a cache while
+    it is active, in the current thread (or async context).
+    """
+
+    MAX_CACHED_TEXTS = 8
+
+    def __init__(self):
+        self._indexes: Dict[type, "OrderedDict[int, TextIndex]"] = {}
+
+    def clear(self):
+        self._indexes.clear()
+
+    @contextmanager
+    def use(self):
+        token = _active_cache.set(self)
+        try:
+            yield self
+        finally:
+            _active_cache.reset(token)
+
+    def spliced(self, old_text: str, text: str, tail_start: int) -> None:
+        """Move the indexes of old_text over to text, see TextIndex.after_splice"""
+        for cls, cache in self._indexes.items():
+            index = cache.pop(id(old_text), None)
+            if index is None:
+                continue
+            new_index = cls.after_splice(index, text, tail_start)
+            if new_index is not None:
+                cache[id(text)] = new_index
+
+    def get(self, cls: type, text: str) -> TextIndex:
+        cache = self._indexes.setdefault(cls, OrderedDict())
+        index = cache.get(id(text))
+        # the index holds on to its text, so a matching id is the same string
+        if index is None or index.text is not text:
+            index = cls(text)
+            cache[id(text)] = index
+            if len(cache) > self.MAX_CACHED_TEXTS:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(id(text))
+        return index
+
+
+_active_cache: ContextVar[Optional[IndexCache]] = ContextVar(
+    "text_index_cache", default=None
+)
+
+
+def text_spliced(old_text: str, text: str, tail_start: int) -> None:
+    """Tell the active IndexCache (if any) that text was spliced from old_text"""
+    cache = _active_cache.get()
+    if cache is not None:
+        cache.spliced(old_text, text, tail_start)
+
+
+class BraceIndex(TextIndex):
+    r"""Matching {} and [] pairs of one text, shared by every lookup on that text.
+
+    Handlers look up the argument groups of the same (large) buffer over and over, and
+    a char by char scan also checks every brace for escaping backslashes. The index
+    finds the pairs with one regex scan per delimiter type, only as far as the lookups
+    so far needed, and answers repeated lookups from its table.
+    """
+
+    def __init__(self, text: str):
+        super().__init__(text)
+        self._scans: Dict[str, _PairScan] = {}
+
+    def find_closing(self, start: int, open_delim: str = "{") -> Optional[int]:
+        """Position after the delimiter closing the one at start.
+
+        None if the index cannot tell: start is not an (unescaped) opening delimiter,
+        lies before where the scan began, or is never closed.
+        """
+        scan = self._scans.get(open_delim)
+        if scan is None:
+            if open_delim not in INDEXED_DELIMITERS:
+                return None
+            scan = self._scans[open_delim] = _PairScan(self.text, open_delim, start)
+        elif start < scan.origin:
+            return None
+        return scan.end_of(start)
+
+    def find_pair(
+        self, start: int, open_delim: str = "{", close_delim: str = "}"
+    ) -> Optional[Tuple[int, int]]:
+        if INDEXED_DELIMITERS.get(open_delim) != close_delim:
+            return None
+        end = self.find_closing(start, open_delim)
+        if end is None:
+            return None
+        return start, end
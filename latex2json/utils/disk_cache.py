@@ -0,0 +1,176 @@
+import glob
+import hashlib
+import logging
+import os
+import pickle
+import sys
+import tempfile
+from functools import lru_cache
+from importlib import metadata
+from typing import Any, Optional
+
+# directory for the optional on-disk caches, caching is off when unset
+CACHE_DIR_ENV = "LATEX2JSON_CACHE_DIR"
+# size cap of the cache directory in bytes, the least recently used entries go first
+CACHE_MAX_BYTES_ENV = "LATEX2JSON_CACHE_MAX_BYTES"
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# an eviction makes room for more entries than the one saved, so that saves to a full
+# cache do not each scan it
+EVICT_TO_RATIO = 0.9
+
+ENTRY_SUFFIX = ".bin"
+# running total of the entry sizes, so a save only scans the cache once it is full
+SIZE_FILE = "size"
+
+logger = logging.getLogger(__name__)
+
+
+def get_cache_dir() -> Optional[str]:
+    return os.environ.get(CACHE_DIR_ENV) or None
+
+
+def get_cache_max_bytes() -> int:
+    try:
+        return int(os.environ.get(CACHE_MAX_BYTES_ENV) or DEFAULT_CACHE_MAX_BYTES)
+    except ValueError:
+        return DEFAULT_CACHE_MAX_BYTES
+
+
+@lru_cache(maxsize=1)
+def library_version() -> str:
+    try:
+        return metadata.version("latex2json")
+    except metadata.PackageNotFoundError:
+        return ""
+
+
+def cache_key(*parts: str | bytes) -> str:
+    """Hash of the given parts (and the python/library versions cached formats may depend on)"""
+    digest = hashlib.sha1(sys.version.encode())
+    digest.update(library_version().encode())
+    for part in parts:
+        digest.update(part.encode() if isinstance(part, str) else part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def file_cache_key(*file_paths: str) -> str:
+    """cache_key over the contents of the given files"""
+    parts = []
+    for file_path in file_paths:
+        with open(file_path, "rb") as f:
+            parts.append(f.read())
+    return cache_key(*parts)
+
+
+@lru_cache(maxsize=1)
+def package_code_key() -> str:
+    """file_cache_key over the parser (and utils) sources, for caching parser output"""
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    files = []
+    for sub_dir in ("parser", "utils"):
+        pattern = os.path.join(package_dir, sub_dir, "**", "*.py")
+        files.extend(sorted(glob.glob(pattern, recursive=True)))
+    return file_cache_key(*files)
+
+
+def _cache_path(cache_dir: str, namespace: str, key: str) -> str:
+    return os.path.join(cache_dir, namespace, key + ENTRY_SUFFIX)
+
+
+def load_cache(namespace: str, key: str, serializer=pickle) -> Optional[Any]:
+    """Load a cached value, None if caching is off or there is no (readable) entry"""
+    cache_dir = get_cache_dir()
+    if not cache_dir:
+        return None
+    path = _cache_path(cache_dir, namespace, key)
+    try:
+        with open(path, "rb") as f:
+            value = serializer.loads(f.read())
+        # the modification time tells eviction when an entry was last used
+        os.utime(path)
+        return value
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.debug("Ignoring unreadable cache entry %s/%s: %s", namespace, key, e)
+        return None
+
+
+def save_cache(namespace: str, key: str, value: Any, serializer=pickle) -> None:
+    """Store a value in the cache (if enabled). Failures are logged and ignored."""
+    cache_dir = get_cache_dir()
+    if not cache_dir:
+        return
+    path = _cache_path(cache_dir, namespace, key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = serializer.dumps(value)
+        _write_file(path, data)
+        _add_to_size(cache_dir, len(data), get_cache_max_bytes())
+    except Exception as e:
+        logger.debug("Could not write cache entry %s/%s: %s", namespace, key, e)
+
+
+def _write_file(path: str, data: bytes) -> None:
+    # write to a temp file first, so concurrent readers never see a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _read_size(cache_dir: str) -> Optional[int]:
+    try:
+        with open(os.path.join(cache_dir, SIZE_FILE)) as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def _add_to_size(cache_dir: str, size: int, max_bytes: int) -> None:
+    """Count size bytes more in the cache, evicting entries once it is over max_bytes.
+
+    The total is approximate (overwritten entries count twice, concurrent saves can
+    miss each other's sizes); every eviction scan sets it to the real total again.
+    """
+    total = _read_size(cache_dir)
+    if total is None or total + size > max_bytes:
+        evict_cache(cache_dir, max_bytes)
+    else:
+        _write_file(os.path.join(cache_dir, SIZE_FILE), str(total + size).encode())
+
+
+def evict_cache(cache_dir: str, max_bytes: int) -> None:
+    """Remove the least recently used entries until the cache fits in max_bytes
+    (and EVICT_TO_RATIO of it, once anything has to go)"""
+    entries = []
+    total = 0
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            if not name.endswith(ENTRY_SUFFIX):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # removed by a concurrent eviction
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+    if total > max_bytes:
+        target = int(max_bytes * EVICT_TO_RATIO)
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= target:
+                break
+    _write_file(os.path.join(cache_dir, SIZE_FILE), str(total).encode())
@@ -0,0 +1,78 @@
+import re
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from latex2json.utils.brace_index import TextIndex
+
+# \begin{name} / \end{name}; names with a backslash are left to the plain search
+ENV_TAG_PATTERN = re.compile(r"\\(begin|end)\s*\{([^}\\]*)\}")
+
+
+class EnvIndex(TextIndex):
+    r"""Matching \begin{X} ... \end{X} pairs of one text.
+
+    Finding the end of an environment used to search the begin and end patterns again
+    at every nesting step, for every (nested) environment. The index walks the
+    \begin/\end tags once, pairing them up with a stack per environment name, and
+    looks environments up by their begin offset (bisect for the first \begin{X} at
+    or after a position).
+
+    Like BraceIndex the scan starts at the first position asked for (a pair only
+    depends on the text after its \begin) and only runs as far as the lookups need.
+    """
+
+    def __init__(self, text: str):
+        super().__init__(text)
+        self.origin: Optional[int] = None
+        self._tags = None
+        self._done = False
+        # env name -> offsets of its \begin tags, in text order
+        self._begins: Dict[str, List[int]] = {}
+        self._stacks: Dict[str, List[re.Match]] = {}
+        # \begin offset -> (content start, content end, offset after \end)
+        self._pairs: Dict[int, Tuple[int, int, int]] = {}
+
+    def _scan_next(self) -> bool:
+        tag = next(self._tags, None)
+        if tag is None:
+            self._done = True
+            return False
+        kind, name = tag.groups()
+        if kind == "begin":
+            self._begins.setdefault(name, []).append(tag.start())
+            self._stacks.setdefault(name, []).append(tag)
+        else:
+            stack = self._stacks.get(name)
+            if stack:
+                begin = stack.pop()
+                self._pairs[begin.start()] = (begin.end(), tag.start(), tag.end())
+        return True
+
+    def find_block(
+        self, env_name: str, start_pos: int = 0
+    ) -> Optional[Tuple[int, int, str]]:
+        r"""Same result as find_matching_env_block, None if the index cannot tell
+        (start_pos lies before where the scan began, or an unsupported name)"""
+        if "\\" in env_name or "}" in env_name:
+            return None
+        if self.origin is None:
+            self.origin = start_pos
+            self._tags = ENV_TAG_PATTERN.finditer(self.text, start_pos)
+        elif start_pos < self.origin:
+            return None
+
+        # first \begin{env_name} at or after start_pos
+        while True:
+            begins = self._begins.get(env_name, [])
+            i = bisect_left(begins, start_pos)
+            if i < len(begins):
+                begin = begins[i]
+                break
+            if not self._scan_next():
+                return -1, -1, ""
+
+        while begin not in self._pairs:
+            if not self._scan_next():
+                return -1, -1, ""
+        content_start, content_end, end = self._pairs[begin]
+        return begin, end, self.text[content_start:content_end].strip()
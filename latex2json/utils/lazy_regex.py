@@ -0,0 +1,48 @@
+import re
+from typing import Optional
+
+# methods bound straight onto the instance once compiled, so hot loops skip __getattr__
+_PATTERN_METHODS = (
+    "match",
+    "fullmatch",
+    "search",
+    "finditer",
+    "findall",
+    "sub",
+    "subn",
+    "split",
+)
+
+
+class LazyPattern:
+    """Stand-in for a re.Pattern that only compiles on first use.
+
+    Handler modules define dozens of patterns at import time, most of which a short
+    run never touches. pattern and flags are available without compiling (enough for
+    dispatch.pattern_prefixes); everything else compiles the pattern first.
+    """
+
+    def __init__(self, pattern: str, flags: int = 0):
+        self.pattern = pattern
+        self.flags = flags
+        self._compiled: Optional[re.Pattern] = None
+
+    def compile(self) -> re.Pattern:
+        if self._compiled is None:
+            self._compiled = re.compile(self.pattern, self.flags)
+            for name in _PATTERN_METHODS:
+                setattr(self, name, getattr(self._compiled, name))
+        return self._compiled
+
+    def __getattr__(self, name: str):
+        # only reached for attributes not set yet, i.e. before compiling
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.compile(), name)
+
+    def __repr__(self) -> str:
+        return f"LazyPattern({self.pattern!r}, {self.flags!r})"
+
+
+def lazy_compile(pattern: str, flags: int = 0) -> LazyPattern:
+    return LazyPattern(pattern, flags)
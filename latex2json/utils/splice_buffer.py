@@ -0,0 +1,52 @@
+from latex2json.utils.brace_index import text_spliced
+
+
+class SpliceBuffer:
+    """Working text for the parse loops, which splice expansions in at a moving cursor.
+
+    Everything before the cursor has already been consumed, so a splice hands it off
+    to a list of finished pieces and keeps only a short lookbehind (for escape checks
+    and log context) in the live text, and getvalue() joins the pieces once at the end.
+    Loops that only need the unread text (e.g. the token parser) pass
+    keep_consumed=False and the consumed prefix is simply dropped.
+
+    This is not a rope: the handlers match with re on one contiguous str, so a splice
+    still copies the unread tail and costs O(replacement + unread text). What it saves
+    is copying the consumed prefix again on every splice, which is most of the document
+    by the end of it.
+    """
+
+    # chars kept before the cursor, enough for regex lookbehinds and surrounding-text logs
+    CONTEXT = 128
+
+    def __init__(
+        self, text: str = "", context: int = CONTEXT, keep_consumed: bool = True
+    ):
+        self.text = text
+        self.context = context
+        self.keep_consumed = keep_consumed
+        self._done: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def splice(self, start: int, end: int, replacement: str = "") -> int:
+        """Replace text[start:end] with replacement, copying text[end:] along.
+
+        Returns:
+            int: offset of start in the new text (positions before it shift left)
+        """
+        keep_from = max(0, start - self.context)
+        if keep_from and self.keep_consumed:
+            self._done.append(self.text[:keep_from])
+        old_text = self.text
+        self.text = old_text[keep_from:start] + replacement + old_text[end:]
+        # indexes of the unchanged tail carry over to the new text
+        text_spliced(old_text, self.text, start - keep_from + len(replacement))
+        return start - keep_from
+
+    def getvalue(self) -> str:
+        """Return the full text, including pieces already moved out of the live text"""
+        if not self._done:
+            return self.text
+        return "".join(self._done) + self.text
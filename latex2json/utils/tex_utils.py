@@ -1,8 +1,11 @@
+from functools import lru_cache
 from typing import Callable, Dict, List, Tuple
 import re
 import os
 
+from latex2json.utils.brace_index import BraceIndex
 from latex2json.utils.encoding import detect_encoding, read_file
+from latex2json.utils.env_index import EnvIndex
 
 
 def count_preceding_backslashes(text: str, pos: int) -> int:
@@ -32,6 +35,9 @@ def find_matching_delimiter(
     Handles:
         - Nested delimiters
         - Escaped characters (odd number of backslashes)
+    The delimiter found at start is always treated as the opening one, so callers can
+    point start into the middle of a larger document.
+    Long texts are looked up in their BraceIndex, so repeated lookups stay cheap.
     """
     # Skip leading whitespace
     while start < len(text) and text[start].isspace():
@@ -40,8 +46,13 @@ def find_matching_delimiter(
     if start >= len(text) or text[start] != open_delim:
         return -1, -1
 
-    stack = []
-    i = start
+    if len(text) >= BraceIndex.MIN_TEXT_LENGTH:
+        pair = BraceIndex.for_text(text).find_pair(start, open_delim, close_delim)
+        if pair is not None:
+            return pair
+
+    stack = [start]
+    i = start + 1
     while i < len(text):
         if text[i] == open_delim and not is_escaped(i, text):
             stack.append(i)
@@ -57,65 +68,81 @@ def find_matching_delimiter(
 
 
 def extract_nested_content(
-    text: str, open_delim: str = "{", close_delim: str = "}"
+    text: str, open_delim: str = "{", close_delim: str = "}", start: int = 0
 ) -> Tuple[str | None, int]:
     """
     Extract content between delimiters, handling nesting.
     Returns a tuple of (content, next_position) where:
         - content is the text between delimiters (or None if not found)
-        - next_position is the position after the closing delimiter (or 0 if not found)
+        - next_position is the position after the closing delimiter (or start if not found)
+    Positions are offsets into text, so passing start avoids slicing the document.
     """
-    start_pos, end_pos = find_matching_delimiter(text, open_delim, close_delim)
+    start_pos, end_pos = find_matching_delimiter(text, open_delim, close_delim, start)
     if start_pos == -1:
-        return None, 0
+        return None, start
 
     # Return content without the delimiters and the next position to process
     content = text[start_pos + 1 : end_pos - 1]
     return content, end_pos
 
 
+def find_nested_content_spans(
+    text: str,
+    open_delim: str = "{",
+    close_delim: str = "}",
+    max_blocks=float("inf"),
+    start: int = 0,
+) -> Tuple[List[Tuple[int, int]], int]:
+    """
+    Offset-based extract_nested_content_sequence_blocks, no substrings are made.
+    Returns a tuple of (spans, total_end_pos) where:
+        - spans is a list of (start, end) offsets of each block's content in text
+        - total_end_pos is the position after the last closing delimiter
+          (or start if no block was found)
+    """
+    spans = []
+    pos = start
+    while len(spans) < max_blocks:
+        # leading whitespace is skipped by find_matching_delimiter
+        block_start, block_end = find_matching_delimiter(
+            text, open_delim, close_delim, pos
+        )
+        if block_start == -1:
+            break
+        spans.append((block_start + 1, block_end - 1))
+        pos = block_end
+    return spans, pos
+
+
 def extract_nested_content_sequence_blocks(
-    text: str, open_delim: str = "{", close_delim: str = "}", max_blocks=float("inf")
+    text: str,
+    open_delim: str = "{",
+    close_delim: str = "}",
+    max_blocks=float("inf"),
+    start: int = 0,
 ) -> Tuple[list[str], int]:
     """
     Extract multiple nested content blocks and return their contents along with the final position.
     Returns a tuple of (blocks, total_end_pos) where:
         - blocks is a list of extracted content strings
         - total_end_pos is the position after the last closing delimiter
+          (or start if no block was found)
     """
-    i = 0
-    blocks = []
-    total_pos = 0
-    last_valid_pos = 0
-    current_text = text
-
-    while i < max_blocks:
-        # Skip any leading whitespace
-        while current_text and current_text[0].isspace():
-            current_text = current_text[1:]
-            total_pos += 1
-
-        content, next_pos = extract_nested_content(
-            current_text, open_delim, close_delim
-        )
-        if next_pos == 0:
-            # If no more blocks found, return the position of the last successful block
-            return blocks, last_valid_pos
-
-        blocks.append(content)
-        current_text = current_text[next_pos:]
-        total_pos += next_pos
-        last_valid_pos = total_pos
-        i += 1
-
-    return blocks, last_valid_pos
+    spans, end_pos = find_nested_content_spans(
+        text, open_delim, close_delim, max_blocks, start
+    )
+    return [text[block_start:block_end] for block_start, block_end in spans], end_pos
 
 
 def extract_nested_content_pattern(
-    text: str, begin_pattern: re.Pattern | str, end_pattern: re.Pattern | str
+    text: str,
+    begin_pattern: re.Pattern | str,
+    end_pattern: re.Pattern | str,
+    start_pos: int = 0,
 ) -> Tuple[int, int, str]:
     """
     Extract content between regex patterns, handling nesting.
+    Searching begins at start_pos; returned positions are offsets into text.
     Returns a tuple of (start_pos, end_pos, content) where:
         - start_pos is the position of the beginning pattern
         - end_pos is the position after the end pattern
@@ -129,7 +156,7 @@ def extract_nested_content_pattern(
         end_pattern = re.compile(end_pattern)
 
     # Find the first beginning pattern
-    begin_match = begin_pattern.search(text)
+    begin_match = begin_pattern.search(text, start_pos)
     if not begin_match:
         return -1, -1, ""
 
@@ -168,21 +195,25 @@ def find_matching_env_block(
         - end_pos is the position of the end of \end{env_name}
         - inner_content is the text between \begin{env_name} and \end{env_name}
     Returns (-1, -1, "") if no valid match is found.
+    Long texts are looked up in their EnvIndex.
     """
+    if len(text) >= EnvIndex.MIN_TEXT_LENGTH:
+        block = EnvIndex.for_text(text).find_block(env_name, start_pos)
+        if block is not None:
+            return block
+
     escaped_name = re.escape(env_name)
     begin_pattern = r"\\begin\s*\{" + escaped_name + "}"
     end_pattern = r"\\end\s*\{" + escaped_name + "}"
 
-    # Adjust for start_pos by slicing the text and adjusting returned positions
-    text_slice = text[start_pos:]
     start, end, content = extract_nested_content_pattern(
-        text_slice, begin_pattern, end_pattern
+        text, begin_pattern, end_pattern, start_pos
     )
 
     if start == -1:
         return -1, -1, ""
 
-    return start + start_pos, end + start_pos, content.strip()
+    return start, end, content.strip()
 
 
 def strip_latex_newlines(latex_str: str) -> str:
@@ -198,7 +229,12 @@ def strip_latex_newlines(latex_str: str) -> str:
     return latex_str.strip()
 
 
-def normalize_whitespace_and_lines(text: str) -> str:
+def collapse_whitespace(text: str) -> str:
+    """Collapse runs of spaces/newlines, paragraph breaks become a single newline.
+    Unlike normalize_whitespace_and_lines, whitespace at either end is kept (collapsed).
+    """
+    if "\n" not in text and "\t" not in text and "  " not in text:
+        return text
     # Step 1: Replace two or more newlines (with optional surrounding spaces) with a unique marker.
     # This marker should be something unlikely to appear in your text.
     marker = "<PARA_BREAK>"
@@ -211,10 +247,36 @@ def normalize_whitespace_and_lines(text: str) -> str:
     text = re.sub(r"[ \t]+", " ", text)
 
     # Step 4: Replace the marker with an actual newline (or any delimiter you prefer).
-    text = text.replace(marker, "\n")
+    return text.replace(marker, "\n")
 
-    # Optionally, trim leading and trailing whitespace.
-    return text.strip()
+
+def normalize_whitespace_and_lines(
+    text: str, keep_spans: List[Tuple[int, int]] = (), strip: bool = True
+) -> str:
+    """Collapse runs of spaces/newlines, paragraph breaks become a single newline.
+
+    keep_spans are sorted, non-overlapping (start, end) spans of text left exactly as
+    they are (e.g. verbatim blocks), whitespace at either end of the text included.
+    With strip=False, whitespace at either end of the text is only collapsed.
+    """
+    if not keep_spans:
+        text = collapse_whitespace(text)
+        # Optionally, trim leading and trailing whitespace.
+        return text.strip() if strip else text
+
+    # the steps above only ever rewrite whitespace runs, which a kept span breaks up,
+    # so the text between the spans is normalized piece by piece
+    out = []
+    pos = 0
+    for start, end in keep_spans:
+        out.append(collapse_whitespace(text[pos:start]))
+        out.append(text[start:end])
+        pos = end
+    out.append(collapse_whitespace(text[pos:]))
+    if strip:
+        out[0] = out[0].lstrip()
+        out[-1] = out[-1].rstrip()
+    return "".join(out)
 
 
 def flatten(lst):
@@ -322,12 +384,51 @@ def is_escaped(pos: int, text: str) -> bool:
     return count_preceding_backslashes(text, pos) % 2 == 1
 
 
+# line breaks that str.splitlines splits on besides \n, and whitespace that
+# str.rstrip strips within a line
+ASCII_LINE_BREAKS = "\r\x0b\x0c\x1c\x1d\x1e"
+ASCII_LINE_SPACES = " \t\x1f"
+LINE_BREAKS = ASCII_LINE_BREAKS + "\x85\u2028\u2029"
+LINE_SPACES = (
+    ASCII_LINE_SPACES
+    + "\xa0\u1680\u202f\u205f\u3000"
+    + "".join(chr(c) for c in range(0x2000, 0x200B))
+)
+
+
+def is_comment_stripped(text: str) -> bool:
+    """Check if strip_latex_comments would return text unchanged, e.g. for parts of
+    already stripped text. Only does substring searches, much cheaper than stripping.
+    """
+    if text[-1:].isspace():
+        return False
+    if text.isascii():
+        line_breaks, line_spaces = ASCII_LINE_BREAKS, ASCII_LINE_SPACES
+    else:
+        line_breaks, line_spaces = LINE_BREAKS, LINE_SPACES
+    if any(char in text for char in line_breaks):
+        return False
+    if any(char + "\n" in text for char in line_spaces):
+        return False
+
+    return _find_comment(text) == -1
+
+
+def _find_comment(text: str) -> int:
+    """Position of the first unescaped %, -1 if there is none"""
+    pos = text.find("%")
+    while pos != -1 and is_escaped(pos, text):
+        pos = text.find("%", pos + 1)
+    return pos
+
+
 def strip_latex_comments(text: str) -> str:
     r"""
     Remove all LaTeX comments while preserving escaped \% characters.
 
     A % starts a comment if it is preceded by an even number (including zero)
     of consecutive backslashes. An odd number indicates that the % is escaped.
+    Trailing whitespace is stripped from every line, and lines are joined by \n.
 
     Args:
         text: Input LaTeX text
@@ -335,24 +436,17 @@ def strip_latex_comments(text: str) -> str:
     Returns:
         Text with all comments removed.
     """
-    lines = []
-    for line in text.splitlines():
-        result = []
-        i = 0
-        while i < len(line):
-            if line[i] == "%":
-                # Use helper to decide if this % is escaped.
-                if not is_escaped(i, line):
-                    break  # Unescaped % starts a comment
-                else:
-                    # Escaped percent: include literal %
-                    result.append("%")
-                    i += 1
-                    continue
-            else:
-                result.append(line[i])
-                i += 1
-        lines.append("".join(result).rstrip())
+    if is_comment_stripped(text):
+        # nothing to do, e.g. the parser recursing into parts of stripped text
+        return text
+
+    lines = text.splitlines()
+    for i, line in enumerate(lines):
+        if "%" in line:
+            comment_pos = _find_comment(line)
+            if comment_pos != -1:
+                line = line[:comment_pos]
+        lines[i] = line.rstrip()
     return "\n".join(lines)
 
 
@@ -384,21 +478,26 @@ def flatten_group_token(token: Dict) -> Dict | List[Dict]:
     return token
 
 
+@lru_cache(maxsize=None)
+def _char_set_pattern(chars: str) -> re.Pattern:
+    return re.compile("[" + re.escape(chars) + "]")
+
+
 def check_delimiter_balance(
     text: str, open_delim: str = "{", close_delim: str = "}"
 ) -> bool:
     """Check if delimiters are properly balanced in the text, handling escapes."""
-    stack = []
-    i = 0
-    while i < len(text):
+    depth = 0
+    # only visit the delimiters themselves
+    for match in _char_set_pattern(open_delim + close_delim).finditer(text):
+        i = match.start()
         if text[i] == open_delim and not is_escaped(i, text):
-            stack.append(text[i])
+            depth += 1
         elif text[i] == close_delim and not is_escaped(i, text):
-            if not stack:
+            if not depth:
                 return False
-            stack.pop()
-        i += 1
-    return len(stack) == 0
+            depth -= 1
+    return depth == 0
 
 
 def find_delimiter_end(content: str, start_pos: int, delimiter: str) -> int:
@@ -406,38 +505,42 @@ def find_delimiter_end(content: str, start_pos: int, delimiter: str) -> int:
     Find the end position of a delimiter (like $ or $$), respecting nested braces.
     Returns the position after the closing delimiter, or -1 if not found.
     """
-    stack = []
-    i = start_pos
-    while i < len(content):
+    depth = 0
+    # only visit braces and chars the delimiter can start at, linear in len(content)
+    for match in _char_set_pattern("{}" + delimiter[:1]).finditer(content, start_pos):
+        i = match.start()
         if content[i] == "{" and not is_escaped(i, content):
-            stack.append("{")
+            depth += 1
         elif content[i] == "}" and not is_escaped(i, content):
-            if stack:
-                stack.pop()
+            if depth:
+                depth -= 1
         elif (
-            content[i:].startswith(delimiter)
+            not depth  # Only match delimiter when not inside braces
+            and content.startswith(delimiter, i)
             and not is_escaped(i, content)
-            and not stack  # Only match delimiter when not inside braces
         ):
             return i + len(delimiter)
-        i += 1
     return -1
 
 
-def extract_equation_content(content: str, delimiter: str) -> Tuple[str, int]:
+def extract_equation_content(
+    content: str, delimiter: str, start: int = 0
+) -> Tuple[str, int]:
     """Extract equation content and find proper end position.
 
     Args:
         content: Input text containing equation
         delimiter: Equation delimiter ($ or $$)
+        start: Position of the opening delimiter in content
 
     Returns:
-        Tuple[str, int]: (equation content, end position)
+        Tuple[str, int]: (equation content, end position), end position is 0 if the
+        equation is not found
     """
-    if not content.startswith(delimiter):
+    if not content.startswith(delimiter, start):
         return "", 0
 
-    start = len(delimiter)
+    start += len(delimiter)
     end_pos = find_delimiter_end(content, start, delimiter)
 
     if end_pos < 0:
@@ -457,16 +560,15 @@ def extract_args(content: str, req_args=0, opt_args=0):
         opt, end_pos = extract_nested_content_sequence_blocks(
             content, "[", "]", max_blocks=opt_args
         )
-        if end_pos > 0:
-            content = content[end_pos:]
 
     req = []
     if req_args > 0:
+        # like the opt args end, the returned end is relative to where the req args start
+        req_start = end_pos
         req, end_pos = extract_nested_content_sequence_blocks(
-            content, "{", "}", max_blocks=req_args
+            content, "{", "}", max_blocks=req_args, start=req_start
         )
-        if end_pos > 0:
-            content = content[end_pos:]
+        end_pos -= req_start
 
     return {"req": req, "opt": opt}, end_pos
 
@@ -534,34 +636,18 @@ def substitute_args(definition: str, args: List[str], math_mode=False) -> str:
     return HASH_NUMBER_PATTERN.sub(sub_fn, definition)
 
 
-def extract_delimited_args(
-    content: str, delimiter_pattern: str
-) -> Tuple[List[str | None], int]:
+def find_delimited_arg_spans(
+    content: str, delimiter_pattern: str, start: int = 0
+) -> Tuple[List[Tuple[int, int] | None], int]:
     """
-    Extract nested content based on a pattern of delimiters.
-
-    Args:
-        content: Input text to process
-        delimiter_pattern: String of opening delimiters where:
-            '{' indicates required curly braces
-            '[' indicates optional square brackets
-
-    Returns:
-        Tuple of (extracted_contents, end_position) where:
-            - extracted_contents is a list of contents up until first missing required arg
-            - end_position is the position after the last successfully processed delimiter
-
-    Example:
-        extract_delimited_args("foo{a}\n[b]{c}", "{[{")
-        -> (["a", "b", "c"], 13)
-
-        extract_delimited_args("foo{a}", "{[{")
-        -> (["a"], 5)  # Stops at first missing required argument
+    Offset-based extract_delimited_args: (start, end) offsets of each argument's content
+    (None for a missing optional argument) instead of the contents, no substrings are
+    made. Positions are offsets into content, starting the search at start.
     """
-    results = []
-    current_pos = 0
+    spans = []
+    current_pos = start
 
-    total_end_pos = 0
+    total_end_pos = start
     for delimiter in delimiter_pattern:
         # Skip all whitespace characters (including newlines)
         while current_pos < len(content) and content[current_pos].isspace():
@@ -572,30 +658,57 @@ def extract_delimited_args(
 
         current_char = content[current_pos]
         if current_char not in ["{", "["]:
-            current_pos -= 1
             break
 
         if delimiter == "{":
             # Required argument
-            content_slice = content[current_pos:]
-            nested_content, end_pos = extract_nested_content(content_slice, "{", "}")
-            if nested_content is None:
-                return results, current_pos  # Stop at first missing required arg
-            results.append(nested_content)
-            current_pos += end_pos
+            arg_start, arg_end = find_matching_delimiter(content, "{", "}", current_pos)
+            if arg_start == -1:
+                return spans, current_pos  # Stop at first missing required arg
+            spans.append((arg_start + 1, arg_end - 1))
+            current_pos = arg_end
             total_end_pos = current_pos
         elif delimiter == "[":
             # Optional argument
-            content_slice = content[current_pos:]
-            nested_content, end_pos = extract_nested_content(content_slice, "[", "]")
-            if nested_content is not None:
-                results.append(nested_content)
-                current_pos += end_pos
+            arg_start, arg_end = find_matching_delimiter(content, "[", "]", current_pos)
+            if arg_start != -1:
+                spans.append((arg_start + 1, arg_end - 1))
+                current_pos = arg_end
                 total_end_pos = current_pos
             else:
-                results.append(None)
+                spans.append(None)
+
+    return spans, total_end_pos
+
+
+def extract_delimited_args(
+    content: str, delimiter_pattern: str, start: int = 0
+) -> Tuple[List[str | None], int]:
+    """
+    Extract nested content based on a pattern of delimiters.
+
+    Args:
+        content: Input text to process
+        delimiter_pattern: String of opening delimiters where:
+            '{' indicates required curly braces
+            '[' indicates optional square brackets
+        start: Position in content to start from (returned positions are offsets into content)
+
+    Returns:
+        Tuple of (extracted_contents, end_position) where:
+            - extracted_contents is a list of contents up until first missing required arg
+            - end_position is the position after the last successfully processed delimiter
 
-    return results, total_end_pos
+    Example:
+        extract_delimited_args("foo{a}\n[b]{c}", "{[{")
+        -> (["a", "b", "c"], 13)
+
+        extract_delimited_args("foo{a}", "{[{")
+        -> (["a"], 5)  # Stops at first missing required argument
+    """
+    spans, end_pos = find_delimited_arg_spans(content, delimiter_pattern, start)
+    results = [content[span[0] : span[1]] if span else None for span in spans]
+    return results, end_pos
 
 
 if __name__ == "__main__":
@@ -0,0 +1,12 @@
+import pytest
+
+from latex2json.utils import disk_cache
+
+
+@pytest.fixture
+def tmp_cache_dir(monkeypatch, tmp_path):
+    """An empty directory used as the disk cache for the test"""
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    monkeypatch.setenv(disk_cache.CACHE_DIR_ENV, str(cache_dir))
+    return cache_dir
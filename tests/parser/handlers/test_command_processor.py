@@ -412,3 +412,123 @@ def test_math_mode_only(processor, newdef_handler):
 
 if __name__ == "__main__":
     pytest.main([__file__])
+
+
+def test_indexed_lookup_matches_full_scan():
+    from latex2json.parser.handlers.command_manager import CommandManager
+
+    manager = CommandManager()
+    definitions = [
+        r"\newcommand{\foo}{FOO}",
+        r"\newcommand{\foobar}[1]{FOOBAR #1}",
+        r"\def\dlim#1.{DELIM #1}",
+        r"\newif\ifdraft",
+        r"\newcounter{thm}",
+        r"\newlength{\mylen}",
+        r"\expandafter\def\csname cs name\endcsname{CS}",
+        r"\let\bar\foo",
+        r"\renewcommand{\foo}{FOO2}",
+        r"\DeclareMathOperator{\argmax}{arg\,max}",
+    ]
+    for definition in definitions:
+        manager.process_definition(definition)
+    processor = manager.processor
+
+    text = (
+        r"\foo \foobar{x} \dlimabc. \drafttrue \draftfalse \thethm \mylen"
+        r" \csname cs name\endcsname \bar \argmax \foox \unknown"
+    )
+    for pos in range(len(text)):
+        expected = [
+            cmd["pattern"]
+            for cmd in processor.get_command_iter(False)
+            if cmd["pattern"].match(text, pos)
+        ]
+        found = [
+            cmd["pattern"]
+            for cmd in processor._candidate_commands(text, pos)
+            if cmd["pattern"].match(text, pos)
+        ]
+        assert found == expected, text[pos:]
+
+
+def test_expand_single_pass():
+    from latex2json.parser.handlers.command_manager import CommandManager
+
+    manager = CommandManager()
+    definitions = [
+        r"\newcommand{\x}{x}",
+        r"\newcommand{\ab}{a b}",
+        r"\newcommand{\nest}{\x\ab}",
+        r"\newcommand{\calR}{\mathcal R}",
+        r"\newcommand{\pair}[2]{(#1, #2)}",
+        r"\def\self{\self}",
+        r"\def\grow{\grow x}",
+    ]
+    for definition in definitions:
+        manager.process_definition(definition)
+    processor = manager.processor
+
+    # nested macros expand left to right, in place
+    assert processor.expand_commands(r"\nest")[0] == "xa b"
+    assert processor.expand_commands(r"\pair{\nest}{\x}")[0] == "(xa b, x)"
+
+    # same math mode wrapping as substituting each pattern over the whole text
+    text = r"\calR\calR \calR_\ab \pair{\ab}{\calR}"
+    expected, _ = processor._expand_by_passes(
+        text, processor.commands, processor._views[True], True
+    )
+    assert processor.expand_commands(text, math_mode=True)[0] == expected
+
+    # a macro that expands to itself is left as is
+    assert processor.expand_commands(r"\self y")[0] == r"\self y"
+    with pytest.raises(RecursionError):
+        processor.expand_commands(r"\grow")
+
+
+def test_expand_cache():
+    from latex2json.parser.handlers.command_manager import CommandManager
+
+    manager = CommandManager()
+    manager.process_definition(r"\newcommand{\foo}{FOO}")
+    processor = manager.processor
+    processor.expand_cache_size = 2
+
+    assert processor.expand_commands(r"\foo x")[0] == "FOO x"
+    assert processor.expand_commands(r"\foo x")[0] == "FOO x"
+    assert processor.expand_commands(r"\foo x", math_mode=True)[0] == "FOO x"
+    info = processor.expand_cache_info()
+    assert (info["hits"], info["misses"]) == (1, 2)
+
+    # a redefinition mid-document is picked up
+    manager.process_definition(r"\renewcommand{\foo}{BAR}")
+    assert processor.expand_commands(r"\foo x")[0] == "BAR x"
+
+    # size cap, least recently used goes first
+    processor.expand_commands("a")
+    processor.expand_commands("b")
+    assert processor.expand_cache_info()["size"] == 2
+    processor.expand_commands(r"\foo x")
+    assert processor.expand_cache_info()["misses"] == 6
+
+    processor.clear()
+    assert processor.expand_cache_info() == {
+        "hits": 0,
+        "misses": 0,
+        "size": 0,
+        "maxsize": 2,
+    }
+
+
+def test_math_and_text_views_follow_redefinitions(processor):
+    processor.process_newcommand("foo", "MATH", 0, [], r"\\foo", math_mode_only=True)
+    assert processor.expand_commands(r"\foo")[0] == r"\foo"
+    assert processor.expand_commands(r"\foo", math_mode=True)[0] == "MATH"
+
+    processor.process_newcommand("foo", "ANY", 0, [], r"\\foo")
+    assert processor.expand_commands(r"\foo")[0] == "ANY"
+    assert processor.expand_commands(r"\foo", math_mode=True)[0] == "ANY"
+
+    processor.process_newcommand("foo", "MATH", 0, [], r"\\foo", math_mode_only=True)
+    assert processor.expand_commands(r"\foo")[0] == r"\foo"
+    assert processor.has_command("foo")
@@ -335,6 +335,21 @@ def test_search(handler):
     assert handler.search(r"\scacac assd \asd \ref{xx}") == len(r"\scacac assd \asd ")
     assert handler.search(r"\scacac assd \asd \re") is None
 
+    # search from an offset returns positions in the full string
+    text = r"\ref{a} \asd \ref{b}"
+    assert handler.search(text, 1) == len(r"\ref{a} \asd ")
+
+
+def test_handle_at_offset(handler):
+    text = r"PRE \section{Title} POST"
+    pos = len("PRE ")
+    assert handler.can_handle(text, pos)
+    assert not handler.can_handle(text)
+    token, end_pos = handler.handle(text, pos=pos)
+    assert token["type"] == "section"
+    assert token["title"] == "Title"
+    assert text[end_pos:] == " POST"
+
 
 if __name__ == "__main__":
     pytest.main([__file__])
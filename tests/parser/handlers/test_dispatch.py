@@ -0,0 +1,124 @@
+import os
+import re
+
+import pytest
+
+from latex2json.parser.handlers import dispatch
+from latex2json.parser.handlers.dispatch import (
+    HandlerDispatchTable,
+    PatternDispatchTable,
+    literal_prefixes,
+    pattern_prefixes,
+)
+from latex2json.parser.handlers.item import ItemHandler
+from latex2json.parser.handlers.equation import EquationHandler
+from latex2json.parser.handlers.base import TokenHandler
+from latex2json.parser.tex_parser import LatexParser
+
+dir_path = os.path.dirname(os.path.abspath(__file__))
+
+
+class AnyHandler(TokenHandler):
+    def can_handle(self, content: str, pos: int = 0) -> bool:
+        return True
+
+    def handle(self, content, prev_token=None, pos=0):
+        return None, pos + 1
+
+
+def test_pattern_prefixes():
+    assert pattern_prefixes([re.compile(r"\\(?:sub)*section\*?\s*{")]) == {
+        r"\sub",
+        r"\section",
+    }
+    assert pattern_prefixes([re.compile(r"\\[cC]ref\s*{")]) == {r"\cref", r"\Cref"}
+    assert pattern_prefixes([re.compile(r"(?<!\\)%([^\n]*)")]) == {"%"}
+    # shorter prefixes cover longer ones
+    assert pattern_prefixes(
+        [re.compile(r"\\begin\s*\{equation\}"), re.compile(r"\\begin")]
+    ) == {r"\begin"}
+    # can start with anything
+    assert pattern_prefixes([re.compile(r"\w+")]) == {""}
+
+
+def test_pattern_prefixes_ignorecase():
+    prefixes = pattern_prefixes([re.compile(r"\\and\b", re.IGNORECASE)])
+    assert r"\and" in prefixes and r"\AND" in prefixes and r"\aNd" in prefixes
+    prefixes = pattern_prefixes([re.compile(r"\\is", re.IGNORECASE)])
+    assert "\\\u0131\u017f" in prefixes
+
+
+def test_candidates_keep_handler_order():
+    item, equation, fallback = ItemHandler(), EquationHandler(), AnyHandler()
+    table = HandlerDispatchTable([item, fallback, equation])
+    assert table.candidates(r"\item x") == [item, fallback]
+    assert table.candidates(r"text $x$", 5) == [fallback, equation]
+    assert table.candidates(r"\itemsep") == [item, fallback]
+    assert table.candidates("plain") == [fallback]
+    assert table.candidates("") == [fallback]
+
+
+def test_tables_share_trie_per_handler_types():
+    first = HandlerDispatchTable([ItemHandler(), EquationHandler(), AnyHandler()])
+    item, equation, fallback = ItemHandler(), EquationHandler(), AnyHandler()
+    second = HandlerDispatchTable([item, equation, fallback])
+    assert second.trie is first.trie
+    # candidates are still this table's handlers
+    assert second.candidates(r"\item x") == [item, fallback]
+    assert second.candidates("$x$") == [equation, fallback]
+
+    other = HandlerDispatchTable([equation, item])
+    assert other.trie is not first.trie
+    assert other.candidates(r"\item x") == [item]
+
+
+def test_prefixes_fall_back_when_regex_parsing_fails(monkeypatch):
+    class BrokenParser:
+        @staticmethod
+        def parse(pattern, flags=0):
+            raise ValueError("unsupported")
+
+    pattern = re.compile(r"\\fallbacktest\s*{")
+    monkeypatch.setattr(dispatch, "sre_parse", BrokenParser)
+    dispatch._literal_prefixes.cache_clear()
+    try:
+        assert literal_prefixes(pattern) == {""}
+        # an unknown prefix makes the item a candidate everywhere
+        table = PatternDispatchTable({"fallback": pattern})
+        assert table.candidates("plain") == ["fallback"]
+
+        monkeypatch.setattr(dispatch, "sre_parse", None)
+        dispatch._literal_prefixes.cache_clear()
+        assert literal_prefixes(pattern) == {""}
+    finally:
+        dispatch._literal_prefixes.cache_clear()
+
+
+def test_pattern_candidates_keep_pattern_order():
+    table = PatternDispatchTable(
+        {
+            "number": re.compile(r"\d+"),
+            "hbox": re.compile(r"\\hbox\b"),
+            "any_command": re.compile(r"\\[a-z]+"),
+            "hspace": re.compile(r"\\hspace\s*\{"),
+        }
+    )
+    assert table.candidates(r"\hspace{1pt}") == ["any_command", "hspace"]
+    assert table.candidates(r"x \hbox{}", 2) == ["hbox", "any_command"]
+    assert table.candidates("12") == ["number"]
+    assert table.candidates("x") == []
+
+
+def test_candidates_cover_can_handle():
+    parser = LatexParser()
+    with open(os.path.join(dir_path, "..", "samples", "example.tex")) as f:
+        content = f.read()
+
+    for pos in range(len(content)):
+        candidates = parser.handler_table.candidates(content, pos)
+        for handler in parser.handlers:
+            if handler not in candidates:
+                assert not handler.can_handle(content, pos), (
+                    type(handler).__name__,
+                    content[pos : pos + 30],
+                )
@@ -1,8 +1,15 @@
 import pytest
+from latex2json.parser.handlers import environment
 from latex2json.parser.handlers.environment import (
+    ENVIRONMENT_PATTERN,
+    BaseEnvironmentHandler,
+    EnvStartIndex,
     EnvironmentHandler,
     convert_any_env_pairs_to_begin_end,
+    environment_starts_at,
 )
+from latex2json.utils.brace_index import IndexCache
+from latex2json.utils.splice_buffer import SpliceBuffer
 from latex2json.parser.handlers.new_definition import NewDefinitionHandler
 
 
@@ -254,5 +261,63 @@ def test_subfigure(handler):
     assert content[pos:].strip() == "POST"
 
 
+def test_env_start_index():
+    text = r"\foo x \bar@baz \bgroup y\egroup \begin{a} \enda \endbar z \list \endlist"
+    index = EnvStartIndex(text)
+    for pos in range(len(text) + 1):
+        match = BaseEnvironmentHandler.search(text, pos)
+        assert index.next_start(pos) == (match.start() if match else None)
+    # \bar@baz only pairs up with \endbar at the word boundary before the @
+    assert EnvStartIndex(text).next_start(0) == text.index(r"\bar@baz")
+    assert EnvStartIndex(text).next_start(len(text)) is None
+
+
+def test_environment_starts_at(monkeypatch, handler):
+    padding = " " * EnvStartIndex.MIN_TEXT_LENGTH
+    text = (
+        r"\foo x \bar@baz \begin {a} \begin x \enda \endbar z \list \endlist" + padding
+    )
+    for pos in range(len(text)):
+        expected = ENVIRONMENT_PATTERN.match(text, pos) is not None
+        assert environment_starts_at(text, pos) == expected, text[pos : pos + 10]
+
+    # the regex is only run once an environment is known to start
+    class NoMatch:
+        pattern = ENVIRONMENT_PATTERN.pattern
+
+        def match(self, content, pos=0):
+            raise AssertionError("ENVIRONMENT_PATTERN.match on a long text")
+
+    monkeypatch.setattr(environment, "ENVIRONMENT_PATTERN", NoMatch())
+    assert not handler.can_handle(text, text.index(r"\foo"))
+    assert handler.handle(text, pos=text.index(r"\foo")) == (None, 0)
+
+
+def test_env_start_index_after_splice():
+    padding = " " * EnvStartIndex.MIN_TEXT_LENGTH
+    text = r"\foo \bar \baz \endbar" + padding
+    buffer = SpliceBuffer(text, context=2)
+    with IndexCache().use():
+        index = EnvStartIndex.for_text(buffer.text)
+        assert index.pair_name(0) is None
+        assert index.pair_name(text.index(r"\bar")) == "bar"
+
+        # \bar is consumed, \endfoo is spliced in, \endbar is left in the tail
+        pos = buffer.splice(0, text.index(r"\baz"), r"\foo \endfoo \bar ")
+        spliced = EnvStartIndex.for_text(buffer.text)
+        assert spliced is not index and spliced._last_end is not None
+        fresh = EnvStartIndex(buffer.text)
+        for i in range(len(buffer.text)):
+            assert spliced.pair_name(i) == fresh.pair_name(i)
+        assert spliced.pair_name(pos) == "foo"
+
+        # a name spliced in in part, completed by the tail
+        buffer = SpliceBuffer(r"\a \x da" + padding, context=0)
+        assert EnvStartIndex.for_text(buffer.text).pair_name(0) is None
+        buffer.splice(0, buffer.text.index("da"), r"\a \en")
+        assert EnvStartIndex.for_text(buffer.text).pair_name(0) == "a"
+        assert EnvStartIndex(buffer.text).pair_name(0) == "a"
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
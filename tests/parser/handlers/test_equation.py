@@ -22,6 +22,39 @@ def test_can_handle_display_equations(handler):
     assert handler.can_handle(r"\begin{equation}x^2\end{equation}")
 
 
+def test_can_handle_only_at_equation_starts(handler):
+    content = (
+        r"text $x$ \[y\] \begin{align*}z\end{align} \begin{alignat}{2}w\end{alignat}"
+    )
+    starts = [pos for pos in range(len(content)) if handler.can_handle(content, pos)]
+    assert [content[pos : pos + 3] for pos in starts] == ["$x$", "\\[y", "\\be", "\\be"]
+
+    # can_handle then handle at the same position
+    pos = content.index("\\begin{alignat}")
+    assert handler.can_handle(content, pos)
+    token, end_pos = handler.handle(content, pos=pos)
+    assert token["content"] == "w"
+    assert content[end_pos:] == ""
+
+    # unclosed $ / \( do not start an equation
+    assert not handler.can_handle("$" + "x " * 1000)
+    assert not handler.can_handle(r"\(" + "x " * 1000)
+    assert not handler.can_handle(r"\begin{table}x\end{table}")
+
+
+def test_find_end(handler):
+    for content in [
+        r"$x^2$ POST",
+        r"$$ $$ POST",
+        r"\begin{align*}a \label{x}\end{align*} POST",
+        r"$\text{a $b$ c}$ POST",  # unbalanced until the proper end
+    ]:
+        token, end_pos = handler.handle(content)
+        assert handler.find_end(content) == end_pos
+        assert content[end_pos:] == " POST"
+    assert handler.find_end("x $y$", 1) == 0
+
+
 def test_handle_inline_equations(handler):
     # Test basic inline equation
     token, pos = handler.handle("$x^2$")
@@ -220,6 +253,23 @@ def test_equation_strip_formatting(handler):
     assert token
     assert token["content"].strip() == r"1+1\;222"
 
+    # box contents are stripped in turn, spacing is kept
+    equation = (
+        r"a\mbox{\hspace{1pt}b \kern2pt c}\,d \raisebox{1pt}{$e\quad$}\frac{1}{2}\today"
+    )
+    assert (
+        handler._strip_out_formatting(equation)
+        == r"a\hspace{1pt}b  c\,d e\quad\frac{1}{2}"
+    )
+
+
+def test_strip_table_built_on_first_strip():
+    first, second = EquationHandler(), EquationHandler()
+    assert first._strip_table is None
+    assert first._strip_out_formatting(r"\mbox{a}") == "a"
+    assert second._strip_out_formatting(r"\mbox{b}") == "b"
+    assert first._strip_table.trie is second._strip_table.trie
+
 
 def test_equation_with_includegraphics(handler):
     handler.should_extract_content_placeholders = True
@@ -150,5 +150,27 @@ Then we take the supremum over the relevant $R$ values. In $C^T_R$, we have $v\s
     assert c.endswith(r"In $C^T_R$, we have $v\sim r$ and $u\sim r$.%")
 
 
+def test_long_list(handler):
+    items = [r"\item entry \textbf{%d} \cite{x}" % i for i in range(500)]
+    items[250] += r" \begin{itemize}\item a \item b\end{itemize}"
+    content = "\n".join(items)
+
+    pos = 0
+    tokens = []
+    while pos < len(content):
+        token, end_pos = handler.handle(content, pos=pos)
+        tokens.append(token)
+        pos = end_pos
+        while pos < len(content) and content[pos].isspace():
+            pos += 1
+
+    assert len(tokens) == 500
+    assert tokens[0]["content"] == r"entry \textbf{0} \cite{x}"
+    assert tokens[250]["content"].endswith(
+        r"\begin{itemize}\item a \item b\end{itemize}"
+    )
+    assert tokens[-1]["content"] == r"entry \textbf{499} \cite{x}"
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
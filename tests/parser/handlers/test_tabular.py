@@ -1,6 +1,10 @@
 import pytest
 from latex2json.parser.handlers.formatting import FormattingHandler
-from latex2json.parser.handlers.tabular import TabularHandler
+from latex2json.parser.handlers.tabular import (
+    TabularHandler,
+    find_split_spans,
+    split_latex_content,
+)
 
 
 @pytest.fixture
@@ -233,3 +237,54 @@ def test_tabular_with_escaped_delimiters(handler):
     token, end_pos = handler.handle(text)
     assert token["type"] == "tabular"
     assert token["content"] == [[r"ssss \& 23333"]]
+
+
+def test_find_split_spans():
+    text = r" a & {b & c} & \& d &  & e \\ f"
+    spans = find_split_spans(text, "&")
+    assert [text[start:end] for start, end in spans] == [
+        "a",
+        "{b & c}",
+        r"\& d",
+        "",
+        r"e \\ f",
+    ]
+    assert split_latex_content(text, "&") == [text[s:e] for s, e in spans]
+
+    # empty rows are left out, \\\\ splits twice
+    rows = r"a \\ \\ b \\\\c \\"
+    assert split_latex_content(rows, r"\\", is_row_split=True) == ["a", "b", "c"]
+
+
+def test_cells_parsed_in_one_call():
+    calls = []
+
+    def parse_cells(contents):
+        calls.append(contents)
+        return [[{"type": "text", "content": content.upper()}] for content in contents]
+
+    handler = TabularHandler(cells_parser_fn=parse_cells)
+    text = r"""
+    \begin{tabular}{cc}
+        a & \multicolumn{2}{c}{b} \\
+        c & d
+    \end{tabular}
+    """.strip()
+    token, end_pos = handler.handle(text)
+    assert calls == [["a", "b", "c", "d"]]
+    assert token["content"] == [
+        ["A", {"content": "B", "rowspan": 1, "colspan": 2}],
+        ["C", "D"],
+    ]
+
+
+def test_large_tabular():
+    rows = [
+        " & ".join([r"\textbf{%d}" % row] + ["%d.%d" % (row, col) for col in range(14)])
+        for row in range(300)
+    ]
+    text = r"\begin{tabular}{ccc}" + " \\\\\n".join(rows) + r"\end{tabular}"
+    token, end_pos = TabularHandler().handle(text)
+    assert end_pos == len(text)
+    assert len(token["content"]) == 300
+    assert token["content"][-1][-1] == "299.13"
@@ -1,5 +1,6 @@
 import pytest
 from latex2json.parser.bib import BibParser
+from latex2json.utils.disk_cache import cache_key
 import os
 
 dir_path = os.path.dirname(os.path.abspath(__file__))
@@ -290,3 +291,68 @@ def test_bibdiv():
         entries[1].fields["author"]
         == "Chemin, Jean-Yves and Desjardins, Benoit and Gallagher, Isabelle and Grenier, Emmanuel"
     )
+
+
+def test_parse_cache(monkeypatch, tmp_cache_dir):
+    content = "@article{key1, title={First}, year={2020}}"
+
+    parser = BibParser()
+    entries = parser.parse(content)
+    assert [e.citation_key for e in entries] == ["key1"]
+    entries[0].fields["title"] = "changed"
+
+    # served from memory, as a copy of its own
+    monkeypatch.setattr(parser, "_parse", None)
+    cached = parser.parse(content)
+    assert cached[0].fields["title"] == "First"
+
+    # and from disk, once cleared or in a new process
+    parser.clear()
+    assert not parser._cache
+    assert parser.parse(content) == cached
+    assert BibParser().parse(content) == cached
+
+
+def test_memory_cache_size_cap(monkeypatch):
+    monkeypatch.setattr(BibParser, "MAX_CACHED_BYTES", 1000)
+    parser = BibParser()
+    contents = ["@misc{key%d, title={%s}}" % (i, "x" * 200) for i in range(3)]
+    for content in contents:
+        parser.parse(content)
+    sizes = [len(data) for data in parser._cache.values()]
+    assert parser._cached_bytes == sum(sizes) <= 1000
+    # the least recently used contents went first
+    assert len(sizes) < len(contents)
+    assert list(parser._cache)[-1] == cache_key(contents[-1])
+
+
+def test_parse_cited_entries_only():
+    content = r"""
+    @article{key1, title={First}}
+    @misc{key2, title={Second}}
+    @book{{weird}key3, title={Third}}
+    """
+    parser = BibParser()
+    entries = parser.parse(content, cite_keys={"key2", "{weird}key3"})
+    assert [e.citation_key for e in entries] == ["key2", "{weird}key3"]
+    assert entries[0].fields["title"] == "Second"
+
+    assert parser.parse(content, cite_keys=set()) == []
+    assert len(parser.parse(content)) == 3
+
+
+def test_cited_entries_not_cached(monkeypatch, tmp_cache_dir):
+    content = "@article{key1, title={First}} @misc{key2, title={Second}}"
+
+    parser = BibParser()
+    entries = parser.parse(content, cite_keys={"key2"})
+    assert [e.citation_key for e in entries] == ["key2"]
+    # a cache entry per citation set would rarely be hit again
+    assert not parser._cache
+    assert not list(tmp_cache_dir.rglob("*.bin"))
+
+    # the entries of a cached full parse are filtered instead
+    assert len(parser.parse(content)) == 2
+    monkeypatch.setattr(parser, "_parse", None)
+    entries = parser.parse(content, cite_keys={"key1"})
+    assert [e.citation_key for e in entries] == ["key1"]
@@ -1,7 +1,12 @@
 import pytest
+import gzip
 import os
+import tarfile
+import time
 from latex2json.parser import FRONTEND_STYLE_MAPPING, SECTION_LEVELS, PARAGRAPH_LEVELS
 from latex2json.parser.tex_parser import LatexParser
+from latex2json.parser.patterns import DELIM_PATTERN, find_next_delimiter
+from latex2json.utils.brace_index import BraceIndex
 from latex2json.utils.tex_utils import flatten_all_to_string
 from tests.parser.latex_samples_data import TRAINING_SECTION_TEXT
 
@@ -919,6 +924,11 @@ def test_tabular_with_escaped_delimiters(parser):
     assert parsed_tokens[0]["content"] == [[r"ssss & 23333"]]
 
 
+def test_parse_cells(parser):
+    cells = ["1.5", r"\textbf{x}", "", " a", r"50\%", "a{b}", "x -- y", r"$z$"]
+    assert parser.parse_cells(cells) == [parser.parse(cell) for cell in cells]
+
+
 def test_nested_newcommands(parser):
     text = r"""
     \newcommand{\pow}[2][2]{#2^{#1}}
@@ -1273,6 +1283,109 @@ Tomoyuki Kaneko and Kunihito Hoki.
     assert parsed_tokens[1]["content"].strip() == "Hi there"
 
 
+def test_cited_bibliography_only():
+    parser = LatexParser(cited_bib_only=True)
+    parser.current_file_dir = samples_dir_path
+    text = r"""
+    See \cite{Hinton06}.
+    \bibliography{bibtex}
+    """
+    parsed_tokens = parser.parse(text)
+    bibliography = parsed_tokens[-1]
+    assert bibliography["type"] == "bibliography"
+    assert [t["cite_key"] for t in bibliography["content"]] == ["Hinton06"]
+    assert parser.cite_keys == {"Hinton06"}
+
+    # citations after the bibliography count as well
+    parser.clear()
+    parser.current_file_dir = samples_dir_path
+    text = r"""
+    \bibliography{bibtex}
+    See \citep{Bengio+chapter2007}.
+    """
+    parsed_tokens = parser.parse(text)
+    bibliography = parsed_tokens[0]
+    assert [t["cite_key"] for t in bibliography["content"]] == ["Bengio+chapter2007"]
+
+
+def test_fused_preprocess():
+    text = r"""
+    \documentclass{basecls}
+    \usepackage{package1}
+    \newcommand{\test}{TEST}
+    \def\pair#1#2{(#1, #2)}
+
+    \section{Intro}   \test{} and ``quoted'' text,
+    split   over\, lines \pair{a}{b}.
+
+    \begin{equation}
+      x  =  \test
+      \label{eq:x}
+    \end{equation}
+    \foo \somecmd
+    """
+    two_pass = LatexParser()
+    two_pass.current_file_dir = samples_dir_path
+    fused = LatexParser()
+    fused.current_file_dir = samples_dir_path
+    expected = two_pass.parse(text, preprocess=True)
+    assert fused.parse(text, preprocess=True, fused=True) == expected
+    # definitions are registered as after a preprocessing pass
+    assert "test" in fused.preprocessor.command_manager.commands
+    assert "test" in fused.commands
+
+    example = os.path.join(samples_dir_path, "example.tex")
+    assert LatexParser().parse_file(example, fused=True) == LatexParser().parse_file(
+        example
+    )
+
+
+def test_fused_preprocess_matches_two_pass():
+    definitions = r"""
+    \newcommand{\zero}{Zero ``q'' text}
+    \newcommand{\one}[1]{One ``#1'' \textbf{#1}}
+    \newcommand{\nest}[1]{\one{#1} \zero}
+    \newcommand{\ms}{\mathbb{R}}
+    \newcommand{\pw}[1]{$2^#1$}
+    \def\ours{{\sc Ours}}
+    \newif\ifflag \flagtrue
+    \newenvironment{pf}{\paragraph{\it Proof.}}{\hfill$\square$}
+    """
+    texts = [
+        r"\@ifundefined{x}{a}{b} and \zero",
+        r"\one{``arg''} \nest{x  y}\@ifundefined{x}{a}{b}",
+        r"\pw{\ms} and $a  +  b$",
+        r"see~\noindent{x} \ours{} `single'",
+        r"\small\ifflag T\else F\fi word",
+        r"\two{``a''}{\zero} \small x\hspace{1em}",
+        "\\begin{pf}\nproof  text.\n\n more\n\\end{pf}",
+        r"\verb|``v''| \begin{verbatim}``x''  y\end{verbatim}",
+    ]
+    for text in texts:
+        text = definitions + text
+        expected = LatexParser().parse(text, preprocess=True)
+        assert LatexParser().parse(text, preprocess=True, fused=True) == expected
+
+
+def test_fused_preprocess_sample_papers(tmp_path):
+    test_data_path = os.path.join(dir_path, "..", "test_data")
+    papers = [os.path.join(test_data_path, "arXiv-2301.10945v1", "main.tex")]
+    with tarfile.open(os.path.join(test_data_path, "arXiv-1907.11692v1.tar.gz")) as tar:
+        tar.extractall(tmp_path / "roberta")
+    papers.append(str(tmp_path / "roberta" / "main.tex"))
+    with gzip.open(os.path.join(test_data_path, "arXiv-2301.10303v4.gz"), "rt") as f:
+        text = f.read()
+    # a pass takes the $ after \\ for an escaped one and swaps math and text from
+    # there on, which the parse loop does not follow (see LatexParser.parse)
+    assert text.count(r"\\$") == 1
+    (tmp_path / "sumsets.tex").write_text(text.replace(r"\\$", r"\\ $"))
+    papers.append(str(tmp_path / "sumsets.tex"))
+
+    for paper in papers:
+        expected = LatexParser().parse_file(paper)
+        assert LatexParser().parse_file(paper, fused=True) == expected
+
+
 def test_user_defined_commands_override(parser):
     text = r"""
     \noindent % should be ignored by formatter
@@ -2211,5 +2324,64 @@ def test_strip_boxes_in_equation(parser):
     # more complex setbox cases
 
 
+def test_find_next_delimiter_matches_sliced_search():
+    text = r"abc {x} \\alpha \\\beta $x$ \{y\} %c d{}e \^"
+    for pos in range(len(text) + 1):
+        match = DELIM_PATTERN.search(text[pos:])
+        expected = pos + match.start() if match else -1
+        assert find_next_delimiter(text, pos) == expected
+
+
+SCALING_BLOCK = r"""
+\newcommand{\macro%(name)s}[1]{\textbf{#1} value}
+Text with $x_1 + y^2$ and \macro%(name)s{arg}, see \cite{key} and \ref{eq%(name)s}.
+\begin{equation}
+  a = b + c \label{eq%(name)s}
+\end{equation}
+\begin{itemize}
+  \item first \macro%(name)s{one}
+  \item second
+\end{itemize}
+"""
+
+
+def test_parse_time_scales_linearly():
+    def parse_time(n):
+        # macro names are letters only: a, b, ..., z, ba, bb, ...
+        names = []
+        for i in range(n):
+            name = ""
+            while True:
+                i, r = divmod(i, 26)
+                name = chr(97 + r) + name
+                if not i:
+                    break
+            names.append(name)
+        content = "".join(SCALING_BLOCK % {"name": name} for name in names)
+        best = float("inf")
+        for _ in range(3):
+            parser = LatexParser()
+            start = time.perf_counter()
+            parser.parse(content)
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    # a document 4 times as long takes about 4 times as long to parse (quadratic
+    # lookups made it 9-10 times)
+    assert parse_time(400) / parse_time(100) < 7
+
+
+def test_index_cache_released_on_clear(parser):
+    text = r"\textbf{%s}" % ("x" * BraceIndex.MIN_TEXT_LENGTH)
+    parser.parse(text)
+    # the indexes are only used while parsing, and kept until clear
+    assert parser.index_cache._indexes
+    assert BraceIndex.for_text(text) is not BraceIndex.for_text(text)
+    with parser.index_cache.use():
+        assert BraceIndex.for_text(text) is BraceIndex.for_text(text)
+    parser.clear()
+    assert not parser.index_cache._indexes
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
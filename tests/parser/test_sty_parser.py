@@ -52,3 +52,33 @@ def test_sty_parser():
     check_tokens(tokens)
 
     parser.clear()
+
+
+def test_sty_parser_disk_cache(monkeypatch, tmp_path, tmp_cache_dir):
+    sty_dir = tmp_path / "sty"
+    sty_dir.mkdir()
+    sty_file = sty_dir / "style.sty"
+    sty_file.write_text(
+        "\\newif\\ifdraft\n\\newcommand{\\foo}{bar}\n\\RequirePackage{extra}\n"
+        "\\define@key{fam}{size}[10]{\\def\\size{#1}}\n"
+    )
+
+    parser = LatexStyParser()
+    tokens = parser.parse_file(str(sty_file))
+    assert [t["name"] for t in tokens] == ["draft", "foo"]
+
+    # a new parser gets the tokens (and the \newif, \define@key) without parsing
+    # the file again
+    parser = LatexStyParser()
+    monkeypatch.setattr(parser, "parse", None)
+    assert parser.parse_file(str(sty_file)) == tokens
+    assert parser.if_else_block_handler.has_if("draft")
+    assert "newif:draft" in parser.command_manager.commands
+    key_definitions = parser.command_manager.keyval_handler.key_definitions
+    assert key_definitions["fam"]["size"].default == "10"
+
+    # extra.sty exists now, so the cached result no longer applies
+    (sty_dir / "extra.sty").write_text("\\newcommand{\\baz}{qux}\n")
+    parser = LatexStyParser()
+    tokens = parser.parse_file(str(sty_file))
+    assert [t["name"] for t in tokens] == ["draft", "foo", "baz"]
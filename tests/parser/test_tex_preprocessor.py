@@ -1,6 +1,11 @@
 import pytest
 import os
-from latex2json.parser.tex_preprocessor import LatexPreprocessor
+from latex2json.parser.tex_preprocessor import (
+    LatexPreprocessor,
+    _combine_patterns,
+    restore_placeholder_blocks,
+)
+import re
 
 
 @pytest.fixture
@@ -175,3 +180,120 @@ def test_math_processing(preprocessor):
     assert tokens[0]["type"] == "newcommand"
     assert tokens[0]["name"] == "abs"
     assert processed.strip() == r"$\abs$"
+
+
+def test_restore_placeholder_blocks():
+    blocks = {
+        "__MATH_BLOCK_0__": "$a$",
+        "__MATH_BLOCK_1__": "$b__MATH_BLOCK_2__$",
+        "__MATH_BLOCK_2__": "c",
+        "__MATH_BLOCK_10__": "$d$",
+    }
+    content = "__MATH_BLOCK_10__ x __MATH_BLOCK_1__ __MATH_BLOCK_0____MATH_BLOCK_3__"
+    assert (
+        restore_placeholder_blocks(content, blocks) == "$d$ x $bc$ $a$__MATH_BLOCK_3__"
+    )
+    # a block holding an earlier placeholder keeps it, as with replacing them in turn
+    blocks = {
+        "__VERBATIM_BLOCK__0__": "v",
+        "__VERBATIM_BLOCK__1__": "__VERBATIM_BLOCK__0__",
+    }
+    assert restore_placeholder_blocks("__VERBATIM_BLOCK__1__", blocks) == (
+        "__VERBATIM_BLOCK__0__"
+    )
+    assert restore_placeholder_blocks("<a>", {"<a>": "b"}) == "b"
+
+
+def test_many_math_blocks(preprocessor):
+    text = " ".join(r"$x_{%d}$ and" % i for i in range(3000))
+    processed, tokens = preprocessor.preprocess(text)
+    assert processed == text
+
+
+def test_rule_stats(preprocessor):
+    text = r"""
+    \newcommand{\test}{TEST}
+    \unknown\test ``quoted'' $x$ \unknown``
+    """
+    processed, tokens = preprocessor.preprocess(text)
+    assert processed.strip() == '\\unknownTEST "quoted" $x$ \\unknown``'
+
+    stats = preprocessor.rule_stats
+    assert stats["definitions"]["hit"] == 1
+    assert stats["commands"]["hit"] == 1
+    assert stats["quotes"]["hit"] == 1
+    assert stats["equation"]["hit"] == 1
+    # both \unknown and the trailing `` fall through every rule
+    assert stats["if_else"]["miss"] >= 2
+    assert stats["add_to"]["hit"] == 0
+
+    preprocessor.clear()
+    assert preprocessor.rule_stats["commands"] == {"hit": 0, "miss": 0}
+
+
+def test_verbatim_whitespace_kept(preprocessor):
+    text = r"""
+    before   \verb|a  b|   mid
+
+    \begin{lstlisting}
+x  =  1
+\end{lstlisting}
+    \begin{tikzpicture}
+      \draw (0,0);
+    \end{tikzpicture}   after
+    """
+    processed, _ = preprocessor.preprocess(text)
+    assert processed == (
+        "before \\verb|a  b| mid\n"
+        "\\begin{lstlisting}\nx  =  1\n\\end{lstlisting} "
+        "\\begin{tikzpicture}\n      \\draw (0,0);\n    \\end{tikzpicture} after"
+    )
+
+
+def test_rewrite_at(preprocessor):
+    text = r"x ``quoted'' \addto\cmd{y} \usepackage{package1} \vspace{1em}$a  b$ \foo"
+    pos = text.index("``")
+    assert preprocessor.rewrite_at(text, pos) == (
+        '"quoted"',
+        text.index(" \\addto"),
+        [],
+    )
+    pos = text.index("\\addto")
+    assert preprocessor.rewrite_at(text, pos) == ("", text.index("{y}"), [])
+    pos = text.index("\\usepackage")
+    replacement, end_pos, tokens = preprocessor.rewrite_at(
+        text, pos, file_dir=sample_path
+    )
+    assert (replacement, text[end_pos : end_pos + 2]) == ("", " \\")
+    # definitions are registered as in a pass, and returned for the caller as well
+    assert [t["name"] for t in tokens] == ["foo"]
+    assert "foo" in preprocessor.command_manager.commands
+    pos = text.index("\\vspace")
+    assert preprocessor.rewrite_at(text, pos) == ("\n", text.index("$"), [])
+    pos = text.index("$")
+    assert preprocessor.rewrite_at(text, pos) == ("$a b$", text.index(" \\foo"), [])
+    # math already collapsed and unknown commands are left to the parser
+    hits = preprocessor.rule_stats["equation"]["hit"]
+    assert preprocessor.rewrite_at("$a b$", 0) == (None, 5, [])
+    assert preprocessor.rule_stats["equation"]["hit"] == hits + 1
+    assert preprocessor.rewrite_at(r"\bar", 0)[0] is None
+
+
+def test_combine_patterns():
+    combined = _combine_patterns(
+        [re.compile(r"(a)\1"), re.compile(r"(b).(\w)\2\1", re.DOTALL)]
+    )
+    assert combined.pattern == r"(?-s:(a)\1)|(?s:(b).(\w)\3\2)"
+    assert combined.match("b\nccb")
+
+    # patterns that would read differently once combined
+    for pattern in [
+        re.compile(r"(a)(b)(c)(d)(e)(f)(g)(h)(i)(j)\10"),
+        re.compile(r"(a)\0"),
+        re.compile(r"(a)[\1]"),
+        re.compile(r"(?P<x>a)(?P=x)"),
+        re.compile(r"a", re.IGNORECASE),
+        re.compile(r"^a", re.MULTILINE),
+    ]:
+        with pytest.raises(ValueError):
+            _combine_patterns([re.compile(r"(x)\1"), pattern])
@@ -0,0 +1,67 @@
+from latex2json.utils.brace_index import BraceIndex, IndexCache
+from latex2json.utils.tex_utils import extract_nested_content
+
+
+def test_find_pair():
+    text = r"{a{b}\{c\}d} [x[y]] \\{z}"
+    index = BraceIndex(text)
+    assert index.find_pair(0) == (0, 12)
+    assert index.find_pair(2) == (2, 5)
+    assert index.find_pair(13, "[", "]") == (13, 19)
+    assert index.find_pair(15, "[", "]") == (15, 18)
+    # \\ is an escaped backslash, so the brace after it opens a group
+    assert index.find_pair(text.index("{z}")) == (text.index("{z}"), len(text))
+
+
+def test_find_pair_unknown():
+    text = r"{a} \{b} {c"
+    index = BraceIndex(text)
+    assert index.find_pair(text.index("c")) is None
+    # escaped brace
+    assert index.find_pair(text.index(r"\{") + 1) is None
+    # never closed
+    assert index.find_pair(text.index("{c")) is None
+    # not an indexed delimiter pair
+    assert index.find_pair(0, "(", ")") is None
+    assert index.find_pair(0, "{", "]") is None
+
+
+def test_lookups_before_scan_origin():
+    text = "{a} {b}"
+    index = BraceIndex(text)
+    assert index.find_pair(4) == (4, 7)
+    # the scan started at 4, earlier groups are left to the plain scan
+    assert index.find_pair(0) is None
+
+
+def test_for_text_reuses_index():
+    text = "x" * BraceIndex.MIN_TEXT_LENGTH + "{a{b}c}"
+    # without an active cache every lookup gets a new index
+    assert BraceIndex.for_text(text) is not BraceIndex.for_text(text)
+
+    cache = IndexCache()
+    with cache.use():
+        index = BraceIndex.for_text(text)
+        assert BraceIndex.for_text(text) is index
+        assert BraceIndex.for_text(text + " ") is not index
+
+        start = BraceIndex.MIN_TEXT_LENGTH
+        assert extract_nested_content(text, start=start) == ("a{b}c", len(text))
+        assert index.find_pair(start + 2) == (start + 2, start + 5)
+
+        cache.clear()
+        assert BraceIndex.for_text(text) is not index
+    assert BraceIndex.for_text(text) is not index
+
+
+def test_cache_keeps_recent_texts():
+    cache = IndexCache()
+    texts = ["x" * BraceIndex.MIN_TEXT_LENGTH + str(i) for i in range(20)]
+    with cache.use():
+        first = BraceIndex.for_text(texts[0])
+        for text in texts[1 : IndexCache.MAX_CACHED_TEXTS]:
+            BraceIndex.for_text(text)
+        assert BraceIndex.for_text(texts[0]) is first
+        for text in texts[IndexCache.MAX_CACHED_TEXTS :]:
+            BraceIndex.for_text(text)
+        assert BraceIndex.for_text(texts[0]) is not first
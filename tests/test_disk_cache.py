@@ -0,0 +1,79 @@
+import marshal
+import os
+
+from latex2json.utils import disk_cache
+from latex2json.utils.disk_cache import cache_key, load_cache, save_cache
+
+
+class Bytes:
+    """serializer storing bytes as they are, so entry sizes are exact"""
+
+    dumps = staticmethod(bytes)
+    loads = staticmethod(bytes)
+
+
+def test_cache_disabled_by_default(monkeypatch):
+    monkeypatch.delenv(disk_cache.CACHE_DIR_ENV, raising=False)
+    save_cache("test", "key", {"a": 1})
+    assert load_cache("test", "key") is None
+
+
+def test_cache_round_trip(tmp_cache_dir):
+    key = cache_key("some", b"content")
+    assert key == cache_key("some", b"content")
+    assert key != cache_key("some", b"other content")
+    assert key != cache_key("somecontent")
+
+    assert load_cache("test", key) is None
+    save_cache("test", key, {"a": [1, 2]})
+    assert load_cache("test", key) == {"a": [1, 2]}
+
+    save_cache("marshal", key, [("a", 1)], serializer=marshal)
+    assert load_cache("marshal", key, serializer=marshal) == [("a", 1)]
+    # nothing left behind but the entries and their total size
+    assert sorted(p.name for p in tmp_cache_dir.rglob("*") if p.is_file()) == [
+        key + ".bin",
+        key + ".bin",
+        disk_cache.SIZE_FILE,
+    ]
+
+
+def test_unreadable_entry_is_ignored(tmp_cache_dir):
+    (tmp_cache_dir / "test").mkdir()
+    (tmp_cache_dir / "test" / "key.bin").write_bytes(b"not a pickle")
+    assert load_cache("test", "key") is None
+
+
+def test_evict_least_recently_used(monkeypatch, tmp_cache_dir):
+    monkeypatch.setenv(disk_cache.CACHE_MAX_BYTES_ENV, "250")
+    for i, key in enumerate(["a", "b", "c"]):
+        save_cache("test", key, b"x" * 100, serializer=Bytes)
+        # distinct modification times, oldest first
+        os.utime(tmp_cache_dir / "test" / (key + ".bin"), (i, i))
+    # the oldest entry went to make room for c, using b makes a the oldest next
+    assert load_cache("test", "a", serializer=Bytes) is None
+    assert load_cache("test", "b", serializer=Bytes) == b"x" * 100
+    save_cache("test", "d", b"x" * 100, serializer=Bytes)
+    assert load_cache("test", "c", serializer=Bytes) is None
+    assert load_cache("test", "b", serializer=Bytes) == b"x" * 100
+    assert load_cache("test", "d", serializer=Bytes) == b"x" * 100
+
+
+def test_save_scans_only_when_full(monkeypatch, tmp_cache_dir):
+    monkeypatch.setenv(disk_cache.CACHE_MAX_BYTES_ENV, "1000")
+    scans = []
+    walk = os.walk
+    monkeypatch.setattr(os, "walk", lambda path: scans.append(path) or walk(path))
+
+    # the first save finds the total size, the next ones add to it
+    for key in "abcde":
+        save_cache("test", key, b"x" * 100, serializer=Bytes)
+    assert len(scans) == 1
+    assert (tmp_cache_dir / disk_cache.SIZE_FILE).read_text() == "500"
+
+    # over the cap: one scan evicts down to 90% of it
+    for key in "fghijk":
+        save_cache("test", key, b"x" * 100, serializer=Bytes)
+    assert len(scans) == 2
+    assert len(list(tmp_cache_dir.rglob("*.bin"))) == 9
+    assert (tmp_cache_dir / disk_cache.SIZE_FILE).read_text() == "900"
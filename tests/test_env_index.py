@@ -0,0 +1,46 @@
+from latex2json.utils.env_index import EnvIndex
+from latex2json.utils.tex_utils import find_matching_env_block
+
+
+def test_find_block():
+    text = (
+        r"\begin{a} x \begin{b} \begin{a} y \end{a} \end{b} \end {a} \begin{a}z\end{a}"
+    )
+    index = EnvIndex(text)
+    start, end, content = index.find_block("a")
+    assert start == 0
+    assert text[end:] == r" \begin{a}z\end{a}"
+    assert content == r"x \begin{b} \begin{a} y \end{a} \end{b}"
+
+    # nested and following environments are looked up in the same table
+    start, end, content = index.find_block("b", 1)
+    assert text[start:end] == r"\begin{b} \begin{a} y \end{a} \end{b}"
+    assert content == r"\begin{a} y \end{a}"
+    start, end, content = index.find_block("a", end)
+    assert text[start:end] == r"\begin{a}z\end{a}"
+    assert content == "z"
+
+
+def test_find_block_not_found():
+    text = r"\begin{a} \begin{a} \end{a}"
+    index = EnvIndex(text)
+    assert index.find_block("a") == (-1, -1, "")
+    assert index.find_block("a", 1) == (text.index(r"\begin{a} \end"), len(text), "")
+    assert index.find_block("b") == (-1, -1, "")
+
+
+def test_find_block_unsupported():
+    index = EnvIndex(r"\begin{a}{b} \begin{a} \end{a}")
+    assert index.find_block("a", 5) is not None
+    # before the scan origin
+    assert index.find_block("a", 0) is None
+    assert index.find_block(r"\a", 5) is None
+
+
+def test_find_matching_env_block_long_text():
+    inner = "x" * EnvIndex.MIN_TEXT_LENGTH
+    text = r"pre \begin{proof}%s\begin{proof}q\end{proof}\end{proof} post" % inner
+    start, end, content = find_matching_env_block(text, "proof")
+    assert start == 4
+    assert text[end:] == " post"
+    assert content == inner + r"\begin{proof}q\end{proof}"
@@ -89,3 +89,24 @@ def test_unicode_conversion(converter):
     input_text = r"\u0041 \u00a7"
     expected = "A §"
     assert converter.convert(input_text) == expected
+
+
+def test_command_boundaries(converter):
+    assert converter.convert(r"\alphaA") == r"\alphaA"
+    assert converter.convert(r"\alpha{}A") == "αA"
+    assert converter.convert(r"\alpha\beta") == "αβ"
+
+
+def test_category_precedence(converter):
+    # \texteuro (text) is converted before \mbox{\texteuro} (other) gets a chance
+    assert converter.convert(r"\mbox{\texteuro} x") == r"\mbox{€} x"
+    # escapes are decoded before any command is converted
+    assert converter.convert(r"\u005c\u0024 x") == "$ x"
+
+
+def test_cached_command_table(tmp_cache_dir):
+    table = LatexUnicodeConverter._load_command_table()
+    assert list(tmp_cache_dir.rglob("*.bin"))
+    # second load comes from the cache, and matches the freshly built table
+    assert LatexUnicodeConverter._load_command_table() == table
+    assert table == LatexUnicodeConverter._build_command_table()
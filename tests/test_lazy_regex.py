@@ -0,0 +1,30 @@
+import re
+
+from latex2json.utils.lazy_regex import LazyPattern, lazy_compile
+from latex2json.parser.handlers.dispatch import literal_prefixes
+
+
+def test_compiles_on_first_use():
+    pattern = lazy_compile(r"\\foo\s*{", re.DOTALL)
+    assert isinstance(pattern, LazyPattern)
+    assert pattern._compiled is None
+    # pattern and flags do not need the compiled pattern
+    assert pattern.pattern == r"\\foo\s*{"
+    assert pattern.flags == re.DOTALL
+    assert literal_prefixes(pattern) == frozenset([r"\foo"])
+    assert pattern._compiled is None
+
+    match = pattern.match(r"\foo {bar}")
+    assert match and match.end() == 6
+    assert pattern._compiled is not None
+    assert pattern.groups == 0
+
+
+def test_pattern_methods():
+    pattern = lazy_compile(r"(\d+)")
+    assert pattern.search("ab 12").group(1) == "12"
+    assert pattern.findall("1 22 333") == ["1", "22", "333"]
+    assert pattern.sub("x", "a1b2") == "axbx"
+    assert [m.start() for m in pattern.finditer("a1b2")] == [1, 3]
+    assert pattern.fullmatch("12")
+    assert pattern.compile() is pattern.compile()
@@ -0,0 +1,33 @@
+from latex2json.utils.splice_buffer import SpliceBuffer
+
+
+def test_splice_near_start():
+    buffer = SpliceBuffer(r"\foo bar", context=10)
+    pos = buffer.splice(0, 4, "FOO")
+    assert pos == 0
+    assert buffer.text == "FOO bar"
+    assert buffer.getvalue() == "FOO bar"
+
+
+def test_splice_drops_consumed_text():
+    text = "a" * 50 + r"\foo" + " rest"
+    buffer = SpliceBuffer(text, context=10)
+    pos = buffer.splice(50, 54, "FOO")
+    # only the lookbehind context is kept in the live text
+    assert pos == 10
+    assert buffer.text == "a" * 10 + "FOO rest"
+    assert buffer.text[pos:] == "FOO rest"
+    assert buffer.getvalue() == "a" * 50 + "FOO rest"
+
+    # splice again further along, positions are relative to the live text
+    pos = buffer.splice(pos + 3, pos + 4, "")
+    assert buffer.text[pos:] == "rest"
+    assert buffer.getvalue() == "a" * 50 + "FOOrest"
+
+
+def test_splice_without_keeping_consumed_text():
+    text = "a" * 50 + r"\foo" + " rest"
+    buffer = SpliceBuffer(text, context=10, keep_consumed=False)
+    pos = buffer.splice(50, 54, "FOO")
+    assert buffer.text[pos - 1 :] == "aFOO rest"
+    assert buffer.getvalue() == "a" * 10 + "FOO rest"
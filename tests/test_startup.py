@@ -0,0 +1,24 @@
+import json
+import subprocess
+import sys
+
+STARTUP_SCRIPT = """
+import json, sys
+import latex2json
+latex2json.TexReader()
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+def test_startup_skips_lazy_tables():
+    """`python -c 'import latex2json; TexReader()'` does not build the lookup tables
+    that are only needed on first use"""
+    result = subprocess.run(
+        [sys.executable, "-c", STARTUP_SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    modules = json.loads(result.stdout)
+    assert "latex2json.latex_maps._latex2unicode_map" not in modules
@@ -1,16 +1,21 @@
 import pytest
 from latex2json.utils.tex_utils import (
     extract_delimited_args,
+    extract_nested_content,
     extract_nested_content_sequence_blocks,
     extract_nested_content_pattern,
     find_matching_env_block,
     has_comment_on_sameline,
     find_matching_delimiter,
     normalize_whitespace_and_lines,
+    collapse_whitespace,
     strip_latex_comments,
     find_delimiter_end,
     extract_equation_content,
     substitute_args,
+    is_comment_stripped,
+    find_delimited_arg_spans,
+    find_nested_content_spans,
 )
 from latex2json.utils.conversions import int_to_roman
 import re
@@ -40,6 +45,23 @@ def test_find_matching_delimiter_with_double_backslash():
     assert text[start:end] == r"{\\\{escaped}"
 
 
+def test_extract_nested_content_with_start():
+    text = r"prefix {a {b}} suffix"
+    content, end = extract_nested_content(text, start=len("prefix"))
+    assert content == "a {b}"
+    assert text[end:] == " suffix"
+
+    # not found -> returns start i.e. nothing consumed
+    content, end = extract_nested_content(text, start=2)
+    assert content is None
+    assert end == 2
+
+    # the opening delimiter at start is never treated as escaped
+    text = r"\{a}"
+    start, end = find_matching_delimiter(text, start=1)
+    assert text[start:end] == "{a}"
+
+
 def test_find_matching_env_block():
     # Basic test
     text = r"\begin{test}inner content\end{test}"
@@ -155,6 +177,15 @@ def test_extract_nested_content_blocks():
     assert blocks == [" aaaa {bbbb}   ", "11{22{33 }}  "]
     assert text[total_pos:] == " aaaa {1123}"
 
+    # starting from an offset
+    text = r"\foo {a}{b} c"
+    blocks, total_pos = extract_nested_content_sequence_blocks(text, start=4)
+    assert blocks == ["a", "b"]
+    assert text[total_pos:] == " c"
+    blocks, total_pos = extract_nested_content_sequence_blocks(text, start=12)
+    assert blocks == []
+    assert total_pos == 12
+
 
 def test_has_uncommented_percent_before():
     # Basic comment case
@@ -211,6 +242,20 @@ def test_normalize_whitespace_and_lines():
     expected = "Hello world"
     assert normalize_whitespace_and_lines(input_text) == expected
 
+    # kept spans are left as they are, the text around them is normalized
+    input_text = "  a \n\n b \\verb| x  y | c  \n"
+    start = input_text.index("\\verb")
+    spans = [(start, input_text.index("c"))]
+    expected = "a\nb \\verb| x  y | c"
+    assert normalize_whitespace_and_lines(input_text, spans) == expected
+    expected = " a\nb \\verb| x  y | c "
+    assert normalize_whitespace_and_lines(input_text, spans, strip=False) == expected
+
+
+def test_collapse_whitespace():
+    assert collapse_whitespace("  a \n\n b\t\tc \n") == " a\nb c "
+    assert collapse_whitespace("a b") == "a b"
+
 
 def test_find_delimiter_end():
     # Basic test with single character delimiter
@@ -234,6 +279,41 @@ def test_find_delimiter_end():
     assert end_pos == -1
 
 
+class IndexCountingStr(str):
+    """str that counts the chars and slices read from it"""
+
+    def __new__(cls, value, reads):
+        text = super().__new__(cls, value)
+        text.reads = reads
+        return text
+
+    def __getitem__(self, key):
+        self.reads.append(key)
+        return super().__getitem__(key)
+
+
+def test_find_delimiter_end_long_paragraph():
+    # a long paragraph with a trailing unmatched $ used to take quadratic time,
+    # reading (a slice from) every char of it
+    paragraph = r"Some text with {braces}, \$5 and \{x\} math. " * 1000
+    text = "$" + paragraph + "$"
+    special_chars = sum(text.count(c) for c in "{}$")
+    assert special_chars * 8 < len(text)
+
+    reads = []
+    assert find_delimiter_end(IndexCountingStr(text, reads), 1, "$") == len(text)
+    # only the braces and $ are looked at (and the backslashes before them)
+    assert len(reads) <= 4 * special_chars
+    unclosed = text[:-1]
+    for delimiter in ["$", "$$"]:
+        reads.clear()
+        assert find_delimiter_end(IndexCountingStr(unclosed, reads), 1, delimiter) == -1
+        assert len(reads) <= 4 * special_chars
+    reads.clear()
+    assert extract_equation_content(IndexCountingStr(unclosed, reads), "$") == ("", 0)
+    assert len(reads) <= 4 * special_chars
+
+
 def test_strip_latex_comments():
 
     # Test basic single-line comments
@@ -281,6 +361,39 @@ def test_strip_latex_comments():
     text = r"Text with \\% not a comment and % real comment"
     assert strip_latex_comments(text) == r"Text with \\"
 
+    # line breaks other than \n, trailing line break and trailing whitespace
+    text = "a \r\nb\u2028c\xa0%x\nd\n"
+    assert strip_latex_comments(text) == "a\nb\nc\nd"
+
+
+def test_is_comment_stripped():
+    for text in ["", "a\nb", r"50\% off", "a\n\nb", " a", "\\\\\\%"]:
+        assert is_comment_stripped(text)
+        assert strip_latex_comments(text) is text
+    for text in ["a\n", "a \nb", "a%b", r"a\\%", "a\rb", "a\u3000", "a\u2028b"]:
+        assert not is_comment_stripped(text)
+        assert strip_latex_comments(text) != text
+
+
+def test_strip_latex_comments_large_input():
+    """~4MB of comment heavy LaTeX, stripped once and then again"""
+    chunk = (
+        "\\section{Intro} % section comment\n"
+        "Some text with 50\\% and \\\\% a comment   \n"
+        "%% full line comment\n"
+        "\\begin{equation}x^2 \t\n\\end{equation}\n"
+    )
+    expected_chunk = (
+        "\\section{Intro}\nSome text with 50\\% and \\\\\n\n"
+        "\\begin{equation}x^2\n\\end{equation}\n"
+    )
+    count = 4_000_000 // len(chunk)
+
+    stripped = strip_latex_comments(chunk * count)
+    assert stripped == (expected_chunk * count)[:-1]
+    # already stripped text comes back as it is
+    assert strip_latex_comments(stripped) is stripped
+
 
 def test_find_matching_delimiter_edge_cases():
     # Test with empty input
@@ -431,3 +544,25 @@ def test_extract_delimited_args():
     args, end_pos = extract_delimited_args(text[cmd_len:], "{[{{")
     assert args == ["a{nested}", "opt[nested]", "arg2", "arg3"]
     assert text[cmd_len + end_pos :] == " rest"
+
+    # Test with an offset into the text instead of a slice
+    args, end_pos = extract_delimited_args(text, "{[{{", cmd_len)
+    assert args == ["a{nested}", "opt[nested]", "arg2", "arg3"]
+    assert text[end_pos:] == " rest"
+    text = r"\cmd{arg1} rest"
+    assert extract_delimited_args(text, "{{", cmd_len) == (["arg1"], len(text) - 5)
+    assert extract_delimited_args(text, "{", len(text)) == ([], len(text))
+
+
+def test_find_spans():
+    text = r"\cmd [o]{a} { b{c} }x"
+    spans, end_pos = find_delimited_arg_spans(text, "[{[{", 4)
+    assert [text[s:e] for s, e in spans[:2]] == ["o", "a"]
+    assert spans[2] is None
+    assert text[spans[3][0] : spans[3][1]] == " b{c} "
+    assert text[end_pos:] == "x"
+
+    spans, end_pos = find_nested_content_spans(text, start=text.index("{"))
+    assert [text[s:e] for s, e in spans] == ["a", " b{c} "]
+    assert text[end_pos:] == "x"
+    assert find_nested_content_spans(text, max_blocks=1, start=4) == ([], 4)